@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Async Bridge for Inspectallama
+One long-lived asyncio loop for all network work, and a batched channel back to Tk
+"""
+
+import asyncio
+import collections
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+
+class AsyncLoopThread:
+    """A persistent asyncio event loop running in a dedicated daemon thread.
+
+    Every coroutine in the app runs here, so the loop's executor, HTTP
+    connection pools and caches are shared instead of being rebuilt by a
+    fresh ``asyncio.run`` per action.
+    """
+
+    def __init__(self, name: str = "inspectallama-loop", max_workers: int = 32):
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-io")
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> "AsyncLoopThread":
+        """Start the loop thread and wait until the loop is running."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self.thread.start()
+            self._ready.wait()
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.set_default_executor(self.executor)
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine from any thread; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result."""
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback: Callable, *args):
+        """Run a plain callback on the loop thread."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self.thread
+
+    def stop(self):
+        """Stop the loop; pending coroutines are abandoned."""
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.executor.shutdown(wait=False)
+
+
+class TkCallbackChannel:
+    """Deliver callbacks to the Tk thread in batches.
+
+    ``post`` may be called from any thread. The first post after a drain
+    wakes Tk with a single virtual event; the handler then runs every
+    callback queued by that time, so a burst of results costs one event
+    instead of one per result, and an idle app does no polling at all.
+    On a Tcl build without thread support, cross-thread events aren't
+    possible and the channel falls back to a slow poll.
+    """
+
+    EVENT = "<<InspectallamaDeliver>>"
+
+    def __init__(self, root, poll_interval_ms: int = 50):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup_sent = False
+        self.root.bind(self.EVENT, self._drain)
+        try:
+            self._threaded = root.tk.eval("set tcl_platform(threaded)") == "1"
+        except Exception:
+            self._threaded = False
+        if not self._threaded:
+            self.root.after(self.poll_interval_ms, self._poll)
+        # Anything posted before mainloop starts is drained once it does
+        self.root.after_idle(self._drain)
+
+    def post(self, callback: Callable, *args):
+        """Queue ``callback(*args)`` to run on the Tk thread."""
+        with self._lock:
+            self._pending.append((callback, args))
+            if self._wakeup_sent or not self._threaded:
+                return
+            self._wakeup_sent = True
+        try:
+            self.root.event_generate(self.EVENT, when="tail")
+        except Exception:
+            # Mainloop not running yet (drained on start) or root destroyed
+            with self._lock:
+                self._wakeup_sent = False
+
+    def deliver(self, future: Future, callback: Callable[[Any], None], errback: Optional[Callable[[BaseException], None]] = None):
+        """Route a concurrent Future's outcome to Tk-thread callbacks."""
+        def done(fut):
+            if fut.cancelled():
+                return
+            error = fut.exception()
+            if error is None:
+                self.post(callback, fut.result())
+            elif errback is not None:
+                self.post(errback, error)
+        future.add_done_callback(done)
+
+    def _drain(self, event=None):
+        with self._lock:
+            self._wakeup_sent = False
+            batch = list(self._pending)
+            self._pending.clear()
+        for callback, args in batch:
+            try:
+                callback(*args)
+            except Exception:
+                pass  # Silently handle display errors
+
+    def _poll(self):
+        self._drain()
+        self.root.after(self.poll_interval_ms, self._poll)
+
+
+class UiUpdateBus:
+    """Frame-paced widget updates on top of a TkCallbackChannel.
+
+    Log lines from any thread are collected and written with a single
+    ``log_sink`` call per frame; keyed updates such as progress keep only
+    their latest value, so at most one of each is applied per frame no
+    matter how many background tasks report in between.
+    """
+
+    def __init__(self, root, channel: TkCallbackChannel, log_sink: Callable[[str], None], frame_ms: int = 16):
+        self.root = root
+        self.channel = channel
+        self.log_sink = log_sink
+        self.frame_ms = frame_ms
+        self._lines = []
+        self._latest = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._frame_requested = False
+
+    def log(self, line: str):
+        """Append a line to the log at the next frame."""
+        with self._lock:
+            self._lines.append(line)
+            request = self._claim_frame()
+        if request:
+            self.channel.post(self._schedule_frame)
+
+    def set_latest(self, key: str, callback: Callable, *args):
+        """Apply ``callback(*args)`` at the next frame, replacing any older update for ``key``."""
+        with self._lock:
+            self._latest[key] = (callback, args)
+            request = self._claim_frame()
+        if request:
+            self.channel.post(self._schedule_frame)
+
+    def _claim_frame(self) -> bool:
+        if self._frame_requested:
+            return False
+        self._frame_requested = True
+        return True
+
+    def _schedule_frame(self):
+        self.root.after(self.frame_ms, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            lines, self._lines = self._lines, []
+            latest = list(self._latest.values())
+            self._latest.clear()
+            self._frame_requested = False
+        if lines:
+            try:
+                self.log_sink("\n".join(lines) + "\n")
+            except Exception:
+                pass  # Silently handle display errors
+        for callback, args in latest:
+            try:
+                callback(*args)
+            except Exception:
+                pass  # Silently handle display errors
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Batch Journal for Inspectallama
+Append-only progress journal so interrupted --batch runs resume where they stopped
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Set
+
+
+def query_key(line: int, query: str) -> str:
+    """Identity of a batch item: its line number plus a hash of the query text."""
+    return f"{line}:{hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]}"
+
+
+def repair_jsonl(path: str) -> int:
+    """Cut off a partially written last line (left by a crash); returns the bytes dropped."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return 0
+        # Walk back to the last newline; anything after it is an unfinished record
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            index = chunk.rfind(b"\n")
+            if index >= 0:
+                position = position - step + index + 1
+                break
+            position -= step
+        if position < size:
+            f.truncate(position)
+        return size - position
+
+
+class BatchJournal:
+    """Which batch items are finished and how often each has been tried.
+
+    Every attempt is appended to ``path`` as one JSON line: the item key,
+    its attempt number, the outcome and whether it is ``final`` (written to
+    the results file, or out of retries). On start the journal and the
+    results file are read back, so a rerun skips finished items and
+    continues retry counts where they left off; a final record that reached
+    the results file but not the journal still counts as done. In memory it
+    holds the retry counts of open items and the keys finished by earlier
+    runs, which the batch drops one by one as it skips them.
+
+    Final records are fsynced at most every ``sync_interval`` seconds and on
+    close (group commit). The batch fsyncs each results line before its
+    final record is written, so the journal never outlives the result it
+    claims; losing its last lines in a crash only repeats some retries.
+    """
+
+    def __init__(self, path: str, results_path: str, fresh: bool = False, sync_interval: float = 1.0):
+        self.path = path
+        self.results_path = results_path
+        self.sync_interval = sync_interval
+        self.done: Set[str] = set()
+        self.attempts: Dict[str, int] = {}
+        self.retried = 0
+        if not fresh:
+            self.load()
+        self.resumed = bool(self.done or self.attempts)
+        self._file = open(path, "a" if self.resumed else "w", encoding="utf-8")
+        self._file.write(json.dumps({"event": "start", "time": time.time(), "resumed": self.resumed}) + "\n")
+        self._file.flush()
+        self._synced = time.monotonic()
+
+    def load(self):
+        for path in (self.path, self.results_path):
+            repair_jsonl(path)
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    key = entry.get("key")
+                    if not key:
+                        continue
+                    if path == self.path and "attempt" in entry:
+                        self.attempts[key] = max(self.attempts.get(key, 0), entry["attempt"])
+                    if path == self.results_path or entry.get("final"):
+                        self.done.add(key)
+        for key in self.done:
+            self.attempts.pop(key, None)
+
+    def next_attempt(self, key: str) -> int:
+        return self.attempts.get(key, 0) + 1
+
+    def record(self, key: str, line: int, attempt: int, status: str, final: bool, error: Optional[str] = None):
+        entry = {"key": key, "line": line, "attempt": attempt, "status": status, "final": final}
+        if error:
+            entry["error"] = error[:200]
+        if final:
+            self.attempts.pop(key, None)
+        else:
+            self.attempts[key] = attempt
+        if attempt > 1:
+            self.retried += 1
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if final and time.monotonic() - self._synced >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Force everything recorded so far to disk."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._synced = time.monotonic()
+
+    def close(self):
+        try:
+            self.sync()
+        finally:
+            self._file.close()
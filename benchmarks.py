@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Inspectallama
+Offline micro and end-to-end benchmarks with JSON results and a regression compare
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from mock_server import LatencyModel, MockServer
+
+# name -> (group, setup); setup(options) returns the callable that is timed, or
+# (callable, teardown) when it holds resources that must be released afterwards
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, group: str = "micro"):
+    """Register ``setup(options) -> callable | (callable, teardown)`` as a benchmark."""
+    def register(setup):
+        BENCHMARKS[name] = (group, setup)
+        return setup
+    return register
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    ordered = sorted(times)
+    return {
+        "rounds": len(times),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+        "stdev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+    }
+
+
+def _fixture_server(options) -> MockServer:
+    """Content-only mock server (fixtures are generated without starting it)."""
+    return MockServer(results=options.results, page_words=options.page_words, seed=0)
+
+
+def _goose_items(count: int) -> List[Dict]:
+    topics = ["court ruling on data privacy", "market share and revenue data", "peer reviewed study results",
+              "API documentation and setup", "timeline of events", "expert commentary and analysis"]
+    return [{
+        "id": i,
+        "title": f"Item {i}: {topics[i % len(topics)]}",
+        "summary": f"Summary of {topics[(i * 7) % len(topics)]} with evidence and record number {i}",
+        "query": topics[(i * 3) % len(topics)],
+        "url": f"https://site{i % 50}.example.com/article/{i}",
+        "category": "General"
+    } for i in range(count)]
+
+
+# ===== MICRO BENCHMARKS =====
+@benchmark("parse.duckduckgo_html")
+def bench_parse_duckduckgo(options):
+    from cumulative_app import parse_duckduckgo_html
+    html = _fixture_server(options).search_html("solid state batteries")
+    return lambda: parse_duckduckgo_html(html, options.results)
+
+
+@benchmark("extract.readability")
+def bench_readability(options):
+    from cumulative_app import WebSearchApp
+    html = _fixture_server(options).page_html(1, "solid state batteries")
+    return lambda: WebSearchApp.extract_page_text(html)
+
+
+@benchmark("extract.strip_tags")
+def bench_strip_tags(options):
+    from cumulative_app import strip_tags
+    html = _fixture_server(options).page_html(1, "solid state batteries") * 10
+    return lambda: strip_tags(html)
+
+
+@benchmark("case.auto_categorize_10k")
+def bench_auto_categorize(options):
+    from research_case_optimizer import ResearchCaseBuilder
+    builder = ResearchCaseBuilder(_goose_items(10000))
+    return lambda: builder.auto_categorize_goose_items("Academic Research")
+
+
+def _case_data(count: int = 10000):
+    from research_case_optimizer import ResearchCaseBuilder
+    builder = ResearchCaseBuilder(_goose_items(count))
+    case_data = builder.create_case_template("Academic Research")
+    for category, items in builder.auto_categorize_goose_items("Academic Research").items():
+        case_data["research_items"].setdefault(category, []).extend(items)
+    return builder, case_data
+
+
+@benchmark("case.generate_analysis")
+def bench_case_analysis(options):
+    builder, case_data = _case_data()
+    return lambda: builder.generate_case_analysis(case_data)
+
+
+@benchmark("case.export_json")
+def bench_export_json(options):
+    builder, case_data = _case_data()
+    analysis = builder.generate_case_analysis(case_data)
+    directory = tempfile.mkdtemp(prefix="inspectallama-bench-")
+    path = os.path.join(directory, "case.json")
+    return (lambda: builder.export_case_report(case_data, analysis, path),
+            lambda: shutil.rmtree(directory, ignore_errors=True))
+
+
+@benchmark("metrics.sharded_counter_threads")
+def bench_sharded_counter(options):
+    from concurrent.futures import ThreadPoolExecutor
+    from metrics_core import ShardedCounter
+    workers, per_task, tasks = 8, 5000, 32
+
+    def increment(counter):
+        for _ in range(per_task):
+            counter.add()
+
+    def run():
+        # A fresh pool each round, so shards of finished threads are folded and pruned too
+        counter = ShardedCounter()
+        for _ in range(2):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(increment, [counter] * tasks))
+        expected = 2 * tasks * per_task
+        if counter.value != expected:
+            raise RuntimeError(f"ShardedCounter lost updates: {counter.value} != {expected}")
+        if len(counter._shards) > workers + 1:
+            raise RuntimeError(f"ShardedCounter kept {len(counter._shards)} shards for {workers} live threads")
+    return run
+
+
+# ===== END-TO-END BENCHMARKS =====
+def _query_benchmark(drill_down: bool):
+    def setup(options):
+        os.environ.setdefault("LLAMA_API_KEY", "benchmark")
+        import cumulative_app
+        server = MockServer(
+            llm_latency=LatencyModel.parse(options.llm_latency),
+            search_latency=LatencyModel.parse(options.search_latency),
+            page_latency=LatencyModel.parse(options.page_latency),
+            token_rate=options.token_rate,
+            results=max(options.results, 50),
+            seed=0
+        ).start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                app = cumulative_app.WebSearchApp(mode='cli', eager_summaries=options.eager,
+                                                  llama_base_url=server.llama_url, search_url=server.search_url)
+        except BaseException:
+            server.stop()
+            raise
+        rounds = iter(range(1000000))
+
+        def run():
+            # A fresh query each round, so page and token caches start cold
+            query = f"benchmark query {next(rounds)}"
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = app.runtime.run(app.process_search(query, is_drill_down=drill_down))
+            if not results:
+                raise RuntimeError(f"process_search returned no results for {query!r}")
+
+        def teardown():
+            with contextlib.redirect_stdout(io.StringIO()):
+                app.shutdown()
+            server.stop()
+        return run, teardown
+    return setup
+
+
+benchmark("query.process_search_25", group="macro")(_query_benchmark(drill_down=False))
+benchmark("query.process_search_50", group="macro")(_query_benchmark(drill_down=True))
+
+
+# ===== RUNNER =====
+def run_benchmarks(options) -> Dict:
+    results = {}
+    for name, (group, setup) in BENCHMARKS.items():
+        if options.group and group != options.group:
+            continue
+        if options.only and not any(fnmatch.fnmatch(name, pattern) for pattern in options.only.split(",")):
+            continue
+        fn = setup(options)
+        fn, teardown = fn if isinstance(fn, tuple) else (fn, None)
+        rounds = options.macro_rounds if group == "macro" else options.rounds
+        try:
+            fn()  # Warm-up: imports, caches, connection pools
+            times = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                fn()
+                times.append(time.perf_counter() - started)
+        finally:
+            if teardown is not None:
+                teardown()
+        results[name] = dict(summarize(times), group=group)
+        print(f"  {name:<32} median {results[name]['median'] * 1000:10.2f} ms  "
+              f"min {results[name]['min'] * 1000:10.2f} ms  ({rounds} rounds)")
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> List[Dict]:
+    """Median change per benchmark; ``regression`` when slower by more than ``threshold`` percent."""
+    rows = []
+    for name, result in new["results"].items():
+        previous = base["results"].get(name)
+        if previous is None or not previous["median"]:
+            continue
+        change = (result["median"] - previous["median"]) / previous["median"] * 100
+        rows.append({"name": name, "base": previous["median"], "new": result["median"], "change": change,
+                     "regression": change > threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspectallama benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and write JSON results")
+    run.add_argument('--out', default='benchmarks.json', help='Results file (JSON)')
+    run.add_argument('--only', metavar='PATTERNS', help='Comma-separated name globs, e.g. "parse.*,case.*"')
+    run.add_argument('--group', choices=('micro', 'macro'), help='Run one group only')
+    run.add_argument('--rounds', type=int, default=20, help='Rounds per micro benchmark')
+    run.add_argument('--macro-rounds', type=int, default=5, help='Rounds per end-to-end benchmark')
+    run.add_argument('--llm-latency', default='lognormal:0.3,0.3', metavar='SPEC', help='Mock time to first token')
+    run.add_argument('--search-latency', default='fixed:0.1', metavar='SPEC', help='Mock search delay')
+    run.add_argument('--page-latency', default='lognormal:0.05,0.5', metavar='SPEC', help='Mock page delay')
+    run.add_argument('--token-rate', type=float, default=0.0, help='Mock tokens per second (0 = instant)')
+    run.add_argument('--eager', type=int, default=10, help='Eager summaries per query')
+    run.add_argument('--results', type=int, default=30, help='Results in the search fixture')
+    run.add_argument('--page-words', type=int, default=800, help='Words per page fixture')
+
+    cmp = commands.add_parser("compare", help="Compare two result files and flag regressions")
+    cmp.add_argument('base', help='Baseline results JSON')
+    cmp.add_argument('new', help='New results JSON')
+    cmp.add_argument('--threshold', type=float, default=10.0, help='Regression threshold in percent (median)')
+    args = parser.parse_args()
+
+    if args.command == "run":
+        print(f"⏱️ Running benchmarks -> {args.out}")
+        results = run_benchmarks(args)
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": _git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "options": {key: value for key, value in vars(args).items() if key not in ("command", "out")}
+            },
+            "results": results
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare(base, new, args.threshold)
+    print(f"{'Benchmark':<32} {'Base':>11} {'New':>11} {'Change':>8}")
+    for row in rows:
+        flag = "  ❌ regression" if row["regression"] else ("  ✅" if row["change"] < -args.threshold else "")
+        print(f"{row['name']:<32} {row['base'] * 1000:9.2f}ms {row['new'] * 1000:9.2f}ms {row['change']:+7.1f}%{flag}")
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed more than {args.threshold:g}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
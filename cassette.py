@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Cassettes for Inspectallama
+Record every HTTP exchange (search, pages, Llama API) and replay it deterministically
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from mock_server import LatencyModel
+from tracing import TracingHTTPAdapter
+
+# Response headers worth keeping; everything else is dropped to keep cassettes small
+KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+
+def request_key(method: str, url: str, body) -> str:
+    """Identity of an exchange: method, URL and a hash of the request body."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha1(body or b"").hexdigest()[:16]
+    return f"{method} {url} {digest}"
+
+
+class Cassette:
+    """Recorded HTTP exchanges, stored as gzipped JSON lines.
+
+    In ``record`` mode every response that passes through a CassetteAdapter
+    is kept and written by ``save``. In ``replay`` mode requests are matched
+    on method, URL and body hash; repeated identical requests get the
+    recorded responses in order (the last one repeats). ``timing`` sets how
+    long a replayed response takes: "recorded" (the original duration),
+    "none", "scale:0.5" (recorded times a factor) or any mock_server
+    LatencyModel spec such as "lognormal:0.8,0.4".
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, path: str, mode: str = "replay", timing: str = "recorded"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self.entries: List[Dict] = []
+        self.misses = 0
+        self._by_key: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._scale = None
+        self._model = None
+        timing = (timing or "recorded").strip().lower()
+        if timing.startswith("scale:"):
+            self._scale = float(timing.split(":", 1)[1])
+        elif timing not in ("recorded", "none"):
+            self._model = LatencyModel.parse(timing)
+        self.timing = timing
+        self._rng = random.Random(0)
+        if mode == "replay":
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.append(entry)
+                    self._by_key[entry["key"]].append(entry)
+
+    def save(self) -> int:
+        """Write recorded exchanges; returns how many."""
+        with self._lock:
+            entries = list(self.entries)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        return len(entries)
+
+    def record_error(self, request: requests.PreparedRequest, error: Exception, elapsed: float):
+        """Keep a failed exchange (timeout, refused connection) so replays fail the same way."""
+        entry = {
+            "key": request_key(request.method, request.url, request.body),
+            "method": request.method,
+            "url": request.url,
+            "error": "timeout" if isinstance(error, requests.Timeout) else "connection",
+            "message": str(error)[:200],
+            "elapsed": round(elapsed, 4)
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed: float):
+        content = response.content
+        entry = {
+            "key": request_key(request.method, request.url, request.body),
+            "method": request.method,
+            "url": request.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "elapsed": round(elapsed, 4)
+        }
+        try:
+            entry["body"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(content).decode("ascii")
+        with self._lock:
+            self.entries.append(entry)
+
+    def lookup(self, request: requests.PreparedRequest) -> Optional[Dict]:
+        key = request_key(request.method, request.url, request.body)
+        with self._lock:
+            recorded = self._by_key.get(key)
+            if not recorded:
+                self.misses += 1
+                return None
+            index = min(self._served[key], len(recorded) - 1)
+            self._served[key] += 1
+        return recorded[index]
+
+    def delay(self, entry: Dict) -> float:
+        if self.timing == "none":
+            return 0.0
+        if self._scale is not None:
+            return entry["elapsed"] * self._scale
+        if self._model is not None:
+            with self._lock:
+                return self._model.sample(self._rng)
+        return entry["elapsed"]
+
+
+class CassetteAdapter(TracingHTTPAdapter):
+    """Transport adapter that records through to the network or replays from a Cassette"""
+
+    def __init__(self, cassette: Cassette, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        if self.cassette.mode == "record":
+            started = time.perf_counter()
+            try:
+                response = super().send(request, stream=False, timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                self.cassette.record_error(request, e, time.perf_counter() - started)
+                raise
+            self.cassette.record(request, response, time.perf_counter() - started)
+            return response
+        entry = self.cassette.lookup(request)
+        if entry is None:
+            raise requests.ConnectionError(f"Not in cassette: {request.method} {request.url}", request=request)
+        delay = self.cassette.delay(entry)
+        limit = timeout[1] if isinstance(timeout, tuple) else timeout
+        if limit is not None and delay > limit:
+            time.sleep(limit)
+            raise requests.ReadTimeout(f"Replayed response slower than the {limit}s timeout", request=request)
+        if delay > 0:
+            time.sleep(delay)
+        if "error" in entry:
+            error = requests.ReadTimeout if entry["error"] == "timeout" else requests.ConnectionError
+            raise error(entry.get("message", "Recorded failure"), request=request)
+        return self.build_replayed(request, entry)
+
+    @staticmethod
+    def build_replayed(request, entry: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason", "")
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        if "body_b64" in entry:
+            response._content = base64.b64decode(entry["body_b64"])
+        else:
+            response._content = entry.get("body", "").encode("utf-8")
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def mount_cassette(session: requests.Session, cassette: Cassette, pool_size: int = 32) -> requests.Session:
+    """Route all of a session's traffic through ``cassette``."""
+    adapter = CassetteAdapter(cassette, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -5,7 +5,8 @@
 
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import threading, queue, os, sys, time, json, re, webbrowser, argparse, asyncio, tkinter as tk
+import threading, queue, os, sys, time, json, re, webbrowser, argparse, asyncio, itertools, tkinter as tk
+import sqlite3
 from research_case_integration import integrate_research_cases
 from research_case_optimizer import optimize_app_for_research
 import asyncio
@@ -24,36 +25,100 @@ try:
 except ImportError:
     psutil = None
 from readability import Document
-from llama_api_client import AsyncLlamaAPIClient
+from llama_api_client import AsyncLlamaAPIClient, BudgetExceededError
+from result_ranker import BM25Ranker, DomainHistory
+from tokenizer_service import TokenizerService
+from session_budget import BudgetLimits, SessionBudget, LEVEL_NAMES
+from async_bridge import AsyncLoopThread, TkCallbackChannel, UiUpdateBus
+from result_view import ResultPageStack, VirtualResultList
+from system_sampler import SystemSampler, EMPTY_SAMPLE, sparkline
+from latency_histogram import LatencyStats, OPERATIONS
+from tracing import mount_tracing, tracer
+from metrics_exporter import MetricsExporter, render_openmetrics
+from metrics_core import CounterField, ShardedCounter, notifier
+from loop_watchdog import LoopWatchdog
+from query_profiler import QueryProfiler
+from memory_tracker import QueryMemoryTracker
+from cassette import Cassette, mount_cassette
+from batch_journal import BatchJournal, query_key
+from mock_server import from_options as mock_server_from_options
+from metrics_store import MetricsStore, DEFAULT_DB_PATH, build_report, current_query_id, format_report, parse_span
+from collections import OrderedDict, deque
 from datetime import datetime
 from typing import Any, Awaitable, Callable, List, Optional, Dict
 
 
 # ===== CONCURRENT UTILITIES =====
 class ProgressTracker:
-    """Track progress of concurrent operations with callbacks."""
+    """Track progress of concurrent operations with callbacks.
+
+    Counters are sharded per thread; callbacks run on the metrics notifier
+    thread, at most once per notifier interval, with the latest totals.
+    """
+
+    calls_sent = CounterField()
+    calls_completed = CounterField()
+    errors = CounterField()
+    cancelled = CounterField()
 
     def __init__(self):
-        self.calls_sent = 0
-        self.calls_completed = 0
-        self.errors = 0
+        self._counters = {name: ShardedCounter() for name in ('calls_sent', 'calls_completed', 'errors', 'cancelled')}
         self.callbacks = []
 
     def register_callback(self, callback: Callable[[Dict[str, int]], None]):
         """Register a callback to be called on progress updates."""
         self.callbacks.append(callback)
 
-    def update(self, sent=0, completed=0, errors=0):
-        """Update progress counters and notify callbacks."""
-        self.calls_sent += sent
-        self.calls_completed += completed
-        self.errors += errors
+    def update(self, sent=0, completed=0, errors=0, cancelled=0):
+        """Update progress counters and schedule a callback notification."""
+        for name, amount in (('calls_sent', sent), ('calls_completed', completed),
+                             ('errors', errors), ('cancelled', cancelled)):
+            if amount:
+                self._counters[name].add(amount)
+        if self.callbacks:
+            notifier.post(id(self), self._notify)
+
+    def _notify(self):
+        stats = {
+            'calls_sent': self.calls_sent,
+            'calls_completed': self.calls_completed,
+            'errors': self.errors,
+            'cancelled': self.cancelled
+        }
         for cb in self.callbacks:
-            cb({
-                'calls_sent': self.calls_sent,
-                'calls_completed': self.calls_completed,
-                'errors': self.errors
-            })
+            cb(stats)
+
+
+class QueryDeadline:
+    """Wall-clock deadline shared by every stage of one query."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when there is no deadline."""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """A stage timeout: the stage's own cap, shortened to fit the deadline."""
+        remaining = self.remaining()
+        return cap if remaining is None else max(min(cap, remaining), 0.01)
+
+
+def parse_duration(text: str) -> float:
+    """Parse '8s', '500ms', '1.5m' or a bare number of seconds."""
+    match = re.fullmatch(r'\s*([\d.]+)\s*(ms|s|m)?\s*', text or '')
+    if not match:
+        raise ValueError(f"Invalid duration: {text!r}")
+    value = float(match.group(1))
+    unit = match.group(2) or 's'
+    return value / 1000 if unit == 'ms' else value * 60 if unit == 'm' else value
 
 
 async def async_batch_runner(
@@ -61,32 +126,65 @@ async def async_batch_runner(
     batch_size: int = 100,
     tracker: Optional[ProgressTracker] = None,
     loop_fn: Optional[Callable[[List[Any]], List[Callable[[], Awaitable[Any]]]]] = None,
-    max_loops: int = 5
+    max_loops: int = 5,
+    deadline: Optional[QueryDeadline] = None
 ) -> List[Any]:
-    """Run a list of async callables in batches with progress tracking."""
+    """Run a list of async callables in batches with progress tracking.
+
+    With a ``deadline``, tasks still running when it passes are cancelled
+    and batches not yet started are skipped; whatever finished is returned.
+    """
     results = []
     to_run = callables
     loops = 0
 
     while to_run and (max_loops is None or loops < max_loops):
+        if deadline and deadline.expired():
+            if tracker:
+                tracker.update(cancelled=len(to_run))
+            break
+
         batch = to_run[:batch_size]
         to_run = to_run[batch_size:]
 
         if tracker:
             tracker.update(sent=len(batch))
 
-        tasks = [asyncio.create_task(fn()) for fn in batch]
+        pending = {asyncio.create_task(fn()) for fn in batch}
         batch_results = []
 
-        for task in asyncio.as_completed(tasks):
+        while pending:
             try:
-                res = await task
-                batch_results.append(res)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=deadline.remaining() if deadline else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+            except asyncio.CancelledError:
+                # The search was superseded or stopped: take the in-flight work down with it
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
                 if tracker:
-                    tracker.update(completed=1)
-            except Exception as exc:
+                    tracker.update(cancelled=len(pending) + len(to_run))
+                raise
+            if not done:
+                # Deadline reached: cancel the stragglers and keep what finished
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
                 if tracker:
-                    tracker.update(errors=1)
+                    tracker.update(cancelled=len(pending))
+                break
+            for task in done:
+                try:
+                    res = task.result()
+                    batch_results.append(res)
+                    if tracker:
+                        tracker.update(completed=1)
+                except Exception as exc:
+                    if tracker:
+                        tracker.update(errors=1)
 
         results.extend(batch_results)
 
@@ -102,45 +200,106 @@ async def async_batch_runner(
 class PerformanceMetrics:
     """Track performance metrics for web search operations."""
 
+    # Estimated Llama API pricing per token
+    COST_PER_TOKEN_SENT = 0.0001
+    COST_PER_TOKEN_RECEIVED = 0.0002
+    SEARCH_HISTORY_SIZE = 100
+    # System tab redraw cadence when no displayed value changed (sparklines still scroll)
+    SYSTEM_REFRESH_SECONDS = 10.0
+
+    # Counters are sharded per thread so concurrent updates stay exact without locks
+    total_requests = CounterField()
+    successful_requests = CounterField()
+    failed_requests = CounterField()
+    total_tokens_sent = CounterField()
+    total_tokens_received = CounterField()
+    total_api_cost = CounterField()
+    total_search_time = CounterField()
+    total_searches = CounterField()
+    total_processing_time = CounterField()
+    web_pages_fetched = CounterField()
+    web_pages_failed = CounterField()
+    cache_hits = CounterField()
+    cache_misses = CounterField()
+    deferred_summaries = CounterField()
+    usage_reported_requests = CounterField()
+    deadline_met = CounterField()
+    deadline_missed = CounterField()
+    cancelled_searches = CounterField()
+    cancelled_tasks = CounterField()
+    navigation_cached = CounterField()
+    loop_stalls = CounterField()
+    loop_stall_time = CounterField()
+
     def __init__(self):
+        self._counters = {name: ShardedCounter() for name, field in vars(PerformanceMetrics).items()
+                          if isinstance(field, CounterField)}
+        self.listeners = []
+        self.system_sample = dict(EMPTY_SAMPLE)
+        self._system_shown = None
+        self._system_shown_at = 0.0
+        # Fixed-memory latency distributions per operation (search, fetch, extract, llm)
+        self.latency = LatencyStats()
+        # Optional SQLite history (MetricsStore); records are queued, never written inline
+        self.store = None
         self.reset()
         self.session_start_time = time.time()
-        try:
-            self.encoding = tiktoken.get_encoding("cl100k_base")
-        except:
-            self.encoding = None
+        self.tokenizer = TokenizerService()
+        self.tokenizer.preload()
 
     def reset(self):
         """Reset all metrics to zero."""
-        self.total_requests = 0
-        self.successful_requests = 0
-        self.failed_requests = 0
-        self.total_tokens_sent = 0
-        self.total_tokens_received = 0
-        self.total_api_cost = 0.0
-        self.total_search_time = 0.0
-        self.total_processing_time = 0.0
-        self.web_pages_fetched = 0
-        self.web_pages_failed = 0
-        self.cache_hits = 0
-        self.cache_misses = 0
-        self.search_history = []
-        self.request_times = []
-
-    def add_request(self, success=True, tokens_sent=0, tokens_received=0, processing_time=0.0):
-        """Add request metrics."""
-        self.total_requests += 1
+        for counter in self._counters.values():
+            counter.reset()
+        # Bounded: long sessions keep only the most recent searches
+        self.search_history = deque(maxlen=self.SEARCH_HISTORY_SIZE)
+        self.latency.reset()
+        self.navigation_times = deque(maxlen=100)
+        self.memory_reports = deque(maxlen=20)
+        self._changed('api', 'system', 'history', 'memory')
+
+    def subscribe(self, callback: Callable[[str], None]):
+        """Call ``callback(section)`` after a metrics section changes (from the notifier thread)."""
+        self.listeners.append(callback)
+
+    def _count(self, name, amount=1):
+        self._counters[name].add(amount)
+
+    def _changed(self, *sections):
+        """Queue change events; listeners run on the notifier thread, rate-limited per section."""
+        for section in sections:
+            notifier.post((id(self), section), self._notify, section)
+
+    def _notify(self, section):
+        for callback in list(self.listeners):
+            callback(section)
+
+    def add_request(self, success=True, tokens_sent=0, tokens_received=0, processing_time=0.0, usage_reported=False,
+                    llm_time=None):
+        """Add request metrics.
+
+        ``usage_reported`` marks counts that came from the API's own usage
+        block rather than the local tokenizer. ``llm_time`` is the API call
+        alone when ``processing_time`` also covers fetching the page.
+        """
+        self._count('total_requests')
         if success:
-            self.successful_requests += 1
+            self._count('successful_requests')
         else:
-            self.failed_requests += 1
-        self.total_tokens_sent += tokens_sent
-        self.total_tokens_received += tokens_received
-        self.total_processing_time += processing_time
-        self.request_times.append(processing_time)
-
-        # Estimate cost (rough estimate for Llama API)
-        self.total_api_cost += (tokens_sent * 0.0001) + (tokens_received * 0.0002)
+            self._count('failed_requests')
+        self._count('total_tokens_sent', tokens_sent)
+        self._count('total_tokens_received', tokens_received)
+        self._count('total_processing_time', processing_time)
+        self.latency.record('llm', processing_time if llm_time is None else llm_time)
+        if usage_reported:
+            self._count('usage_reported_requests')
+
+        cost = (tokens_sent * self.COST_PER_TOKEN_SENT) + (tokens_received * self.COST_PER_TOKEN_RECEIVED)
+        self._count('total_api_cost', cost)
+        if self.store is not None:
+            self.store.record_request('llm', success, processing_time if llm_time is None else llm_time,
+                                      tokens_sent, tokens_received, cost)
+        self._changed('api', 'system')
 
     def add_search(self, query, results_count, search_time):
         """Add search metrics."""
@@ -150,17 +309,91 @@ class PerformanceMetrics:
             'search_time': search_time,
             'timestamp': datetime.now().isoformat()
         })
-        self.total_search_time += search_time
+        self._count('total_searches')
+        self._count('total_search_time', search_time)
+        self.latency.record('search', search_time)
+        if self.store is not None:
+            self.store.record_request('search', results_count > 0, search_time)
+        self._changed('api', 'history')
+
+    def add_query(self, query_id, query, outcome, results=0, eager=0, deferred=0, duration=0.0):
+        """Add a finished query (persisted only; the live panes use add_search)."""
+        if self.store is not None:
+            self.store.record_query(query_id, query, outcome, results, eager, deferred, duration)
+
+    def add_deferred_summaries(self, count):
+        """Add results whose LLM summary was deferred until viewed."""
+        self._count('deferred_summaries', count)
+        self._changed('api')
+
+    def add_deadline_result(self, met, missed):
+        """Add how many summaries finished before / after a query deadline."""
+        self._count('deadline_met', met)
+        self._count('deadline_missed', missed)
+        self._changed('api')
+
+    def add_cancelled(self, searches=0, tasks=0):
+        """Add searches and in-flight tasks that were cancelled."""
+        self._count('cancelled_searches', searches)
+        self._count('cancelled_tasks', tasks)
+        self._changed('api')
+
+    def add_navigation(self, seconds, cached):
+        """Add a Back navigation and whether it reused a rendered page."""
+        self.navigation_times.append(seconds)
+        if cached:
+            self._count('navigation_cached')
+        self._changed('api')
+
+    def get_navigation_summary(self):
+        """Get last / average Back navigation latency in milliseconds."""
+        if not self.navigation_times:
+            return "No navigation yet"
+        last = self.navigation_times[-1] * 1000
+        average = sum(self.navigation_times) / len(self.navigation_times) * 1000
+        return f"{last:.1f} ms last / {average:.1f} ms avg ({self.navigation_cached} cached)"
+
+    def add_memory_report(self, report):
+        """Add a per-query tracemalloc report (QueryMemoryTracker)."""
+        self.memory_reports.append(report)
+        self._changed('memory')
+
+    def add_loop_stall(self, seconds):
+        """Add an event loop stall reported by the watchdog."""
+        self._count('loop_stalls')
+        self._count('loop_stall_time', seconds)
+        self._changed('system')
+
+    def add_cache_lookup(self, hit):
+        """Add a page cache hit or miss."""
+        if hit:
+            self._count('cache_hits')
+        else:
+            self._count('cache_misses')
+        if self.store is not None:
+            self.store.record_request('cache', hit)
+
+    def timed(self, operation, fn, *args):
+        """Run ``fn(*args)`` and record its latency under ``operation``."""
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.latency.record(operation, time.perf_counter() - started)
+            self._changed('api')
 
     def add_web_fetch(self, success=True):
         """Add web fetch metrics."""
-        self.web_pages_fetched += 1
+        self._count('web_pages_fetched')
         if not success:
-            self.web_pages_failed += 1
+            self._count('web_pages_failed')
+        if self.store is not None:
+            self.store.record_request('fetch', success)
+        self._changed('api')
 
     def get_average_request_time(self):
         """Get average request time."""
-        return sum(self.request_times) / len(self.request_times) if self.request_times else 0
+        return self.total_processing_time / self.total_requests if self.total_requests else 0
 
     def get_success_rate(self):
         """Get success rate."""
@@ -170,23 +403,23 @@ class PerformanceMetrics:
         """Get uptime."""
         return time.time() - self.session_start_time
 
+    def set_system_sample(self, sample):
+        """Store the latest sample from the background SystemSampler.
+
+        The System tab is only flagged for redraw when a displayed value
+        visibly moves, or every SYSTEM_REFRESH_SECONDS for the sparklines.
+        """
+        self.system_sample = sample
+        shown = (round(sample['cpu_percent']), round(sample['memory_mb']), sample['threads'],
+                 sample['sockets'], round(sample['loop_lag_ms']))
+        now = time.monotonic()
+        if shown != self._system_shown or now - self._system_shown_at >= self.SYSTEM_REFRESH_SECONDS:
+            self._system_shown, self._system_shown_at = shown, now
+            self._changed('system')
+
     def get_system_metrics(self):
-        """Get system metrics."""
-        try:
-            process = psutil.Process()
-            return {
-                'cpu_percent': process.cpu_percent(),
-                'memory_mb': process.memory_info().rss / 1024 / 1024,
-                'memory_percent': process.memory_percent(),
-                'threads': process.num_threads()
-            }
-        except:
-            return {
-                'cpu_percent': 0,
-                'memory_mb': 0,
-                'memory_percent': 0,
-                'threads': 0
-            }
+        """Get the latest system metrics sample."""
+        return self.system_sample
 
 
 # ===== ANSI COLORS FOR CLI =====
@@ -207,12 +440,88 @@ class Colors:
 class WebSearchApp:
     """Main application class combining GUI and CLI functionality."""
 
-    def __init__(self, mode='gui'):
+    CLI_MAX_LINES = 2000
+    # Hidden result pages kept rendered for instant Back navigation
+    RENDERED_PAGES = 3
+    # Minimum spacing between metrics pane redraws
+    METRICS_REDRAW_MS = 500
+    # Samples shown in each system sparkline
+    SPARKLINE_WIDTH = 40
+    DEFAULT_SEARCH_URL = "https://duckduckgo.com/html/"
+    # Event loop stalls longer than this are attributed to the blocking code site
+    LOOP_STALL_SECONDS = 0.1
+
+    def __init__(self, mode='gui', eager_summaries=10, budget=None, deadline=None, supersede_searches=True,
+                 trace_path=None, metrics_port=None, metrics_db=None, profile_dir=None, trace_memory=False,
+                 llama_base_url=None, search_url=None, cassette=None):
         self.mode = mode
-        self.setup_api_client()
+        # Endpoints are overridable so the whole pipeline can run against a mock server
+        self.llama_base_url = llama_base_url
+        self.search_url = search_url or os.getenv('INSPECTALLAMA_SEARCH_URL') or self.DEFAULT_SEARCH_URL
+        # Span tracing (Chrome trace-event JSON) is off unless a trace file is requested
+        self.trace_path = trace_path
+        tracer.enabled = bool(trace_path)
+        # One persistent event loop owns all network work for the whole session
+        self.runtime = AsyncLoopThread().start()
+        # Pooled session; the adapters record HTTP phase spans when tracing is on
+        self.http = mount_tracing(requests.Session(), pool_size=32)
+        self.page_cache = OrderedDict()
+        self.page_cache_size = 256
+        # Optional per-query deadline in seconds
+        self.deadline = deadline
+        # A new search cancels the ones still running instead of queueing behind them
+        self.supersede_searches = supersede_searches
+        self._active_searches = {}
+        self._search_ids = itertools.count(1)
+        self._search_queue = None
         self.metrics = PerformanceMetrics()
+        # Optional cross-session history in SQLite ('report' / --report read it back)
+        self.metrics_db = metrics_db
+        if metrics_db:
+            self.metrics.store = MetricsStore(metrics_db, mode=mode)
+        self.budget = budget or SessionBudget(
+            cost_per_token_sent=PerformanceMetrics.COST_PER_TOKEN_SENT,
+            cost_per_token_received=PerformanceMetrics.COST_PER_TOKEN_RECEIVED
+        )
+        # --profile: per-query cProfile + wall-clock stack samples written to profile_dir
+        self.profiler = QueryProfiler(profile_dir, executor_prefix=f"{self.runtime.name}-io", report=self.cli_print)
+        # --trace-memory: tracemalloc snapshots around each query
+        self.memory_tracker = QueryMemoryTracker(enabled=trace_memory, on_report=self._on_memory_report)
+        # Blocking calls inside coroutines show up as loop stalls, charged to the code that blocked
+        self.watchdog = LoopWatchdog(self.runtime.loop, self.runtime.thread, threshold=self.LOOP_STALL_SECONDS,
+                                     on_stall=self._on_loop_stall).start()
+        # System stats (CPU, RSS, sockets) are sampled off the Tk thread; loop lag comes from the watchdog
+        self.sampler = SystemSampler(on_sample=self.metrics.set_system_sample,
+                                     lag_source=self.watchdog.current_lag).start()
+        # Optional local OpenMetrics endpoint for headless runs
+        self.exporter = None
+        if metrics_port:
+            self.exporter = MetricsExporter(self.render_openmetrics, port=metrics_port).start()
+        self.setup_api_client()
+        # Record/replay every search, page and LLM exchange (--record / --replay)
+        self.cassette = cassette
+        if cassette is not None:
+            mount_cassette(self.http, cassette)
+            mount_cassette(self.client.session, cassette)
+        # Only the top-ranked results are summarized up front; the rest on demand
+        self.eager_summaries = eager_summaries
+        self.domain_history = DomainHistory()
+        self.ranker = BM25Ranker(domain_history=self.domain_history)
+        self._lazy_summaries = set()
         self.current_results = []
         self.result_history = []
+        self._page_ids = 0
+        self._query_ids = itertools.count(1)
+        self._shown_search = 0
+        self.last_query_id = None
+        # Metrics pane redraw state: sections flagged by change events
+        self._metrics_lock = threading.Lock()
+        self._metrics_dirty = set()
+        self._metrics_lines = {}
+        self._metrics_tabs = {}
+        self._metrics_renderers = {}
+        self._metrics_drawn_at = 0.0
+        self._metrics_redraw_scheduled = False
         self.current_query = ""
         self.goose_categories = ["General", "Important", "Follow-up", "Archive"]
         self.goose_items = []
@@ -276,7 +585,12 @@ class WebSearchApp:
                 print(f"{Colors.FAIL}Error: Please set your LLAMA_API_KEY environment variable.{Colors.ENDC}")
             sys.exit(1)
 
-        self.client = AsyncLlamaAPIClient(api_key=self.api_key)
+        self.client = AsyncLlamaAPIClient(
+            api_key=self.api_key,
+            base_url=self.llama_base_url,
+            tokenizer=self.metrics.tokenizer,
+            budget=self.budget
+        )
 
     def setup_gui(self):
         self.root = tk.Tk()
@@ -296,6 +610,7 @@ class WebSearchApp:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Launch Research Case Optimizer", command=optimize_app_for_research)
+        tools_menu.add_command(label="Export Trace...", command=self.export_trace_dialog)
         try:
             from PIL import Image, ImageTk
             image_path = os.path.join(os.path.dirname(__file__), "llama_detective_bg.jpg")
@@ -308,8 +623,11 @@ class WebSearchApp:
         except Exception as e:
             self.root.configure(bg=self.colors['bg'])
             self.canvas_bg = None
-        self.message_queue = queue.Queue()
-        self.results_queue = queue.Queue()
+        # Background work reaches widgets only through this channel
+        self.ui = TkCallbackChannel(self.root)
+        self.ui_bus = UiUpdateBus(self.root, self.ui, self._append_cli_text)
+        # Metrics redraw on change events; system stats are sampled off the Tk thread
+        self.metrics.subscribe(self._on_metrics_changed)
         self.create_gui_on_canvas()
         integrate_research_cases(self)
         self.start_gui_threads()
@@ -532,6 +850,10 @@ class WebSearchApp:
         send_btn = ttk.Button(input_frame, text="Send", command=self.send_command)
         send_btn.pack(side=tk.RIGHT, padx=(5, 0))
 
+        # Stop button cancels in-flight searches
+        stop_btn = ttk.Button(input_frame, text="⏹ Stop", command=self.stop_searches)
+        stop_btn.pack(side=tk.RIGHT, padx=(5, 0))
+
         # Progress bar
         self.progress = ttk.Progressbar(cli_frame, mode='determinate')
         self.progress.pack(fill=tk.X, padx=5, pady=5)
@@ -586,6 +908,21 @@ class WebSearchApp:
         )
         self.system_metrics_text.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
 
+        # Memory Tab
+        memory_frame = ttk.Frame(self.metrics_notebook)
+        self.metrics_notebook.add(memory_frame, text="Memory")
+
+        self.memory_text = tk.Text(
+            memory_frame,
+            height=8,
+            width=40,
+            font=('Consolas', 8),
+            bg='#f0f0f0',
+            fg='#000000',
+            wrap=tk.NONE
+        )
+        self.memory_text.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+
         # Search History Tab
         history_frame = ttk.Frame(self.metrics_notebook)
         self.metrics_notebook.add(history_frame, text="History")
@@ -651,7 +988,16 @@ class WebSearchApp:
         reset_btn = ttk.Button(metrics_frame, text="Reset Metrics", command=self.reset_metrics)
         reset_btn.pack(pady=5)
 
-        # Start auto-update
+        # Sections are redrawn on change events, not on a timer
+        self._metrics_tabs = {str(api_frame): 'api', str(system_frame): 'system', str(memory_frame): 'memory',
+                              str(history_frame): 'history'}
+        self._metrics_renderers = {
+            'api': (self.api_metrics_text, self.render_api_metrics),
+            'system': (self.system_metrics_text, self.render_system_metrics),
+            'memory': (self.memory_text, self.render_memory_metrics),
+            'history': (self.history_text, self.render_search_history)
+        }
+        self.metrics_notebook.bind('<<NotebookTabChanged>>', self._on_metrics_tab_changed)
         self.update_metrics_display()
 
     def create_results_pane(self, parent=None):
@@ -678,28 +1024,26 @@ class WebSearchApp:
         self.query_label = ttk.Label(header_frame, text="", font=('Segoe UI', 10, 'italic'))
         self.query_label.pack(side=tk.LEFT, padx=10)
 
-        # Results frame with scrollbar
-        results_container = ttk.Frame(results_frame)
-        results_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Canvas for scrolling
-        self.canvas = tk.Canvas(results_container, bg='#f0f0f0')
-        scrollbar = ttk.Scrollbar(results_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        # Virtualized results list: only on-screen cards exist as widgets.
+        # Pages for recent history states stay rendered so Back is a swap.
+        self.result_pages = ResultPageStack(
+            lambda: VirtualResultList(
+                results_frame,
+                goose_categories=self.goose_categories,
+                on_open=self.open_result_url,
+                on_copy=self.copy_to_clipboard,
+                on_drill=self.drill_down_search,
+                on_goose=lambda result, category: self.add_to_goose(result, category),
+                on_summarize=self.summarize_pending_result,
+                on_case=self.add_result_card_to_case if hasattr(self, 'add_item_to_case') else None,
+                on_visible=self.summarize_visible_results
+            ),
+            max_pages=self.RENDERED_PAGES
         )
-
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.result_pages.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
         # Bind mousewheel to canvas
-        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.result_pages.active.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
 
     def create_ai_answer_pane(self, parent=None):
         """Create AI answer pane."""
@@ -734,13 +1078,18 @@ class WebSearchApp:
         self.ai_answer_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     def start_gui_threads(self):
-        """Start GUI background threads."""
-        # Start checking for messages
-        self.check_messages()
+        """Announce the GUI; all background work runs on the app's event loop."""
+        self.cli_print("🚀 Inspectallama Started!")
+        self.cli_print("💡 Type your search query and press Enter")
+        self.cli_print("🔗 Click on URLs in results to open them")
+        self.cli_print("=" * 50)
 
-        # Start CLI thread
-        self.cli_thread = threading.Thread(target=self.cli_loop, daemon=True)
-        self.cli_thread.start()
+    def dispatch_ui(self, callback, *args):
+        """Run a display callback on the Tk thread (directly in CLI mode)."""
+        if self.mode == 'gui':
+            self.ui.post(callback, *args)
+        else:
+            callback(*args)
 
     def setup_cli(self):
         """Setup CLI mode."""
@@ -762,55 +1111,73 @@ class WebSearchApp:
         print()
 
     # ===== SEARCH FUNCTIONALITY =====
-    def duckduckgo_web_search(self, query: str, max_results: int = 10):
+    def duckduckgo_web_search(self, query: str, max_results: int = 10, timeout: float = 10):
         if BeautifulSoup is None:
             self.cli_print("BeautifulSoup is not installed.")
             return []
         results = []
         try:
-            url = f"https://duckduckgo.com/html/?q={urllib.parse.quote(query)}"
-            resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+            url = f"{self.search_url}?q={urllib.parse.quote(query)}"
+            resp = self.http.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=timeout)
             if resp.ok:
-                soup = BeautifulSoup(resp.text, "html.parser")
-                for result in soup.select('.result'):
-                    title_tag = result.select_one('.result__title')
-                    url_tag = result.select_one('.result__url')
-                    snippet_tag = result.select_one('.result__snippet')
-                    title = title_tag.get_text(strip=True) if title_tag else ''
-                    url = url_tag['href'] if url_tag and url_tag.has_attr('href') else ''
-                    snippet = snippet_tag.get_text(strip=True) if snippet_tag else ''
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'snippet': snippet
-                    })
-                    if len(results) >= max_results:
-                        break
+                results = parse_duckduckgo_html(resp.text, max_results)
             else:
                 self.cli_print(f"DuckDuckGo request failed: {resp.status_code}")
         except Exception as e:
             self.cli_print(f"DuckDuckGo search error: {e}")
         return results
 
-    async def llama_summarize_web_result(self, result: dict, analysis_id: str = ""):
-        """Summarize web result using Llama."""
+    def fetch_page(self, url: str, timeout: float = 10):
+        """Fetch a result page; returns its HTML or None."""
+        resp = self.http.get(url, timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
+        if resp.ok and 'text/html' in resp.headers.get('Content-Type', ''):
+            return resp.text
+        return None
+
+    @staticmethod
+    def extract_page_text(html: str, max_chars: int = 4000):
+        """Extract readable text from a page with readability."""
+        doc = Document(html)
+        page_text = strip_tags(doc.summary(html_partial=False))
+        return page_text[:max_chars]  # Truncate
+
+    async def llama_summarize_web_result(self, result: dict, analysis_id: str = "", deadline: Optional[QueryDeadline] = None):
+        """Summarize web result using Llama.
+
+        Fetch and extraction run in the executor so the event loop stays free
+        and every stage can be bounded by the query ``deadline``.
+        """
         start_time = time.time()
+        deadline = deadline or QueryDeadline()
+        loop = asyncio.get_event_loop()
 
         url = result.get('href') or result.get('url')
         snippet = result.get('body') or result.get('snippet') or ''
         title = result.get('title') or ''
 
-        # Try to fetch full page content
-        page_text = None
+        # Try to fetch full page content (drill-downs often revisit the same pages)
+        page_text = self.page_cache.get(url) if url else None
         if url:
+            self.metrics.add_cache_lookup(page_text is not None)
+        if page_text is not None:
+            self.page_cache.move_to_end(url)  # LRU: a hit makes the page most recent
+        if page_text is None and url and not deadline.expired():
             try:
-                resp = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-                if resp.ok and 'text/html' in resp.headers.get('Content-Type', ''):
-                    doc = Document(resp.text)
-                    page_text = doc.summary(html_partial=False)
-                    # Remove HTML tags
-                    page_text = re.sub('<[^<]+?>', '', page_text)
-                    page_text = page_text[:4000]  # Truncate
+                with tracer.span("page.fetch", url=url):
+                    html = await asyncio.wait_for(
+                        tracer.run_in_executor(loop, self.metrics.timed, 'fetch', self.fetch_page, url,
+                                               deadline.timeout(10)),
+                        deadline.remaining()
+                    )
+                if html:
+                    with tracer.span("page.extract", bytes=len(html)):
+                        page_text = await asyncio.wait_for(
+                            tracer.run_in_executor(loop, self.metrics.timed, 'extract', self.extract_page_text, html),
+                            deadline.remaining()
+                        )
+                    self.page_cache[url] = page_text
+                    if len(self.page_cache) > self.page_cache_size:
+                        self.page_cache.popitem(last=False)
                     self.metrics.add_web_fetch(True)
                 else:
                     self.metrics.add_web_fetch(False)
@@ -822,158 +1189,345 @@ class WebSearchApp:
             prompt = f"Summarize this web page concisely for search results. Focus on key information.\n\nTitle: {title}\nURL: {url}\nContent: {page_text}"
         else:
             prompt = f"Summarize this search result concisely.\n\nTitle: {title}\nSnippet: {snippet}\nURL: {url}"
+        messages = [{"role": "user", "content": prompt}]
 
-        # Estimate tokens
-        tokens_sent = len(prompt.split()) * 1.3
-
+        llm_started = time.time()
         try:
             response = await self.client.chat.completions.create(
                 model="Llama-3.3-70B-Instruct",
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 max_completion_tokens=300,
                 temperature=0.7,
+                timeout=deadline.timeout(30),
             )
 
-            summary = str(response.completion_message.content)
-            tokens_received = len(summary.split()) * 1.3
+            llm_time = time.time() - llm_started
+            summary = str(response.completion_message.content.text)
             processing_time = time.time() - start_time
+            tokens_sent, tokens_received = await self.count_response_tokens(response, messages, summary)
 
             self.metrics.add_request(
                 success=True,
-                tokens_sent=int(tokens_sent),
-                tokens_received=int(tokens_received),
-                processing_time=processing_time
+                tokens_sent=tokens_sent,
+                tokens_received=tokens_received,
+                processing_time=processing_time,
+                usage_reported=(response.usage or {}).get('source') == 'api',
+                llm_time=llm_time
             )
 
             return {
                 "title": title,
                 "url": url,
                 "summary": summary,
-                "analysis_id": analysis_id
+                "analysis_id": analysis_id,
+                "ok": True
+            }
+        except BudgetExceededError:
+            # Out of budget: fall back to an extractive summary, no API call made
+            return {
+                "title": title,
+                "url": url,
+                "summary": extractive_summary(page_text or snippet),
+                "analysis_id": analysis_id,
+                "extractive": True,
+                "ok": False
             }
         except Exception as e:
             processing_time = time.time() - start_time
             self.metrics.add_request(
                 success=False,
-                tokens_sent=int(tokens_sent),
+                tokens_sent=0,
                 tokens_received=0,
-                processing_time=processing_time
+                processing_time=processing_time,
+                llm_time=time.time() - llm_started
             )
 
             return {
                 "title": title,
                 "url": url,
                 "summary": f"Error summarizing: {str(e)}",
-                "analysis_id": analysis_id
+                "analysis_id": analysis_id,
+                "ok": False,
+                "timed_out": isinstance(e, (asyncio.TimeoutError, requests.Timeout)) or deadline.expired()
             }
 
-    async def process_search(self, query, is_drill_down=False):
-        """Process search query with extensive analysis."""
+    async def count_response_tokens(self, response, messages, completion_text):
+        """Return (sent, received) tokens, preferring the API's usage block."""
+        if response.usage is not None:
+            return response.usage['prompt_tokens'], response.usage['completion_tokens']
+        tokenizer = self.metrics.tokenizer
+        return await tokenizer.count_messages_async(messages), await tokenizer.count_async(completion_text)
+
+    async def process_search(self, query, is_drill_down=False, deadline=None, status=None):
+        """Process search query with extensive analysis.
+
+        ``deadline`` (seconds, defaults to the app's ``--deadline``) bounds the
+        whole query: unfinished summaries are cancelled when it passes and
+        those results fall back to their snippets. A ``status`` dict, if
+        given, receives the query id, outcome and error message.
+        """
         if not query or query.lower() == 'exit':
             return
 
+        query_deadline = QueryDeadline(deadline if deadline is not None else self.deadline)
+        tracker = None
         search_start_time = time.time()
         self.current_query = query
+        # A budget scope of its own, so overlapping queries can't spend or reset each other's
+        self.budget.start_query()
+
+        search_number = next(self._query_ids)
+        query_id = f"q{search_number}"
+        self.last_query_id = query_id
+        # Stamps this query's id on persisted request records (scoped to this task)
+        current_query_id.set(query_id)
+        outcome, result_count, eager_count, deferred_count = 'error', 0, 0, 0
+        error = None
+        # Outermost, so the snapshots themselves are not charged to the query's span or profile
+        async with self.memory_tracker.track(query_id, query):
+            with tracer.span("query", lane=f"{query_id} {query[:40]}", query_id=query_id, query=query,
+                             drill_down=is_drill_down), self.profiler.profile(query_id, query):
+                try:
+                    # Get web results
+                    max_results = 50 if is_drill_down else 25
+                    self.cli_print(f"📡 Fetching {max_results} web results...")
+                    try:
+                        with tracer.span("search.duckduckgo", max_results=max_results):
+                            web_results = await asyncio.wait_for(
+                                tracer.run_in_executor(
+                                    asyncio.get_event_loop(), self.duckduckgo_web_search, query, max_results,
+                                    query_deadline.timeout(10)
+                                ),
+                                query_deadline.remaining()
+                            )
+                    except asyncio.TimeoutError:
+                        web_results = []
+
+                    if not web_results:
+                        outcome = 'empty'
+                        self.cli_print("❌ No web results found. Try another query.")
+                        return
+
+                    # Record search metrics
+                    search_time = time.time() - search_start_time
+                    self.metrics.add_search(query, len(web_results), search_time)
+
+                    # Rank locally so only the most relevant results cost an LLM call
+                    with tracer.span("search.rank", results=len(web_results)):
+                        ranking = self.ranker.rank(query, web_results)
+                    web_results = [dict(web_results[idx], relevance=score) for idx, score in ranking]
+                    # Spend fewer eager summaries as the budget runs down
+                    eager_count = self.budget.scale(min(self.eager_summaries, len(web_results)))
+
+                    # Process results with AI
+                    self.cli_print(f"🧠 Processing top {eager_count} of {len(web_results)} results with AI analysis...")
+
+                    # Create progress tracker
+                    tracker = ProgressTracker()
+                    tracker.register_callback(self.progress_callback)
+
+                    # Create callables for parallel processing
+                    callables = []
+                    for i, result in enumerate(web_results[:eager_count]):
+                        async def summarize_result(res=result, idx=i):
+                            # Each result's fetch -> extract -> LLM chain gets its own trace lane
+                            with tracer.span("summary", lane=f"{query_id} result {idx + 1}", result_id=f"summary_{idx}"):
+                                return await self.llama_summarize_web_result(res, f"summary_{idx}", query_deadline)
+                        callables.append(summarize_result)
+
+                    # Process in parallel
+                    with tracer.span("summarize.batch", eager=eager_count):
+                        analysis_results = await async_batch_runner(
+                            callables,
+                            batch_size=10,
+                            tracker=tracker,
+                            deadline=query_deadline
+                        ) if callables else []
+                    # Results arrive in completion order, so match them back by analysis id
+                    analyzed_by_id = {analyzed.get('analysis_id'): analyzed for analyzed in analysis_results}
+
+                    # Combine results, always show snippet if summary is missing or not a string
+                    enhanced_results = []
+                    for i, original in enumerate(web_results):
+                        analyzed = analyzed_by_id.get(f"summary_{i}", {})
+                        summary = analyzed.get('summary', '')
+                        # If summary is not a string, convert to string
+                        if not isinstance(summary, str):
+                            summary = str(summary)
+                        # If summary looks like a Content object or is empty, fallback to snippet
+                        if (summary.startswith('<llama_api_client.Content') or not summary.strip() or summary.strip().lower() in ['no response generated', 'error summarizing:']):
+                            summary = original.get('snippet', '') or 'No summary available'
+                        enhanced_result = {
+                            'index': i + 1,
+                            'title': analyzed.get('title', original.get('title', '')),
+                            'url': analyzed.get('url', original.get('url', original.get('href', ''))),
+                            'snippet': original.get('snippet', ''),
+                            'summary': summary,
+                            'analysis_id': analyzed.get('analysis_id', f"summary_{i}"),
+                            'analysis_passes': 1 if analyzed else 0,
+                            'relevance': round(original.get('relevance', 0.0), 3),
+                            # Deferred, or missed the deadline: summarize later on demand
+                            'summary_pending': not analyzed
+                        }
+                        enhanced_results.append(enhanced_result)
+                    deferred_count = sum(1 for result in enhanced_results if result['summary_pending'])
+                    self.metrics.add_deferred_summaries(deferred_count)
+
+                    outcome, result_count = 'ok', len(enhanced_results)
+
+                    # Update display, unless a search started after this one is already showing
+                    if search_number > self._shown_search:
+                        self._shown_search = search_number
+                        self.current_results = enhanced_results
+                        self.dispatch_ui(self.display_results, enhanced_results)
+                    self.cli_print(f"✅ Search complete! Found {len(enhanced_results)} results ({deferred_count} summaries deferred).")
+                    if query_deadline.seconds:
+                        # Only summaries the LLM actually produced count; errors and timeouts fell back
+                        met = sum(1 for analyzed in analyzed_by_id.values() if analyzed.get('ok'))
+                        missed = eager_count - met
+                        # Cancelled at the deadline (no result) or the request itself timed out; the rest failed
+                        timed_out = (eager_count - len(analyzed_by_id)
+                                     + sum(1 for analyzed in analyzed_by_id.values() if analyzed.get('timed_out')))
+                        self.metrics.add_deadline_result(met, missed)
+                        self.cli_print(f"⏱️ {met}/{eager_count} summaries met the {query_deadline.seconds:g}s deadline"
+                                       + (f"; {missed} fell back to snippets ({timed_out} timed out, "
+                                          f"{missed - timed_out} failed)" if missed else ""))
+                    # Deep integration: Automatically build research case and run focused analysis
+                    try:
+                        if hasattr(self, 'auto_build_case_from_results'):
+                            self.auto_build_case_from_results(enhanced_results, query)
+                            self.cli_print("📁 Research Case auto-built from results.")
+                        if hasattr(self, 'run_case_analysis'):
+                            self.run_case_analysis()
+                            self.cli_print("🧠 Case analysis triggered.")
+                    except Exception as e:
+                        self.cli_print(f"⚠️ Case integration error: {e}")
+                    return enhanced_results
+
+                except asyncio.CancelledError:
+                    outcome = 'cancelled'
+                    cancelled_tasks = tracker.cancelled if tracker else 0
+                    self.metrics.add_cancelled(searches=1, tasks=cancelled_tasks)
+                    self.cli_print(f"🛑 Cancelled search: {query} ({cancelled_tasks} in-flight summaries cancelled)")
+                    raise
+                except Exception as e:
+                    error = str(e)
+                    self.cli_print(f"❌ Search error: {str(e)}")
+                finally:
+                    self.metrics.add_query(query_id, query, outcome, result_count, eager_count, deferred_count,
+                                           time.time() - search_start_time)
+                    if status is not None:
+                        status.update(query_id=query_id, outcome=outcome, error=error)
+
+    def summarize_pending_result(self, result):
+        """Summarize a deferred result on demand (scrolled into view or clicked)."""
+        if not result.get('summary_pending') or id(result) in self._lazy_summaries:
+            return
+        self._lazy_summaries.add(id(result))
+        self.runtime.submit(self._summarize_pending(result))
 
+    async def _summarize_pending(self, result):
+        """Fill in a deferred summary and refresh its card."""
         try:
-            # Get web results
-            max_results = 50 if is_drill_down else 25
-            self.cli_print(f"📡 Fetching {max_results} web results...")
-            web_results = await asyncio.get_event_loop().run_in_executor(
-                None, self.duckduckgo_web_search, query, max_results
-            )
-
-            if not web_results:
-                self.cli_print("❌ No web results found. Try another query.")
-                return
-
-            # Record search metrics
-            search_time = time.time() - search_start_time
-            self.metrics.add_search(query, len(web_results), search_time)
-
-            # Process results with AI
-            self.cli_print(f"🧠 Processing {len(web_results)} results with AI analysis...")
-
-            # Create progress tracker
-            tracker = ProgressTracker()
-            tracker.register_callback(self.progress_callback)
-
-            # Create callables for parallel processing
-            callables = []
-            for i, result in enumerate(web_results):
-                async def summarize_result(res=result, idx=i):
-                    return await self.llama_summarize_web_result(res, f"summary_{idx}")
-                callables.append(summarize_result)
-
-            # Process in parallel
-            analysis_results = await async_batch_runner(
-                callables,
-                batch_size=10,
-                tracker=tracker
-            )
-
-            # Combine results, always show snippet if summary is missing or not a string
-            enhanced_results = []
-            for i, (original, analyzed) in enumerate(zip(web_results, analysis_results)):
-                summary = analyzed.get('summary', '')
-                # If summary is not a string, convert to string
-                if not isinstance(summary, str):
-                    summary = str(summary)
-                # If summary looks like a Content object or is empty, fallback to snippet
-                if (summary.startswith('<llama_api_client.Content') or not summary.strip() or summary.strip().lower() in ['no response generated', 'error summarizing:']):
-                    summary = original.get('snippet', '') or 'No summary available'
-                enhanced_result = {
-                    'index': i + 1,
-                    'title': analyzed.get('title', original.get('title', '')),
-                    'url': analyzed.get('url', original.get('href', '')),
-                    'summary': summary,
-                    'analysis_id': analyzed.get('analysis_id', ''),
-                    'analysis_passes': 1
-                }
-                enhanced_results.append(enhanced_result)
-
-            # Update display
-            self.current_results = enhanced_results
-            self.display_results(enhanced_results)
-            self.cli_print(f"✅ Search complete! Found {len(enhanced_results)} results.")
-            # Deep integration: Automatically build research case and run focused analysis
-            try:
-                if hasattr(self, 'auto_build_case_from_results'):
-                    self.auto_build_case_from_results(enhanced_results, query)
-                    self.cli_print("📁 Research Case auto-built from results.")
-                if hasattr(self, 'run_case_analysis'):
-                    self.run_case_analysis()
-                    self.cli_print("🧠 Case analysis triggered.")
-            except Exception as e:
-                self.cli_print(f"⚠️ Case integration error: {e}")
-
-        except Exception as e:
-            self.cli_print(f"❌ Search error: {str(e)}")
+            with tracer.span("summary.lazy", lane=f"lazy {result.get('analysis_id', '')}",
+                             result_id=result.get('analysis_id', '')):
+                analyzed = await self.llama_summarize_web_result(result, result.get('analysis_id', ''))
+            summary = str(analyzed.get('summary', ''))
+            if summary.strip() and not summary.startswith('Error summarizing'):
+                result['summary'] = summary
+                result['analysis_passes'] = 1
+            result['summary_pending'] = False
+            self.metrics.add_deferred_summaries(-1)
+        finally:
+            self._lazy_summaries.discard(id(result))
+        if self.mode == 'gui':
+            self.ui.post(self.result_pages.refresh, result)
+
+    async def run_search(self, query, is_drill_down=False, supersede=None, origin='user'):
+        """Run process_search as a cancellable task registered with the app.
+
+        Unless ``supersede`` is False (or superseding is disabled for the
+        app), every user search still running is cancelled first; searches
+        from another ``origin`` (e.g. research-case auto-searches) are left
+        alone. With superseding disabled, searches queue behind each other
+        instead.
+        """
+        if supersede is None and not self.supersede_searches:
+            if self._search_queue is None:
+                self._search_queue = asyncio.Lock()
+            async with self._search_queue:
+                return await self._run_registered_search(query, is_drill_down, origin)
+        if supersede is not False:
+            self.cancel_searches(origin='user')
+        return await self._run_registered_search(query, is_drill_down, origin)
+
+    async def _run_registered_search(self, query, is_drill_down, origin='user'):
+        search_id = next(self._search_ids)
+        search = {
+            'loop': asyncio.get_running_loop(),
+            'task': asyncio.ensure_future(self.process_search(query, is_drill_down)),
+            'query': query,
+            'origin': origin,
+            'cancel_requested': False
+        }
+        self._active_searches[search_id] = search
+        try:
+            return await search['task']
+        except asyncio.CancelledError:
+            if search['cancel_requested']:
+                return None  # Superseded or stopped; already reported
+            raise
+        finally:
+            self._active_searches.pop(search_id, None)
+
+    def submit_search(self, query, is_drill_down=False, supersede=None, origin='user'):
+        """Schedule a search on the app's event loop from any thread."""
+        return self.runtime.submit(self.run_search(query, is_drill_down, supersede, origin))
+
+    def cancel_searches(self, origin=None):
+        """Cancel running searches (all, or one origin's), whichever thread's loop owns them."""
+        active = [search for search in list(self._active_searches.values())
+                  if not search['task'].done() and origin in (None, search['origin'])]
+        for search in active:
+            search['cancel_requested'] = True
+            search['loop'].call_soon_threadsafe(search['task'].cancel)
+        return len(active)
+
+    def stop_searches(self):
+        """Stop button handler."""
+        if self.cancel_searches():
+            self.cli_print("🛑 Stopping running searches...")
+        else:
+            self.cli_print("🛑 No search is running.")
 
     # ===== GUI EVENT HANDLERS =====
     def send_command(self, event=None):
         """Handle command input."""
         command = self.command_var.get().strip()
         if command:
-            self.message_queue.put(('command', command))
+            self.submit_search(command)
             self.command_var.set("")
             self.cli_print(f"🔍 Search: {command}")
 
     def cli_print(self, message):
-        """Print message to CLI pane."""
+        """Print message to CLI pane (safe from any thread)."""
         if self.mode == 'gui':
-            self.cli_text.insert(tk.END, message + "\n")
-            self.cli_text.see(tk.END)
+            self.ui_bus.log(message)
         else:
             print(message)
 
-    def display_results(self, results):
+    def _append_cli_text(self, text):
+        """Write a batch of log lines to the CLI pane (Tk thread only)."""
+        self.cli_text.insert(tk.END, text)
+        # Keep the log widget bounded so long sessions stay responsive
+        excess = int(self.cli_text.index('end-1c').split('.')[0]) - self.CLI_MAX_LINES
+        if excess > 0:
+            self.cli_text.delete(1.0, f"{excess + 1}.0")
+        self.cli_text.see(tk.END)
+
+    def display_results(self, results, yview=0.0, categories=None):
         """Display search results."""
         if self.mode == 'gui':
-            # Clear previous results
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-
             # Update navigation
             self.back_btn.config(state=tk.NORMAL if self.result_history else tk.DISABLED)
             self.query_label.config(text=f"Query: {self.current_query}")
@@ -982,159 +1536,53 @@ class WebSearchApp:
             if hasattr(self, 'generate_answer_btn') and results:
                 self.generate_answer_btn.config(state=tk.NORMAL)
 
-            if not results:
-                no_results = ttk.Label(
-                    self.scrollable_frame,
-                    text="No results found. Try another search.",
-                    font=('Segoe UI', 10),
-                    foreground='red'
-                )
-                no_results.pack(pady=20)
-                return
-
-            # Display each result
-            for i, result in enumerate(results, 1):
-                self.create_result_card(i, result)
-        else:
-            # CLI display
+            # Rebind the recycled cards to the new results
+            self.result_pages.show_results(results, yview, categories)
+        elif self.mode == 'cli':
+            # CLI display (batch mode writes results to its output file instead)
             print(f"\n{Colors.OKGREEN}=== SEARCH RESULTS ==={Colors.ENDC}")
             for i, result in enumerate(results, 1):
                 print(f"\n{Colors.OKBLUE}{i}. {result.get('title', 'No Title')}{Colors.ENDC}")
                 print(f"   🔗 {result.get('url', '')}")
-                print(f"   📝 {result.get('summary', '')[:200]}...")
-
-    def create_result_card(self, index, result):
-        """Create a card for each search result."""
-        # Main card frame
-        card_frame = ttk.Frame(self.scrollable_frame, relief='raised', borderwidth=1)
-        card_frame.pack(fill=tk.X, padx=5, pady=8)
-
-        # Header frame
-        header_frame = ttk.Frame(card_frame)
-        header_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        # Index and title
-        index_label = ttk.Label(
-            header_frame,
-            text=f"{index}.",
-            font=('Segoe UI', 12, 'bold'),
-            foreground='#0078d4'
-        )
-        index_label.pack(side=tk.LEFT)
-
-        title_label = ttk.Label(
-            header_frame,
-            text=result.get('title', 'No Title'),
-            font=('Segoe UI', 11, 'bold'),
-            wraplength=600
-        )
-        title_label.pack(side=tk.LEFT, padx=(5, 0))
-
-        # URL frame
-        url_frame = ttk.Frame(card_frame)
-        url_frame.pack(fill=tk.X, padx=10, pady=2)
-
-        url_text = result.get('url', '')
-        if url_text:
-            url_label = ttk.Label(
-                url_frame,
-                text=f"🔗 {url_text}",
-                font=('Segoe UI', 9),
-                foreground='#0078d4',
-                cursor='hand2'
-            )
-            url_label.pack(anchor=tk.W)
-            url_label.bind("<Button-1>", lambda e, url=url_text: webbrowser.open(url))
+                marker = "💤 " if result.get('summary_pending') else ""
+                print(f"   📝 {marker}{result.get('summary', '')[:200]}...")
 
-        # Summary frame
-        summary_frame = ttk.Frame(card_frame)
-        summary_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        summary_text = scrolledtext.ScrolledText(
-            summary_frame,
-            height=4,
-            width=80,
-            font=('Segoe UI', 10),
-            wrap=tk.WORD,
-            bg='#f8f9fa'
-        )
-        summary_text.pack(fill=tk.BOTH, expand=True)
-        summary_text.insert(tk.END, result.get('summary', 'No summary available'))
-        summary_text.config(state=tk.DISABLED)
-
-        # Actions frame
-        actions_frame = ttk.Frame(card_frame)
-        actions_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        # Drill Down button
-        drill_btn = ttk.Button(
-            actions_frame,
-            text="🔎 Drill Down",
-            command=lambda r=result: self.drill_down_search(r)
-        )
-        drill_btn.pack(side=tk.LEFT, padx=(0, 5))
+    def add_result_card_to_case(self, index, result, category):
+        """Add a result card to the research case."""
+        self.add_item_to_case({
+            'id': index,
+            'title': result.get('title', 'No Title'),
+            'url': result.get('url', ''),
+            'summary': result.get('summary', ''),
+            'category': category,
+            'timestamp': datetime.now().isoformat(),
+            'query': self.current_query
+        })
 
-        # Add to Goose button
-        goose_frame = ttk.Frame(actions_frame)
-        goose_frame.pack(side=tk.LEFT, padx=(5, 0))
+    def summarize_visible_results(self, visible_results):
+        """Summarize deferred results once their cards scroll into view."""
+        for result in visible_results:
+            self.summarize_pending_result(result)
 
-        category_var = tk.StringVar(value="General")
-        category_combo = ttk.Combobox(
-            goose_frame,
-            textvariable=category_var,
-            values=self.goose_categories,
-            state="readonly",
-            width=10
-        )
-        category_combo.pack(side=tk.LEFT)
-
-        goose_btn = ttk.Button(
-            goose_frame,
-            text="🪿 Add to Goose",
-            command=lambda r=result, var=category_var: self.add_to_goose(r, var.get())
-        )
-        goose_btn.pack(side=tk.LEFT, padx=(2, 0))
-        # Deep integration: Add to Research Case directly from result card
-        if hasattr(self, 'add_item_to_case'):
-            case_btn = ttk.Button(
-                actions_frame,
-                text="📁 Add to Case",
-                command=lambda r=result, cat=category_var: self.add_item_to_case({
-                    'id': index,
-                    'title': r.get('title', 'No Title'),
-                    'url': r.get('url', ''),
-                    'summary': r.get('summary', ''),
-                    'category': cat.get(),
-                    'timestamp': datetime.now().isoformat(),
-                    'query': self.current_query
-                })
-            )
-            case_btn.pack(side=tk.LEFT, padx=(5, 0))
-
-        # Copy URL button
-        if url_text:
-            copy_btn = ttk.Button(
-                actions_frame,
-                text="📋 Copy URL",
-                command=lambda url=url_text: self.copy_to_clipboard(url)
-            )
-            copy_btn.pack(side=tk.RIGHT)
-
-        # Separator
-        separator = ttk.Separator(self.scrollable_frame, orient='horizontal')
-        separator.pack(fill=tk.X, padx=10, pady=2)
+    def open_result_url(self, result):
+        """Open a result in the browser and remember its domain as useful."""
+        url = result.get('url', '')
+        self.domain_history.record(url, weight=0.5)
+        self.summarize_pending_result(result)
+        webbrowser.open(url)
 
     def drill_down_search(self, result):
         """Perform a drill-down search using the result's title or URL."""
+        self.domain_history.record(result.get('url', ''))
         self.save_current_state()
         drill_query = result.get('title', '')
         if not drill_query:
             drill_query = result.get('url', '')
         if drill_query:
             if self.mode == 'gui':
-                threading.Thread(target=lambda: asyncio.run(self.process_search(drill_query, is_drill_down=True)), daemon=True).start()
+                self.submit_search(drill_query, is_drill_down=True)
             else:
-                asyncio.run(self.process_search(drill_query, is_drill_down=True))
+                self.runtime.run(self.run_search(drill_query, is_drill_down=True))
         else:
             self.cli_print("❌ Cannot drill down: No valid query found.")
 
@@ -1151,6 +1599,7 @@ class WebSearchApp:
             'query': self.current_query
         }
         self.goose_items.append(goose_item)
+        self.domain_history.record(goose_item['url'])
         self.update_goose_display()
         self.cli_print(f"🪿 Added to Goose: {goose_item['title']}")
         # Deep integration: auto-add to research case if integration is available
@@ -1239,18 +1688,76 @@ class WebSearchApp:
     def reset_metrics(self):
         """Reset all metrics."""
         self.metrics.reset()
+        self.watchdog.reset()
+        self.memory_tracker.reset()
         self.cli_print("📊 Metrics reset!")
         if self.mode == 'gui':
             self.update_metrics_display()
 
     def update_metrics_display(self):
-        """Update metrics display."""
+        """Redraw every metrics section now."""
         if self.mode != 'gui':
             return
-
+        with self._metrics_lock:
+            self._metrics_dirty.update(self._metrics_renderers)
+        self._redraw_metrics()
+
+    def _on_metrics_changed(self, section):
+        """Metrics change event (any thread): mark the section and request a redraw."""
+        with self._metrics_lock:
+            self._metrics_dirty.add(section)
+        self.ui_bus.set_latest('metrics', self._redraw_metrics)
+
+    def _on_metrics_tab_changed(self, event=None):
+        self.ui_bus.set_latest('metrics', self._redraw_metrics)
+
+    def _redraw_metrics(self):
+        """Redraw the dirty sections on the visible metrics tab (Tk thread).
+
+        Hidden tabs stay dirty until shown, redraws are throttled to
+        METRICS_REDRAW_MS, and only lines whose text changed are touched.
+        """
+        if not hasattr(self, 'metrics_notebook'):
+            return
+        wait_ms = self.METRICS_REDRAW_MS - (time.monotonic() - self._metrics_drawn_at) * 1000
+        if wait_ms > 0:
+            if not self._metrics_redraw_scheduled:
+                self._metrics_redraw_scheduled = True
+                self.root.after(int(wait_ms) + 1, self._scheduled_metrics_redraw)
+            return
         try:
-            # API Metrics
-            api_text = f"""🔥 API METRICS
+            visible = self._metrics_tabs.get(str(self.metrics_notebook.select()))
+            with self._metrics_lock:
+                if visible not in self._metrics_dirty:
+                    return
+                self._metrics_dirty.discard(visible)
+            widget, render = self._metrics_renderers[visible]
+            self._patch_text(widget, render())
+            self._metrics_drawn_at = time.monotonic()
+        except Exception as e:
+            pass  # Silently handle display errors
+
+    def _scheduled_metrics_redraw(self):
+        self._metrics_redraw_scheduled = False
+        self._redraw_metrics()
+
+    def _patch_text(self, widget, text):
+        """Replace only the lines of ``widget`` that differ from ``text``."""
+        new_lines = text.split("\n")
+        old_lines = self._metrics_lines.get(str(widget))
+        if old_lines is None or len(old_lines) != len(new_lines):
+            widget.delete(1.0, tk.END)
+            widget.insert(tk.END, text)
+        else:
+            for number, (old, new) in enumerate(zip(old_lines, new_lines), 1):
+                if old != new:
+                    widget.delete(f"{number}.0", f"{number}.end")
+                    widget.insert(f"{number}.0", new)
+        self._metrics_lines[str(widget)] = new_lines
+
+    def render_api_metrics(self):
+        """API metrics report text."""
+        return f"""🔥 API METRICS
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 📊 Total Requests: {self.metrics.total_requests}
 ✅ Successful: {self.metrics.successful_requests}
@@ -1262,30 +1769,50 @@ class WebSearchApp:
 📤 Tokens Sent: {self.metrics.total_tokens_sent:,}
 📥 Tokens Received: {self.metrics.total_tokens_received:,}
 💰 Estimated Cost: ${self.metrics.total_api_cost:.4f}
+💳 Budget Level: {LEVEL_NAMES[self.budget.level()]} | 🚫 Rejected: {self.budget.rejected_calls}
+{chr(10).join(self.budget.describe()) or 'No budget limits set'}
+🎯 Token Source: {self.metrics.usage_reported_requests} API usage / {self.metrics.total_requests - self.metrics.usage_reported_requests} {'tokenizer' if self.metrics.tokenizer.exact else 'estimated'}
+💤 Deferred Summaries: {self.metrics.deferred_summaries}
 
 ⏱️ TIMING
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ⚡ Avg Request Time: {self.metrics.get_average_request_time():.2f}s
+⏱️ Deadline Met/Missed: {self.metrics.deadline_met}/{self.metrics.deadline_missed}
+🛑 Cancelled: {self.metrics.cancelled_searches} searches / {self.metrics.cancelled_tasks} tasks
+⬅️ Back Navigation: {self.metrics.get_navigation_summary()}
 🔍 Total Search Time: {self.metrics.total_search_time:.2f}s
 🤖 Total Processing: {self.metrics.total_processing_time:.2f}s
 
+📐 LATENCY p50/p95/p99
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{chr(10).join(self.metrics.latency.describe(op) for op in OPERATIONS)}
+
 🌐 WEB FETCHING
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 📄 Pages Fetched: {self.metrics.web_pages_fetched}
 ❌ Failed Fetches: {self.metrics.web_pages_failed}
 📊 Success Rate: {((self.metrics.web_pages_fetched - self.metrics.web_pages_failed) / max(self.metrics.web_pages_fetched, 1) * 100):.1f}%"""
 
-            self.api_metrics_text.delete(1.0, tk.END)
-            self.api_metrics_text.insert(tk.END, api_text)
-
-            # System Metrics
-            sys_metrics = self.metrics.get_system_metrics()
-            uptime = self.metrics.get_uptime()
-            system_text = f"""💻 SYSTEM PERFORMANCE
+    def render_system_metrics(self):
+        """System metrics report text."""
+        sys_metrics = self.metrics.get_system_metrics()
+        uptime = self.metrics.get_uptime()
+        series = self.sampler.series
+        spark = lambda name, low=0: sparkline(series[name].values()[-self.SPARKLINE_WIDTH:], low=low)
+        return f"""💻 SYSTEM PERFORMANCE
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🔥 CPU Usage: {sys_metrics['cpu_percent']:.1f}%
+🔥 CPU Usage: {sys_metrics['cpu_percent']:.1f}% (peak {series['cpu_percent'].max():.0f}%)
+   {spark('cpu_percent')}
 🧠 Memory: {sys_metrics['memory_mb']:.1f} MB ({sys_metrics['memory_percent']:.1f}%)
+   {spark('memory_mb', low=None)}
 🧵 Threads: {sys_metrics['threads']}
+   {spark('threads', low=None)}
+🔌 Sockets: {sys_metrics['sockets']}
+   {spark('sockets')}
+🐢 Loop Lag: {sys_metrics['loop_lag_ms']:.1f} ms (peak {series['loop_lag_ms'].max():.1f} ms)
+   {spark('loop_lag_ms')}
+
+{self.render_loop_stalls()}
 
 ⏰ SESSION INFO
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -1293,51 +1820,101 @@ class WebSearchApp:
 🔄 Requests/Min: {(self.metrics.total_requests / max(uptime/60, 1)):.1f}
 ⚡ Avg Load: {(self.metrics.total_processing_time / max(uptime, 1) * 100):.1f}%"""
 
-            self.system_metrics_text.delete(1.0, tk.END)
-            self.system_metrics_text.insert(tk.END, system_text)
-
-            # Search History
-            history_text = "🔍 SEARCH HISTORY\n" + "━" * 40 + "\n"
-            for i, search in enumerate(self.metrics.search_history[-10:], 1):
-                timestamp = datetime.fromisoformat(search['timestamp']).strftime('%H:%M:%S')
-                history_text += f"{i:2d}. [{timestamp}] {search['query'][:30]}{'...' if len(search['query']) > 30 else ''}\n"
-                history_text += f"     📊 {search['results_count']} results in {search['search_time']:.2f}s\n\n"
-
-            if not self.metrics.search_history:
-                history_text += "No searches yet. Start searching to see history!"
-
-            self.history_text.delete(1.0, tk.END)
-            self.history_text.insert(tk.END, history_text)
-
-        except Exception as e:
-            pass  # Silently handle display errors
-
-        # Schedule next update
-        self.root.after(2000, self.update_metrics_display)
+    def render_loop_stalls(self):
+        """Worst event loop blocking sites, for the System tab."""
+        lines = [f"🚧 BLOCKING CALLS (loop stalls > {self.LOOP_STALL_SECONDS * 1000:.0f} ms)", "━" * 40]
+        offenders = self.watchdog.worst(5)
+        if not offenders:
+            lines.append("No stalls detected")
+        lines.append(f"⏸️ Stalls: {self.metrics.loop_stalls} ({self.metrics.loop_stall_time:.2f}s blocked), "
+                     f"worst lag {self.watchdog.max_lag * 1000:.0f} ms")
+        for i, offender in enumerate(offenders, 1):
+            lines.append(f"{i}. {offender.describe()}")
+        if offenders:
+            lines.append("Worst stack:")
+            lines.extend(line.rstrip() for line in offenders[0].stack)
+        return "\n".join(lines)
+
+    def _on_loop_stall(self, offender, lag):
+        """Watchdog callback: count the stall and log new or worse blocking sites."""
+        self.metrics.add_loop_stall(lag)
+        if offender.count == 1 or lag >= offender.worst:
+            via = f" via {offender.entry}" if offender.entry != offender.site else ""
+            self.cli_print(f"🐢 Event loop blocked {lag * 1000:.0f} ms in {offender.site}{via}")
+
+    def render_memory_metrics(self):
+        """Memory report text: app structures plus per-query tracemalloc findings."""
+        sys_metrics = self.metrics.get_system_metrics()
+        page_cache_chars = sum(len(text or '') for text in list(self.page_cache.values()))
+        lines = [
+            "🧠 MEMORY",
+            "━" * 40,
+            f"💾 Process RSS: {sys_metrics['memory_mb']:.1f} MB",
+            f"📄 Page cache: {len(self.page_cache)} pages, {page_cache_chars / 1024:.0f} K chars",
+            f"⬅️ Result history: {len(self.result_history)} states, "
+            f"{sum(len(state.get('results', [])) for state in list(self.result_history))} results",
+            f"🪿 Goose items: {len(self.goose_items)}",
+            ""
+        ]
+        if not self.memory_tracker.enabled:
+            lines.append("🔍 Per-query allocation tracking is off; start with --trace-memory")
+            return "\n".join(lines)
+        reports = list(self.metrics.memory_reports)
+        if not reports:
+            lines.append("🔍 No queries tracked yet")
+        for report in reversed(reports[-5:]):
+            lines.append(report.describe())
+            lines.append("")
+        return "\n".join(lines)
+
+    def _on_memory_report(self, report):
+        """Memory tracker callback: keep the report and log it."""
+        self.metrics.add_memory_report(report)
+        self.cli_print(report.describe(sites=3 if self.mode == 'gui' else 5))
+
+    def render_search_history(self):
+        """Search history report text."""
+        history_text = "🔍 SEARCH HISTORY\n" + "━" * 40 + "\n"
+        for i, search in enumerate(list(self.metrics.search_history)[-10:], 1):
+            timestamp = datetime.fromisoformat(search['timestamp']).strftime('%H:%M:%S')
+            history_text += f"{i:2d}. [{timestamp}] {search['query'][:30]}{'...' if len(search['query']) > 30 else ''}\n"
+            history_text += f"     📊 {search['results_count']} results in {search['search_time']:.2f}s\n\n"
+
+        if not self.metrics.search_history:
+            history_text += "No searches yet. Start searching to see history!"
+        return history_text
 
     def progress_callback(self, stats):
         """Progress callback for tracking."""
         total = stats['calls_sent']
         completed = stats['calls_completed']
         errors = stats['errors']
+        cancelled = stats.get('cancelled', 0)
 
         if self.mode == 'gui':
-            self.results_queue.put(('progress', (completed, total)))
             if total > 0:
                 progress_text = f"⚡ Processing: {completed}/{total} ({(completed/total)*100:.1f}%)"
                 if errors > 0:
                     progress_text += f" | ❌ {errors} errors"
-                self.results_queue.put(('cli_print', progress_text))
-        else:
+                if cancelled > 0:
+                    progress_text += f" | 🛑 {cancelled} cancelled"
+                # Coalesced: only the latest progress per frame reaches the widgets
+                self.ui_bus.set_latest('progress', self.show_progress, completed, total, progress_text)
+        elif self.mode == 'cli':
             if total > 0:
                 progress = (completed / total) * 100
                 print(f"Progress: {completed}/{total} ({progress:.1f}%)", end='\r')
 
+    def show_progress(self, completed, total, progress_text):
+        """Update the progress bar and status line (Tk thread)."""
+        self.progress['value'] = (completed / total) * 100
+        self.status_label.config(text=progress_text)
+
     # ===== UTILITY FUNCTIONS =====
     def _on_mousewheel(self, event):
         """Handle mouse wheel scrolling."""
         if self.mode == 'gui':
-            self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+            self.result_pages.active.scroll(int(-1*(event.delta/120)))
 
     def copy_to_clipboard(self, text):
         """Copy text to clipboard."""
@@ -1349,26 +1926,53 @@ class WebSearchApp:
     def go_back(self):
         """Go back to previous search results."""
         if self.result_history:
+            started = time.perf_counter()
             previous_state = self.result_history.pop()
             self.current_results = previous_state['results']
             self.current_query = previous_state['query']
-            self.display_results(self.current_results)
-            self.cli_print(f"⬅️ Back to: {self.current_query}")
+            cached = False
+            if self.mode == 'gui':
+                cached = self.result_pages.restore(previous_state['page_id'])
+                if cached:
+                    self.back_btn.config(state=tk.NORMAL if self.result_history else tk.DISABLED)
+                    self.query_label.config(text=f"Query: {self.current_query}")
+                else:
+                    # Page was evicted: rebuild it from the saved view model
+                    self.display_results(self.current_results, previous_state['yview'],
+                                         previous_state['categories'])
+                # Include layout so the measurement covers what the user waits for
+                self.root.update_idletasks()
+            else:
+                self.display_results(self.current_results)
+            elapsed = time.perf_counter() - started
+            self.metrics.add_navigation(elapsed, cached)
+            self.cli_print(f"⬅️ Back to: {self.current_query} ({elapsed * 1000:.1f} ms{', cached' if cached else ''})")
         else:
             self.cli_print("⬅️ No previous results to go back to!")
 
     def save_current_state(self):
         """Save current state to history."""
         if self.current_results:
+            self._page_ids += 1
             state = {
                 'results': self.current_results.copy(),
                 'query': self.current_query,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now().isoformat(),
+                'page_id': self._page_ids,
+                'yview': 0.0,
+                'categories': {}
             }
+            if self.mode == 'gui':
+                view = self.result_pages.active
+                state['yview'] = view.top_fraction()
+                state['categories'] = dict(view.categories)
+                self.result_pages.tag_active(self._page_ids)
             self.result_history.append(state)
             # Keep only last 10 states
             if len(self.result_history) > 10:
-                self.result_history.pop(0)
+                dropped = self.result_history.pop(0)
+                if self.mode == 'gui':
+                    self.result_pages.discard(dropped['page_id'])
 
     def show_example_questions(self):
         """Show example questions dialog."""
@@ -1444,40 +2048,40 @@ class WebSearchApp:
             self.cli_print("❌ No search results available for analysis!")
             return
 
-        # Run in background thread
-        threading.Thread(target=self.generate_answer_background, daemon=True).start()
-
-    def generate_answer_background(self):
-        """Background thread for generating AI answer."""
-        try:
-            # Prepare context
-            context = self.prepare_search_context()
-
-            # Generate answer
-            answer = asyncio.run(self.call_llama_for_answer(context))
-
-            # Update display
-            if self.mode == 'gui':
-                self.ai_answer_text.delete(1.0, tk.END)
-                self.ai_answer_text.insert(tk.END, str(answer))
-            else:
-                print(f"\n{Colors.OKCYAN}=== AI COMPREHENSIVE ANSWER ==={Colors.ENDC}")
-                print(str(answer))
-
-        except Exception as e:
-            error_msg = f"Error generating answer: {str(e)}"
-            if self.mode == 'gui':
-                self.ai_answer_text.delete(1.0, tk.END)
-                self.ai_answer_text.insert(tk.END, error_msg)
-            else:
-                print(f"{Colors.FAIL}{error_msg}{Colors.ENDC}")
+        # Prepare context here, generate on the app's event loop
+        context = self.prepare_search_context()
+        future = self.runtime.submit(self.call_llama_for_answer(context))
+        if self.mode == 'gui':
+            self.ui.deliver(
+                future,
+                self.show_answer,
+                lambda e: self.show_answer(f"Error generating answer: {str(e)}", error=True)
+            )
+        else:
+            try:
+                self.show_answer(future.result())
+            except Exception as e:
+                self.show_answer(f"Error generating answer: {str(e)}", error=True)
 
-    def prepare_search_context(self):
-        """Prepare context from search results."""
-        context = f"Query: {self.current_query}\n\n"
+    def show_answer(self, answer, error=False):
+        """Display the comprehensive answer."""
+        if self.mode == 'gui':
+            self.ai_answer_text.delete(1.0, tk.END)
+            self.ai_answer_text.insert(tk.END, str(answer))
+        elif error:
+            print(f"{Colors.FAIL}{answer}{Colors.ENDC}")
+        else:
+            print(f"\n{Colors.OKCYAN}=== AI COMPREHENSIVE ANSWER ==={Colors.ENDC}")
+            print(str(answer))
+
+    def prepare_search_context(self, query=None, results=None):
+        """Prepare context from search results (the current search unless given)."""
+        if query is None:
+            query, results = self.current_query, self.current_results
+        context = f"Query: {query}\n\n"
         context += "Search Results:\n"
 
-        for i, result in enumerate(self.current_results[:10], 1):  # Limit to first 10
+        for i, result in enumerate((results or [])[:10], 1):  # Limit to first 10
             context += f"{i}. {result.get('title', 'No Title')}\n"
             context += f"   URL: {result.get('url', '')}\n"
             context += f"   Summary: {result.get('summary', '')}\n\n"
@@ -1505,76 +2109,45 @@ class WebSearchApp:
                 }
             ]
 
-            response = await self.client.chat.completions.create(
-                model="Llama-3.3-70B-Instruct",
-                messages=messages,
-                max_completion_tokens=1000,
-                temperature=0.7
-            )
+            start_time = time.time()
+            try:
+                response = await self.client.chat.completions.create(
+                    model="Llama-3.3-70B-Instruct",
+                    messages=messages,
+                    max_completion_tokens=1000,
+                    temperature=0.7
+                )
+            except BudgetExceededError:
+                raise
+            except Exception:
+                self.metrics.add_request(success=False, processing_time=time.time() - start_time)
+                raise
 
-            return response.completion_message.content
+            answer = response.completion_message.content.text
+            tokens_sent, tokens_received = await self.count_response_tokens(response, messages, answer)
+            self.metrics.add_request(
+                success=True,
+                tokens_sent=tokens_sent,
+                tokens_received=tokens_received,
+                processing_time=time.time() - start_time,
+                usage_reported=(response.usage or {}).get('source') == 'api'
+            )
+            return answer
 
+        except BudgetExceededError as e:
+            digest = "\n".join(
+                f"• {result.get('title', 'No Title')}: {extractive_summary(result.get('summary', ''), 1)}"
+                for result in self.current_results[:10]
+            )
+            return f"💳 {e} — extractive digest of the top results:\n\n{digest}"
         except Exception as e:
             return f"Error calling Llama API: {str(e)}"
 
-    # ===== THREADING AND MESSAGE HANDLING =====
-    def check_messages(self):
-        """Check for messages from background threads."""
-        if self.mode != 'gui':
-            return
-
-        try:
-            while True:
-                message_type, data = self.results_queue.get_nowait()
-
-                if message_type == 'results':
-                    self.display_results(data)
-                elif message_type == 'status':
-                    self.status_label.config(text=data)
-                elif message_type == 'progress':
-                    current, total = data
-                    if total > 0:
-                        progress_value = (current / total) * 100
-                        self.progress['value'] = progress_value
-                elif message_type == 'cli_print':
-                    self.cli_print(data)
-                elif message_type == 'query_update':
-                    self.current_query = data
-
-        except queue.Empty:
-            pass
-
-        # Schedule next check
-        self.root.after(100, self.check_messages)
-
-    def cli_loop(self):
-        """Main CLI loop running in separate thread."""
-        asyncio.run(self.async_cli_loop())
-
-    async def async_cli_loop(self):
-        """Async CLI loop."""
-        self.results_queue.put(('cli_print', "🚀 Inspectallama Started!"))
-        self.results_queue.put(('cli_print', "💡 Type your search query and press Enter"))
-        self.results_queue.put(('cli_print', "🔗 Click on URLs in results to open them"))
-        self.results_queue.put(('cli_print', "=" * 50))
-
-        while True:
-            try:
-                message_type, data = self.message_queue.get(timeout=0.1)
-
-                if message_type == 'command':
-                    self.results_queue.put(('query_update', data))
-                    await self.process_search(data)
-
-            except queue.Empty:
-                await asyncio.sleep(0.1)
-                continue
-
     # ===== CLI MODE METHODS =====
-    async def run_cli(self):
-        """Run in CLI mode."""
+    def run_cli(self):
+        """Run in CLI mode: prompt on the main thread, search on the app's event loop."""
         self.cli_print("🚀 Starting interactive search...")
-        self.cli_print("💡 Type your queries, or 'exit' to quit")
+        self.cli_print("💡 Type your queries, 'summarize N' for a deferred result, or 'exit' to quit")
         self.cli_print("=" * 50)
 
         while True:
@@ -1585,15 +2158,263 @@ class WebSearchApp:
                     print(f"\n{Colors.OKGREEN}👋 Goodbye!{Colors.ENDC}")
                     break
 
-                if query:
-                    await self.process_search(query)
+                # "summarize N" fills in a deferred summary from the last search
+                match = re.match(r'^summarize\s+(\d+)$', query, re.IGNORECASE)
+                if match and self.current_results:
+                    idx = int(match.group(1))
+                    if 1 <= idx <= len(self.current_results):
+                        result = self.current_results[idx - 1]
+                        if result.get('summary_pending'):
+                            self.runtime.run(self._summarize_pending(result))
+                        print(f"\n{Colors.OKBLUE}{idx}. {result.get('title', 'No Title')}{Colors.ENDC}")
+                        print(f"   📝 {result.get('summary', '')}")
+                    continue
+
+                # "trace [FILE]" writes the last query's spans as Chrome trace JSON
+                match = re.match(r'^trace(?:\s+(\S+))?$', query, re.IGNORECASE)
+                if match:
+                    self.export_trace(match.group(1) or 'inspectallama_trace.json', self.last_query_id)
+                    continue
+
+                # "memory" prints the memory report (per-query findings need --trace-memory)
+                if query.lower() == 'memory':
+                    print(self.render_memory_metrics())
+                    continue
+
+                # "report [SPAN]" prints the stored history, e.g. "report 24h"
+                match = re.match(r'^report(?:\s+(\S+))?$', query, re.IGNORECASE)
+                if match:
+                    self.print_report(match.group(1) or '7d')
+                    continue
 
-            except KeyboardInterrupt:
+                if query:
+                    search = self.runtime.submit(self.run_search(query))
+                    try:
+                        search.result()
+                    except KeyboardInterrupt:
+                        # Ctrl-C during a search stops the search, not the app
+                        self.cancel_searches()
+                        print(f"\n{Colors.WARNING}🛑 Search stopped.{Colors.ENDC}")
+
+            except (KeyboardInterrupt, EOFError):
                 print(f"\n{Colors.OKGREEN}👋 Goodbye!{Colors.ENDC}")
                 break
             except Exception as e:
                 print(f"{Colors.FAIL}Error: {str(e)}{Colors.ENDC}")
 
+    # ===== METRICS EXPORT =====
+    def render_openmetrics(self):
+        """OpenMetrics text for the /metrics endpoint (exporter thread)."""
+        return render_openmetrics(self.metrics, self.budget, {
+            'searches_in_flight': sum(1 for search in list(self._active_searches.values()) if not search['task'].done()),
+            'lazy_summaries_in_flight': len(self._lazy_summaries),
+            'page_cache_entries': len(self.page_cache),
+            'event_loop_lag_seconds': self.metrics.get_system_metrics()['loop_lag_ms'] / 1000
+        })
+
+    def print_report(self, span='7d'):
+        """Print latency, token, cache and error trends from the metrics database."""
+        if self.metrics.store is None:
+            self.cli_print("🗄️ No metrics database; start with --metrics-db PATH to record history")
+            return
+        self.metrics.store.flush()
+        try:
+            report = build_report(self.metrics_db, parse_span(span))
+        except ValueError:
+            self.cli_print(f"❌ Invalid report span: {span} (use e.g. 24h, 7d)")
+            return
+        except (OSError, sqlite3.Error) as e:
+            self.cli_print(f"❌ Cannot read metrics database: {e}")
+            return
+        self.cli_print(f"🗄️ Metrics history, last {span}:\n{format_report(report)}")
+
+    # ===== RECORD / REPLAY =====
+    def save_cassette(self):
+        """Write recorded exchanges, or report replay misses."""
+        if self.cassette.mode == 'record':
+            try:
+                count = self.cassette.save()
+                self.cli_print(f"📼 Recorded {count} HTTP exchanges to {self.cassette.path}")
+            except OSError as e:
+                self.cli_print(f"❌ Cassette write error: {e}")
+        elif self.cassette.misses:
+            self.cli_print(f"📼 {self.cassette.misses} requests were not in {self.cassette.path}")
+
+    # ===== TRACING =====
+    def export_trace(self, path, query_id=None):
+        """Write collected spans (all, or one query's) as Chrome/Perfetto trace JSON."""
+        if not tracer.enabled:
+            self.cli_print("🧵 Tracing is off; start with --trace FILE to collect spans")
+            return
+        try:
+            count = tracer.export(path, query_id)
+            self.cli_print(f"🧵 Wrote {count} spans to {path} (open in chrome://tracing or ui.perfetto.dev)")
+        except OSError as e:
+            self.cli_print(f"❌ Trace export error: {e}")
+
+    def export_trace_dialog(self):
+        """Ask where to save the last query's trace."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Trace JSON", "*.json")],
+                                            initialfile="inspectallama_trace.json")
+        if path:
+            self.export_trace(path, self.last_query_id)
+
+    # ===== BATCH MODE =====
+    BATCH_RESULT_FIELDS = ('title', 'url', 'summary', 'relevance', 'summary_pending')
+    # Search failures surface as empty results, so both outcomes are worth another try
+    BATCH_RETRY_OUTCOMES = ('error', 'empty')
+    BATCH_RETRY_DELAY = 2.0
+    # How long Ctrl-C waits for in-flight batch queries to unwind before shutting down
+    BATCH_CANCEL_TIMEOUT = 10.0
+
+    def run_batch(self, queries_path, out_path, concurrency=4, retries=2, fresh=False):
+        """Run every query in a file (one per line) and write one JSON line per query to ``out_path``.
+
+        Progress is journaled to ``<out_path>.journal``; rerunning the same
+        command resumes after the last finished query unless ``fresh``.
+        Failed queries are retried up to ``retries`` times in later passes.
+        Concurrent queries share the session and case budgets, but each has
+        its own query budget, so a query's results do not depend on what
+        else is running.
+        """
+        started = time.time()
+        journal = None
+        try:
+            journal = BatchJournal(out_path + '.journal', out_path, fresh=fresh)
+            # Taken now: the batch drops done keys as it skips them
+            already_done = len(journal.done)
+            if journal.resumed:
+                print(f"⏯️ Resuming: {already_done} queries already done, "
+                      f"{len(journal.attempts)} waiting for a retry")
+            finished = threading.Event()
+
+            async def batch():
+                try:
+                    return await self._run_batch(queries_path, out_path, max(concurrency, 1), max(retries, 0), journal)
+                finally:
+                    finished.set()
+
+            future = self.runtime.submit(batch())
+            try:
+                counts = future.result()
+            except KeyboardInterrupt:
+                # The future reports cancelled at once; the task still has to unwind its queries
+                future.cancel()
+                counts = None
+                print("\n🛑 Batch interrupted; cancelling in-flight queries")
+                if not finished.wait(self.BATCH_CANCEL_TIMEOUT):
+                    print(f"⚠️ Batch did not stop within {self.BATCH_CANCEL_TIMEOUT:g}s; shutting down anyway")
+                print(f"🛑 Rerun the same command to resume from {out_path}.journal")
+        except OSError as e:
+            counts = None
+            print(f"❌ Batch error: {e}")
+        finally:
+            if journal is not None:
+                journal.close()
+            self.shutdown()
+        if counts is not None:
+            summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items())) or "no queries"
+            if already_done:
+                summary += f" (+{already_done} done by earlier runs, {already_done + sum(counts.values())} records)"
+            print(f"✅ Batch complete in {time.time() - started:.1f}s: {summary}, "
+                  f"{journal.retried} retries -> {out_path}")
+        return counts
+
+    async def _run_batch(self, queries_path, out_path, concurrency, retries, journal):
+        # Queries are read lazily and records written as they finish, so memory
+        # stays flat however long the file is: at most ``concurrency`` in flight
+        counts = {}
+        failed = []
+        with open(queries_path, encoding='utf-8') as queries, \
+                open(out_path, 'a' if journal.resumed else 'w', encoding='utf-8') as out:
+            def pending_queries():
+                for line_number, line in enumerate(queries, 1):
+                    query = line.strip()
+                    if not query or query.startswith('#'):
+                        continue
+                    key = query_key(line_number, query)
+                    if key in journal.done:
+                        journal.done.discard(key)  # Each key occurs once; stop holding it
+                        continue
+                    yield line_number, query
+
+            await self._run_batch_pass(pending_queries(), concurrency, out, journal, retries, counts, failed)
+            # Retries run after the main pass, so transient outages have time to clear
+            retry_round = 0
+            while failed:
+                delay = self.BATCH_RETRY_DELAY * 2 ** retry_round
+                print(f"🔁 Retrying {len(failed)} failed queries in {delay:g}s")
+                await asyncio.sleep(delay)
+                items, failed = failed, []
+                await self._run_batch_pass(items, concurrency, out, journal, retries, counts, failed)
+                retry_round += 1
+        return counts
+
+    async def _run_batch_pass(self, items, concurrency, out, journal, retries, counts, failed):
+        slots = asyncio.Semaphore(concurrency)
+        pending = set()
+        errors = []
+
+        def finished(task):
+            slots.release()
+            pending.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
+
+        try:
+            for line_number, query in items:
+                await slots.acquire()
+                if errors:
+                    raise errors[0]
+                task = asyncio.ensure_future(
+                    self._batch_query(line_number, query, out, journal, retries, counts, failed))
+                task.add_done_callback(finished)
+                pending.add(task)
+            await asyncio.gather(*pending)
+            if errors:
+                raise errors[0]
+        except BaseException:
+            # Cancelled, or one query failed (e.g. a write error): stop the rest before the files close
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+    async def _batch_query(self, line_number, query, out, journal, retries, counts, failed):
+        """Run one batch query; append its record when it succeeds or runs out of retries."""
+        key = query_key(line_number, query)
+        attempt = journal.next_attempt(key)
+        status = {}
+        started = time.perf_counter()
+        results = await self.process_search(query, status=status)
+        outcome = status.get('outcome', 'error')
+        if outcome in self.BATCH_RETRY_OUTCOMES and attempt <= retries:
+            journal.record(key, line_number, attempt, outcome, final=False, error=status.get('error'))
+            failed.append((line_number, query))
+            print(f"⚠️ line {line_number} {outcome} (attempt {attempt}/{retries + 1}), will retry: {query[:50]}")
+            return
+        record = {
+            'key': key,
+            'line': line_number,
+            'query': query,
+            'query_id': status.get('query_id'),
+            'status': outcome,
+            'attempts': attempt,
+            'seconds': round(time.perf_counter() - started, 3),
+            'results': [{field: result.get(field) for field in self.BATCH_RESULT_FIELDS} for result in results or []]
+        }
+        if status.get('error'):
+            record['error'] = status['error']
+        # Results first: a record that made it to the results file is done even if the journal line did not,
+        # and it must be on disk before the journal claims it
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        await asyncio.get_running_loop().run_in_executor(None, os.fsync, out.fileno())
+        journal.record(key, line_number, attempt, outcome, final=True, error=status.get('error'))
+        counts[outcome] = counts.get(outcome, 0) + 1
+        print(f"📦 {sum(counts.values())} done | line {line_number} {outcome} "
+              f"({len(record['results'])} results, {record['seconds']:.1f}s): {query[:50]}")
+
     # ===== MAIN EXECUTION =====
     def run(self):
         """Run the application."""
@@ -1603,10 +2424,64 @@ class WebSearchApp:
             except KeyboardInterrupt:
                 pass
         else:
-            asyncio.run(self.run_cli())
+            self.run_cli()
+        self.shutdown()
+
+    def shutdown(self):
+        """Stop background work and write out metrics, traces and cassettes."""
+        self.cancel_searches()
+        self.sampler.stop()
+        self.watchdog.stop()
+        if self.exporter is not None:
+            self.exporter.stop()
+        self.runtime.stop()
+        # Release pooled keep-alive connections, and with them the server's handler threads
+        self.http.close()
+        self.client.session.close()
+        if self.metrics.store is not None:
+            self.metrics.store.close()
+        if self.trace_path:
+            self.export_trace(self.trace_path)
+        if self.cassette is not None:
+            self.save_cassette()
 
 
 # ===== UTILITY FUNCTIONS =====
+TAG_PATTERN = re.compile('<[^<]+?>')
+
+
+def strip_tags(html):
+    """Remove HTML tags, keeping the text between them."""
+    return TAG_PATTERN.sub('', html)
+
+
+def parse_duckduckgo_html(html, max_results=10):
+    """Parse a DuckDuckGo HTML results page into title / url / snippet dicts."""
+    results = []
+    soup = BeautifulSoup(html, "html.parser")
+    for result in soup.select('.result'):
+        title_tag = result.select_one('.result__title')
+        url_tag = result.select_one('.result__url')
+        snippet_tag = result.select_one('.result__snippet')
+        results.append({
+            'title': title_tag.get_text(strip=True) if title_tag else '',
+            'url': url_tag['href'] if url_tag and url_tag.has_attr('href') else '',
+            'snippet': snippet_tag.get_text(strip=True) if snippet_tag else ''
+        })
+        if len(results) >= max_results:
+            break
+    return results
+
+
+def extractive_summary(text, max_sentences=3, max_chars=600):
+    """Cheap non-LLM summary: the leading sentences of the text."""
+    text = re.sub(r'\s+', ' ', text or '').strip()
+    if not text:
+        return 'No summary available'
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    return ' '.join(sentences[:max_sentences])[:max_chars]
+
+
 def check_requirements():
     """Check if required packages are installed."""
     required_packages = [
@@ -1674,11 +2549,69 @@ Options:
   --help         Show this help message
   --check        Check requirements and API key
   --version      Show version information
+  --eager-summaries N
+                 Summarize only the top N ranked results up front (default 10)
+  --deadline DURATION
+                 Per-query deadline (e.g. 8s); late summaries fall back to snippets
+  --no-supersede Queue new searches instead of cancelling the running one
+  --budget SPEC  Session budget, e.g. tokens=200000,dollars=5,calls=500,seconds=3600
+                 (also read from INSPECTALLAMA_BUDGET)
+  --query-budget SPEC / --case-budget SPEC
+                 Same fields, applied per query / per research case
+  --metrics-port PORT
+                 Serve OpenMetrics/Prometheus metrics at 127.0.0.1:PORT/metrics
+                 (also read from INSPECTALLAMA_METRICS_PORT)
+  --trace FILE   Record spans (search, fetch, extract, LLM, HTTP phases) and
+                 write Chrome/Perfetto trace JSON on exit; 'trace [FILE]' in
+                 the CLI exports the last query only
+  --metrics-db [PATH]
+                 Append per-query and per-request records to a SQLite database
+                 (default ~/.inspectallama/metrics.db, or INSPECTALLAMA_METRICS_DB);
+                 'report [SPAN]' in the CLI prints the stored trends
+  --profile DIR  Profile every search (cProfile + coroutine-aware wall-clock
+                 sampling); writes .pstats and .collapsed files per query to DIR
+                 and prints the hottest functions
+  --trace-memory Snapshot allocations (tracemalloc) around each search; reports
+                 top allocation sites, net and retained growth in the Memory tab
+                 and the CLI ('memory' prints the report); snapshots run off
+                 the event loop, but tracemalloc slows every allocation
+  --llama-base-url URL
+                 Llama API base URL (also LLAMA_API_BASE_URL)
+  --search-url URL
+                 DuckDuckGo HTML endpoint (also INSPECTALLAMA_SEARCH_URL)
+  --mock [OPTIONS]
+                 Run against a built-in mock Llama API and search server (no
+                 network or API quota); OPTIONS are mock_server.py flags such as
+                 "--llm-latency lognormal:0.8,0.4 --error-429 0.05 --timeout-rate 0.01"
+  --mock-port PORT
+                 Port for the --mock server (default 8089, 0 = any free port);
+                 a fixed port keeps its URLs, so cassettes recorded under
+                 --mock replay under --mock
+  --record FILE  Record every search, page and LLM exchange to a cassette
+  --replay FILE  Serve all HTTP traffic from a recorded cassette (no network)
+  --replay-timing SPEC
+                 recorded (default), none, scale:0.5 or a latency spec such
+                 as lognormal:0.8,0.4
+  --report [SPAN]
+                 Print latency percentiles, token spend, cache hit rate and error
+                 rate from the metrics database over SPAN (default 7d) and exit
+  --batch FILE   Run the queries in FILE (one per line, # comments) headless
+                 and exit; each finished query is written as one JSON line
+  --out FILE     Batch results file (default results.jsonl)
+  --batch-concurrency N
+                 Queries a batch runs at once (default 4); each query keeps its
+                 own --query-budget, the session budget is shared
+  --batch-retries N
+                 Extra attempts for failed or empty batch queries (default 2)
+  --fresh        Start a batch over; by default a rerun resumes from
+                 FILE.journal next to the results file
 
 Examples:
   python cumulative_app.py --gui
   python cumulative_app.py --cli
   python cumulative_app.py --check
+  python cumulative_app.py --report 24h
+  python cumulative_app.py --batch queries.txt --out results.jsonl
 
 Features:
   🧠 4-Pass AI Analysis System
@@ -1703,25 +2636,144 @@ def main():
     parser.add_argument('--cli', action='store_true', help='Launch CLI mode')
     parser.add_argument('--check', action='store_true', help='Check requirements and API key')
     parser.add_argument('--version', action='store_true', help='Show version information')
+    parser.add_argument('--eager-summaries', type=int, default=10,
+                        help='Number of top-ranked results summarized immediately (rest on demand)')
+    parser.add_argument('--deadline', metavar='DURATION',
+                        help='Per-query deadline, e.g. "8s" or "1500ms"; late results fall back to snippets')
+    parser.add_argument('--no-supersede', action='store_true',
+                        help='Queue new searches behind running ones instead of cancelling them')
+    parser.add_argument('--budget', metavar='SPEC',
+                        default=os.getenv('INSPECTALLAMA_BUDGET'),
+                        help='Session budget, e.g. "tokens=200000,dollars=5,calls=500,seconds=3600"')
+    parser.add_argument('--query-budget', metavar='SPEC', help='Budget applied to each query')
+    parser.add_argument('--case-budget', metavar='SPEC', help='Budget applied to each research case')
+    # A string default goes through type=int at parse time, so a bad value is a usage error, not a crash
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        default=os.getenv('INSPECTALLAMA_METRICS_PORT') or None,
+                        help='Serve OpenMetrics at http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Record per-stage spans and write Chrome trace-event JSON to FILE on exit')
+    parser.add_argument('--metrics-db', metavar='PATH', nargs='?', const=DEFAULT_DB_PATH,
+                        default=os.getenv('INSPECTALLAMA_METRICS_DB'),
+                        help='Persist per-query and per-request metrics to a SQLite database')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='Profile each search and write pstats / collapsed stacks per query to DIR')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Record tracemalloc allocation sites and growth per search')
+    parser.add_argument('--llama-base-url', metavar='URL', help='Llama API base URL (default: LLAMA_API_BASE_URL)')
+    parser.add_argument('--search-url', metavar='URL', help='DuckDuckGo HTML endpoint (default: INSPECTALLAMA_SEARCH_URL)')
+    parser.add_argument('--mock', metavar='OPTIONS', nargs='?', const='',
+                        help='Serve the Llama API, search and pages from a local mock server; '
+                             'OPTIONS are mock_server.py flags, e.g. "--error-429 0.05 --token-rate 100"')
+    parser.add_argument('--mock-port', metavar='PORT', type=int, default=8089,
+                        help='Port for the --mock server (0 = any free port); cassettes are keyed by URL')
+    parser.add_argument('--record', metavar='FILE', help='Record all HTTP exchanges to a cassette file')
+    parser.add_argument('--replay', metavar='FILE', help='Replay HTTP exchanges from a cassette file')
+    parser.add_argument('--replay-timing', metavar='SPEC', default='recorded',
+                        help='Replay timing: recorded, none, scale:F or a latency spec (e.g. fixed:0.2)')
+    parser.add_argument('--report', metavar='SPAN', nargs='?', const='7d',
+                        help='Print metrics trends from the database over SPAN (e.g. 24h, 7d) and exit')
+    parser.add_argument('--batch', metavar='FILE', help='Run the queries in FILE (one per line) headless and exit')
+    parser.add_argument('--out', metavar='FILE', default='results.jsonl', help='Batch results, one JSON line per query')
+    parser.add_argument('--batch-concurrency', type=int, default=4, metavar='N',
+                        help='Queries a batch runs at once (they share caches, the session and case budgets and connection pools; '
+                             'each gets its own --query-budget)')
+    parser.add_argument('--batch-retries', type=int, default=2, metavar='N',
+                        help='Extra attempts for batch queries that fail or come back empty')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Start the batch over instead of resuming from its journal')
     args = parser.parse_args()
 
+    try:
+        budget = SessionBudget(
+            session=BudgetLimits.parse(args.budget),
+            query=BudgetLimits.parse(args.query_budget),
+            case=BudgetLimits.parse(args.case_budget),
+            cost_per_token_sent=PerformanceMetrics.COST_PER_TOKEN_SENT,
+            cost_per_token_received=PerformanceMetrics.COST_PER_TOKEN_RECEIVED
+        )
+        deadline = parse_duration(args.deadline) if args.deadline else None
+    except ValueError as e:
+        parser.error(str(e))
+
     if args.version:
         print("Inspectallama version 1.0.0")
         return
 
+    if args.report:
+        path = args.metrics_db or DEFAULT_DB_PATH
+        try:
+            span = parse_span(args.report)
+        except ValueError:
+            parser.error(f"invalid report span: {args.report}")
+        try:
+            report = build_report(path, span)
+        except FileNotFoundError:
+            print(f"{Colors.FAIL}Error: No metrics database at {path}; record one with --metrics-db{Colors.ENDC}")
+            sys.exit(1)
+        except sqlite3.Error as e:
+            print(f"{Colors.FAIL}Error: Cannot read metrics database {path}: {e}{Colors.ENDC}")
+            sys.exit(1)
+        print(f"🗄️ {path}, last {args.report}:")
+        print(format_report(report))
+        return
+
     if args.check:
         check_requirements()
         check_api_key()
         return
 
+    cassette = None
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    try:
+        if args.record:
+            cassette = Cassette(args.record, mode='record')
+        elif args.replay:
+            cassette = Cassette(args.replay, mode='replay', timing=args.replay_timing)
+            os.environ.setdefault('LLAMA_API_KEY', 'replay')
+    except (OSError, ValueError) as e:
+        parser.error(f"cassette: {e}")
+
+    mock = None
+    if args.mock is not None:
+        try:
+            mock = mock_server_from_options(args.mock, seed=0, port=args.mock_port).start()
+        except (SystemExit, ValueError):
+            parser.error(f"invalid --mock options: {args.mock}")
+        except OSError as e:
+            parser.error(f"cannot start the mock server on port {args.mock_port}: {e}")
+        args.llama_base_url, args.search_url = mock.llama_url, mock.search_url
+        os.environ.setdefault('LLAMA_API_KEY', 'mock')
+        print(f"🧪 Mock server on {mock.base_url}")
+
     if not check_requirements():
         sys.exit(1)
     if not check_api_key():
         sys.exit(1)
 
-    mode = 'gui' if args.gui or not args.cli else 'cli'
-    app = WebSearchApp(mode=mode)
-    app.run()
+    mode = 'batch' if args.batch else 'gui' if args.gui or not args.cli else 'cli'
+    app = WebSearchApp(
+        mode=mode,
+        eager_summaries=max(args.eager_summaries, 0),
+        budget=budget,
+        deadline=deadline,
+        supersede_searches=not args.no_supersede,
+        trace_path=args.trace,
+        metrics_port=args.metrics_port,
+        metrics_db=args.metrics_db,
+        profile_dir=args.profile,
+        trace_memory=args.trace_memory,
+        llama_base_url=args.llama_base_url,
+        search_url=args.search_url,
+        cassette=cassette
+    )
+    if args.batch:
+        app.run_batch(args.batch, args.out, args.batch_concurrency, args.batch_retries, args.fresh)
+    else:
+        app.run()
+    if mock is not None:
+        mock.stop()
 
 
 def run_gui():
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Latency Histograms for Inspectallama
+Fixed-memory log-bucketed latency histograms with session and last-minute windows
+"""
+
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Optional
+
+# Operations tracked by PerformanceMetrics
+OPERATIONS = ("search", "fetch", "extract", "llm")
+
+
+class LogHistogram:
+    """HDR-style histogram over log-spaced buckets.
+
+    Bucket ``i`` covers ``(min_value * 2**((i-1)/per_doubling), min_value * 2**(i/per_doubling)]``
+    so every value is stored with a bounded relative error (about 4% with
+    the default 8 buckets per doubling) in a fixed array, whatever the
+    number of samples. Percentiles are a single pass over the buckets.
+    """
+
+    def __init__(self, min_value: float = 1e-4, max_value: float = 600.0, per_doubling: int = 8):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.per_doubling = per_doubling
+        self.size = int(math.ceil(math.log2(max_value / min_value) * per_doubling)) + 2
+        self.reset()
+
+    def reset(self):
+        self.counts = array('Q', [0]) * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max_seen = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return min(int(math.ceil(math.log2(value / self.min_value) * self.per_doubling)), self.size - 1)
+
+    def upper_bound(self, index: int) -> float:
+        return self.min_value * 2 ** (index / self.per_doubling)
+
+    def record(self, value: float):
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max_seen:
+            self.max_seen = value
+
+    def merge(self, other: "LogHistogram"):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max_seen = max(self.max_seen, other.max_seen)
+
+    def percentile(self, percent: float) -> float:
+        """Value at ``percent`` (0-100): the bucket's log midpoint, capped at the largest sample."""
+        if not self.count:
+            return 0.0
+        target = max(int(math.ceil(percent / 100.0 * self.count)), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                midpoint = self.upper_bound(index - 0.5) if index else self.min_value
+                return min(midpoint, self.max_seen)
+        return self.max_seen
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class WindowedHistogram:
+    """A session-wide LogHistogram plus a sliding window built from time slots.
+
+    The window is split into ``slots`` sub-histograms that are recycled as
+    time moves on, so the recent view costs ``slots`` fixed arrays and is
+    never more than one slot stale.
+    """
+
+    def __init__(self, window: float = 60.0, slots: int = 6, **histogram_options):
+        self.window = window
+        self.slot_seconds = window / slots
+        self.session = LogHistogram(**histogram_options)
+        self._slots = [LogHistogram(**histogram_options) for _ in range(slots)]
+        self._epochs = [-1] * slots
+        self._options = histogram_options
+        self._lock = threading.Lock()
+
+    def record(self, value: float, now: Optional[float] = None):
+        epoch = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        index = epoch % len(self._slots)
+        with self._lock:
+            if self._epochs[index] != epoch:
+                self._slots[index].reset()
+                self._epochs[index] = epoch
+            self._slots[index].record(value)
+            self.session.record(value)
+
+    def recent(self, now: Optional[float] = None) -> LogHistogram:
+        """Merged histogram of the slots inside the window."""
+        epoch = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        merged = LogHistogram(**self._options)
+        with self._lock:
+            for slot, slot_epoch in zip(self._slots, self._epochs):
+                if epoch - slot_epoch < len(self._slots):
+                    merged.merge(slot)
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self.session.reset()
+            for slot in self._slots:
+                slot.reset()
+            self._epochs = [-1] * len(self._slots)
+
+
+class LatencyStats:
+    """One WindowedHistogram per operation type"""
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, operations: Iterable[str] = OPERATIONS, window: float = 60.0):
+        self.histograms: Dict[str, WindowedHistogram] = {op: WindowedHistogram(window) for op in operations}
+
+    def record(self, operation: str, seconds: float):
+        self.histograms[operation].record(seconds)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def percentiles(self, operation: str, recent: bool = False) -> Dict[int, float]:
+        histogram = self.histograms[operation]
+        source = histogram.recent() if recent else histogram.session
+        return {p: source.percentile(p) for p in self.PERCENTILES}
+
+    def describe(self, operation: str) -> str:
+        """'p50/p95/p99' for the last minute and the session, e.g. for the metrics pane."""
+        histogram = self.histograms[operation]
+        recent = histogram.recent()
+        session = histogram.session
+        if not session.count:
+            return f"{operation}: no samples"
+        fmt = lambda h: "/".join(format_seconds(h.percentile(p)) for p in self.PERCENTILES) if h.count else "-"
+        return f"{operation}: 1m {fmt(recent)} (n={recent.count}) | all {fmt(session)} (n={session.count})"
+
+
+def format_seconds(seconds: float) -> str:
+    """Compact latency: 850ms, 1.2s."""
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
@@ -1,7 +1,12 @@
 import asyncio
+import os
 import requests
 from typing import Dict, List, Optional
 
+from tracing import mount_tracing, tracer
+
+DEFAULT_BASE_URL = "https://api.llama.com/v1"
+
 class ChatCompletionMessage:
     """Represents a chat completion message"""
     def __init__(self, content: str, role: str = "assistant"):
@@ -32,16 +37,48 @@ class Content:
 
 class CompletionResponse:
     """Represents a completion response"""
-    def __init__(self, content: str, model: str = "llama"):
+    def __init__(self, content: str, model: str = "llama", usage: Optional[Dict[str, int]] = None):
         self.completion_message = CompletionMessage(content)
         self.model = model
+        # Server-reported token usage ({'prompt_tokens', 'completion_tokens'}) when available
+        self.usage = usage
+
+def parse_usage(data: Dict) -> Optional[Dict[str, int]]:
+    """Extract token usage from an OpenAI-style `usage` block or Llama API `metrics` list"""
+    usage = data.get("usage")
+    if isinstance(usage, dict) and "prompt_tokens" in usage:
+        return {
+            "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+            "completion_tokens": int(usage.get("completion_tokens", 0))
+        }
+    metrics = data.get("metrics")
+    if isinstance(metrics, list):
+        values = {m.get("metric"): m.get("value") for m in metrics if isinstance(m, dict)}
+        if "num_prompt_tokens" in values:
+            return {
+                "prompt_tokens": int(values.get("num_prompt_tokens") or 0),
+                "completion_tokens": int(values.get("num_completion_tokens") or 0)
+            }
+    return None
 
 class AsyncLlamaAPIClient:
-    """Async client for Llama API"""
+    """Async client for Llama API
+
+    With a ``tokenizer`` (TokenizerService) every response carries usage,
+    falling back to local counts when the server omits it. With a
+    ``budget`` (SessionBudget) each call is admitted before it is sent and
+    charged afterwards, so budgets are enforced here for every caller.
+    ``base_url`` defaults to ``LLAMA_API_BASE_URL`` (e.g. a mock server),
+    then to the public API.
+    """
 
-    def __init__(self, api_key: str, base_url: str = "https://api.llama.com/v1"):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, tokenizer=None, budget=None):
         self.api_key = api_key
-        self.base_url = base_url
+        self.base_url = (base_url or os.getenv("LLAMA_API_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.tokenizer = tokenizer
+        self.budget = budget
+        # Shared across calls so keep-alive connections are reused
+        self.session = mount_tracing(requests.Session())
         self._chat = None
 
     async def chat_completions_create(
@@ -51,13 +88,23 @@ class AsyncLlamaAPIClient:
         max_tokens: int = 200,
         temperature: float = 0.7,
         max_completion_tokens: Optional[int] = None,
+        timeout: float = 30,
         **kwargs
     ) -> CompletionResponse:
-        """Create chat completion"""
+        """Create chat completion (``timeout`` bounds the HTTP request in seconds)"""
 
         # Use max_completion_tokens if provided, otherwise use max_tokens
         token_limit = max_completion_tokens or max_tokens
 
+        prompt_tokens = 0
+        if self.tokenizer is not None:
+            prompt_tokens = await self.tokenizer.count_messages_async(messages)
+        ticket = None
+        if self.budget is not None:
+            # Raises BudgetExceededError before anything is sent
+            ticket, token_limit = self.budget.admit(prompt_tokens, token_limit)
+        completion_tokens = 0
+
         payload = {
             "model": model,
             "messages": messages,
@@ -76,15 +123,17 @@ class AsyncLlamaAPIClient:
 
         try:
             def make_request():
-                response = requests.post(
+                response = self.session.post(
                     f"{self.base_url}/chat/completions",
                     json=payload,
                     headers=headers,
-                    timeout=30
+                    timeout=timeout
                 )
                 return response
 
-            response = await loop.run_in_executor(None, make_request)
+            with tracer.span("llm.chat", model=model, max_tokens=token_limit) as span:
+                response = await tracer.run_in_executor(loop, make_request)
+                span.set(status=response.status_code)
 
             if response.status_code == 200:
                 data = response.json()
@@ -95,19 +144,39 @@ class AsyncLlamaAPIClient:
                 else:
                     content = "No response generated"
 
+                usage = parse_usage(data)
+                if usage is not None:
+                    usage["source"] = "api"
+                elif self.tokenizer is not None:
+                    usage = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": await self.tokenizer.count_async(content),
+                        "source": "tokenizer"
+                    }
+                if usage is not None:
+                    prompt_tokens = usage["prompt_tokens"]
+                    completion_tokens = usage["completion_tokens"]
+
                 return CompletionResponse(
                     content=content,
-                    model=data.get("model", model)
+                    model=data.get("model", model),
+                    usage=usage
                 )
             else:
-                # Handle error response
+                # Handle error response; failed calls are not billed for tokens
+                prompt_tokens = 0
                 error_text = response.text
                 raise LlamaAPIError(f"API Error {response.status_code}: {error_text}")
 
         except requests.exceptions.Timeout:
+            prompt_tokens = 0
             raise LlamaAPIError("Request timeout")
         except requests.exceptions.RequestException as e:
+            prompt_tokens = 0
             raise LlamaAPIError(f"API request failed: {str(e)}") from e
+        finally:
+            if self.budget is not None:
+                self.budget.settle(ticket, prompt_tokens, completion_tokens)
 
     class Chat:
         """Chat namespace for completions"""
@@ -134,3 +203,7 @@ class AsyncLlamaAPIClient:
 class LlamaAPIError(Exception):
     """Custom exception for Llama API errors"""
     pass
+
+class BudgetExceededError(LlamaAPIError):
+    """Raised when a session, query or case budget cannot afford another call"""
+    pass
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Load Test for Inspectallama
+Ramp concurrent simulated users through process_search and record a saturation curve
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from latency_histogram import LogHistogram, format_seconds
+from mock_server import from_options as mock_server_from_options
+from system_sampler import SystemSampler
+
+# Operations a simulated user performs, in the order they are reported
+OPERATIONS = ("search", "drill_down", "answer")
+
+
+class StepResult:
+    """Latency, errors and process resources for one concurrency level"""
+
+    def __init__(self, users: int):
+        self.users = users
+        self.seconds = 0.0
+        self.latency: Dict[str, LogHistogram] = {op: LogHistogram() for op in OPERATIONS}
+        self.errors: Dict[str, int] = {op: 0 for op in OPERATIONS}
+        self.cpu_percent: Optional[float] = None
+        self.memory_mb: Optional[float] = None
+        self.loop_lag_ms: Optional[float] = None
+
+    def record(self, operation: str, seconds: float, ok: bool):
+        self.latency[operation].record(seconds)
+        if not ok:
+            self.errors[operation] += 1
+
+    @property
+    def queries(self) -> int:
+        return self.latency["search"].count + self.latency["drill_down"].count
+
+    @property
+    def queries_per_minute(self) -> float:
+        return self.queries / self.seconds * 60 if self.seconds else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        total = sum(histogram.count for histogram in self.latency.values())
+        return sum(self.errors.values()) / total if total else 0.0
+
+    def percentile(self, percent: float, operations=("search", "drill_down")) -> float:
+        merged = LogHistogram()
+        for op in operations:
+            merged.merge(self.latency[op])
+        return merged.percentile(percent)
+
+    def to_dict(self) -> Dict:
+        return {
+            "users": self.users,
+            "seconds": round(self.seconds, 3),
+            "queries": self.queries,
+            "queries_per_minute": round(self.queries_per_minute, 2),
+            "error_rate": round(self.error_rate, 4),
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "operations": {
+                op: {
+                    "count": histogram.count,
+                    "errors": self.errors[op],
+                    "mean": round(histogram.mean(), 4),
+                    "p50": round(histogram.percentile(50), 4),
+                    "p95": round(histogram.percentile(95), 4),
+                    "p99": round(histogram.percentile(99), 4)
+                } for op, histogram in self.latency.items() if histogram.count
+            },
+            "cpu_percent": self.cpu_percent,
+            "memory_mb": self.memory_mb,
+            "loop_lag_ms": self.loop_lag_ms
+        }
+
+    def describe(self) -> str:
+        resources = ""
+        if self.cpu_percent is not None:
+            resources = (f"  cpu {self.cpu_percent:5.1f}%  rss {self.memory_mb:7.1f} MB  "
+                         f"lag {format_seconds(self.loop_lag_ms / 1000)}")
+        return (f"👥 {self.users:>4} users  {self.queries_per_minute:8.1f} q/min  "
+                f"p50 {format_seconds(self.percentile(50)):>6}  p95 {format_seconds(self.percentile(95)):>6}  "
+                f"p99 {format_seconds(self.percentile(99)):>6}  errors {self.error_rate:6.1%}{resources}")
+
+
+class LoadGenerator:
+    """Closed-loop simulated users driving one WebSearchApp.
+
+    Each user runs a search, then with probability ``drill_down`` drills
+    into its top result and with probability ``answer`` asks for a
+    comprehensive answer over its own results, sleeps ``think_time`` and
+    starts over. Every query is new, so caches only help across users the
+    way they would in production. A step stops issuing work after its
+    duration and then waits for in-flight operations, which count towards
+    the step. Each user runs in its own task, so every search it starts
+    gets its own query budget scope and users never spend each other's
+    query budget; only the app's session and case budgets are shared.
+    """
+
+    def __init__(self, app, drill_down: float = 0.0, answer: float = 0.0, think_time: float = 0.0,
+                 seed: int = 0, sample_interval: float = 0.5):
+        self.app = app
+        self.drill_down = drill_down
+        self.answer = answer
+        self.think_time = think_time
+        self.sample_interval = sample_interval
+        self.steps: List[StepResult] = []
+        self._rng = random.Random(seed)
+        self._queries = itertools.count(1)
+
+    async def _timed(self, step: StepResult, operation: str, coro) -> Optional[object]:
+        started = time.perf_counter()
+        try:
+            result = await coro
+        except Exception:
+            result = None
+        # process_search reports its own failures and returns nothing
+        ok = bool(result) and not (isinstance(result, str) and result.startswith("Error"))
+        step.record(operation, time.perf_counter() - started, ok)
+        return result if ok else None
+
+    async def _user(self, step: StepResult, stop_at: float):
+        while time.monotonic() < stop_at:
+            query = f"load test query {next(self._queries)}"
+            results = await self._timed(step, "search", self.app.process_search(query))
+            if results and self._rng.random() < self.drill_down:
+                top = results[0]
+                await self._timed(step, "drill_down",
+                                  self.app.process_search(top.get('title') or top.get('url', query), is_drill_down=True))
+            if results and self._rng.random() < self.answer:
+                context = self.app.prepare_search_context(query, results)
+                await self._timed(step, "answer", self.app.call_llama_for_answer(context))
+            if self.think_time:
+                await asyncio.sleep(self._rng.expovariate(1.0 / self.think_time))
+
+    async def _run_step(self, step: StepResult, seconds: float):
+        started = time.monotonic()
+        await asyncio.gather(*(self._user(step, started + seconds) for _ in range(step.users)))
+        step.seconds = time.monotonic() - started
+
+    def run_step(self, users: int, seconds: float) -> StepResult:
+        step = StepResult(users)
+        sampler = SystemSampler(interval=self.sample_interval, lag_source=self.app.watchdog.current_lag,
+                                history=int(seconds * 4 / self.sample_interval) + 120).start()
+        try:
+            self.app.runtime.run(self._run_step(step, seconds))
+        finally:
+            sampler.stop()
+        cpu = sampler.series["cpu_percent"].values()
+        if cpu:
+            step.cpu_percent = round(sum(cpu) / len(cpu), 1)
+            step.memory_mb = round(sampler.series["memory_mb"].max(), 1)
+            step.loop_lag_ms = round(sampler.series["loop_lag_ms"].max(), 1)
+        return step
+
+    def ramp(self, levels: List[int], seconds: float, stop_on_saturation: bool = False,
+             report=print) -> List[StepResult]:
+        """Run each level in turn; finished steps stay in ``self.steps`` if the ramp is interrupted."""
+        for users in levels:
+            self.steps.append(self.run_step(users, seconds))
+            report(self.steps[-1].describe())
+            if stop_on_saturation and find_knee(self.steps) is not None:
+                report("🛑 Saturated; stopping the ramp")
+                break
+        return self.steps
+
+
+def find_knee(steps: List[StepResult], min_gain: float = 0.1, latency_factor: float = 3.0,
+              max_error_rate: float = 0.05) -> Optional[int]:
+    """Index of the last step before saturation, or None if the curve never bends.
+
+    Saturation is the first step whose throughput gains less than
+    ``min_gain`` over the previous step, whose p95 exceeds
+    ``latency_factor`` times the first step's, or whose error rate exceeds
+    ``max_error_rate``.
+    """
+    if not steps:
+        return None
+    base_p95 = steps[0].percentile(95)
+    for index, step in enumerate(steps[1:], 1):
+        previous = steps[index - 1]
+        if (step.queries_per_minute < previous.queries_per_minute * (1 + min_gain)
+                or (base_p95 and step.percentile(95) > base_p95 * latency_factor)
+                or step.error_rate > max_error_rate):
+            return index - 1
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspectallama load test: ramp concurrent users against the mock server")
+    parser.add_argument('--users', default='1,2,4,8,16,32', help='Comma-separated concurrency levels to ramp through')
+    parser.add_argument('--step-seconds', type=float, default=30.0, help='Duration of each concurrency level')
+    parser.add_argument('--drill-down', type=float, default=0.0, metavar='P', help='Probability of a drill-down per search')
+    parser.add_argument('--answer', type=float, default=0.0, metavar='P',
+                        help='Probability of a comprehensive answer per search')
+    parser.add_argument('--think-time', type=float, default=0.0, metavar='SECONDS', help='Mean pause between a user\'s searches')
+    parser.add_argument('--eager', type=int, default=10, help='Eager summaries per query')
+    parser.add_argument('--mock', default='', metavar='OPTIONS',
+                        help='Options for the in-process mock server, e.g. "--error-429 0.02 --token-rate 100"')
+    parser.add_argument('--llama-base-url', help='Use an external Llama API (e.g. a separate mock_server.py) instead')
+    parser.add_argument('--search-url', help='Use an external search endpoint instead of the in-process mock')
+    parser.add_argument('--stop-on-saturation', action='store_true', help='Stop ramping once throughput stops scaling')
+    parser.add_argument('--out', default='load_test.json', help='Saturation curve output (JSON)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        levels = [int(level) for level in args.users.split(",") if level.strip()]
+    except ValueError:
+        parser.error(f"invalid --users: {args.users}")
+
+    mock = None
+    if not (args.llama_base_url and args.search_url):
+        try:
+            mock = mock_server_from_options(args.mock, seed=args.seed).start()
+        except (SystemExit, ValueError):
+            parser.error(f"invalid --mock options: {args.mock}")
+        args.llama_base_url = args.llama_base_url or mock.llama_url
+        args.search_url = args.search_url or mock.search_url
+        print(f"🧪 Mock server on {mock.base_url} (shares this process's CPU; use an external one for clean numbers)")
+    os.environ.setdefault('LLAMA_API_KEY', 'mock')
+
+    import cumulative_app
+    print(f"🚀 Ramping {levels} users, {args.step_seconds:g}s per step")
+    # The app's per-query console output would drown the step summaries
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            app = cumulative_app.WebSearchApp(mode='cli', eager_summaries=max(args.eager, 0),
+                                              llama_base_url=args.llama_base_url, search_url=args.search_url)
+        generator = LoadGenerator(app, drill_down=args.drill_down, answer=args.answer,
+                                  think_time=args.think_time, seed=args.seed)
+        report = lambda line: print(line, file=sys.__stdout__, flush=True)
+        with contextlib.redirect_stdout(devnull):
+            try:
+                generator.ramp(levels, args.step_seconds, args.stop_on_saturation, report=report)
+            except KeyboardInterrupt:
+                report("🛑 Interrupted; keeping the finished steps")
+    steps = generator.steps
+    knee = find_knee(steps)
+    if knee is not None:
+        print(f"📈 Saturates after {steps[knee].users} users at {steps[knee].queries_per_minute:.1f} queries/min")
+    elif steps:
+        print(f"📈 Still scaling at {steps[-1].users} users ({steps[-1].queries_per_minute:.1f} queries/min)")
+
+    curve = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": {key: value for key, value in vars(args).items() if key != "out"}
+        },
+        "knee": None if knee is None else steps[knee].users,
+        "steps": [step.to_dict() for step in steps]
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(curve, f, indent=2)
+    print(f"💾 Saturation curve -> {args.out}")
+    app.runtime.stop()
+    if mock is not None:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
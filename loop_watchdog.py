@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Loop Watchdog for Inspectallama
+Continuous event-loop lag measurement that captures the stack of whatever blocks the loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+# Frames from these trees are library code; the blocking "site" is the innermost frame outside them
+_LIBRARY_PREFIXES = tuple({os.path.join(os.path.realpath(prefix), "") for prefix in
+                           (sys.prefix, sys.base_prefix, sys.exec_prefix, sys.base_exec_prefix)})
+_ASYNCIO_DIR = os.path.join(os.path.dirname(os.path.realpath(asyncio.__file__)), "")
+
+
+def _is_library(filename: str) -> bool:
+    path = os.path.realpath(filename)
+    return path.startswith(_LIBRARY_PREFIXES) or filename.startswith("<")
+
+
+def _describe(frame: traceback.FrameSummary) -> str:
+    return f"{frame.name} ({os.path.basename(frame.filename)}:{frame.lineno})"
+
+
+class Offender:
+    """Accumulated stalls attributed to one blocking site"""
+
+    __slots__ = ("site", "entry", "count", "total", "worst", "stack")
+
+    def __init__(self, site: str, entry: str):
+        self.site = site
+        self.entry = entry
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.stack: List[str] = []
+
+    def describe(self) -> str:
+        via = f" via {self.entry}" if self.entry and self.entry != self.site else ""
+        return (f"{self.site}{via}: {self.count}x, worst {self.worst * 1000:.0f} ms, "
+                f"total {self.total * 1000:.0f} ms")
+
+
+class LoopWatchdog:
+    """Watch an event loop from a separate thread and attribute stalls to code sites.
+
+    Every ``interval`` seconds the watchdog schedules a heartbeat callback on
+    the loop; the delay until it runs is the scheduling lag. If a heartbeat
+    is still pending after ``threshold`` seconds, the loop thread is stuck
+    in one callback or coroutine step, so its current frame is captured via
+    ``sys._current_frames()``. When the heartbeat finally runs, the stall is
+    charged to the innermost app (non-library) frame of that stack, together
+    with the coroutine or callback that was being stepped. ``on_stall`` is
+    called from the watchdog thread with each finished stall's Offender and
+    lag.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread: threading.Thread, threshold: float = 0.1,
+                 interval: float = 0.05, on_stall: Optional[Callable[[Offender, float], None]] = None):
+        self.loop = loop
+        self.loop_thread = loop_thread
+        self.threshold = threshold
+        self.interval = interval
+        self.on_stall = on_stall
+        self.offenders: Dict[str, Offender] = {}
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._sent: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LoopWatchdog":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def current_lag(self) -> float:
+        """Latest heartbeat lag, or how long the pending heartbeat has waited if that is longer."""
+        sent = self._sent
+        pending = time.perf_counter() - sent if sent is not None else 0.0
+        return max(self.last_lag, pending)
+
+    def _beat(self, sent: float):
+        self.last_lag = time.perf_counter() - sent
+        self._sent = None
+
+    def _run(self):
+        captured = None
+        while not self._stop.wait(self.interval):
+            if self.loop.is_closed():
+                break
+            sent = self._sent
+            if sent is None:
+                if captured is not None:
+                    self._record(captured, self.last_lag)
+                    captured = None
+                if self.last_lag > self.max_lag:
+                    self.max_lag = self.last_lag
+                self._sent = time.perf_counter()
+                try:
+                    self.loop.call_soon_threadsafe(self._beat, self._sent)
+                except RuntimeError:
+                    break
+            elif captured is None and time.perf_counter() - sent >= self.threshold:
+                frame = sys._current_frames().get(self.loop_thread.ident)
+                if frame is not None:
+                    captured = traceback.extract_stack(frame)
+                del frame
+
+    def _record(self, stack: traceback.StackSummary, lag: float):
+        # Frames below asyncio's Handle._run belong to the callback or task step being run
+        start = 0
+        for index, frame in enumerate(stack):
+            if frame.filename.startswith(_ASYNCIO_DIR) and frame.name == "_run":
+                start = index + 1
+        running = [frame for frame in stack[start:] if not frame.filename.startswith(_ASYNCIO_DIR)] or list(stack)
+        app_frames = [frame for frame in running if not _is_library(frame.filename)]
+        site = _describe(app_frames[-1] if app_frames else running[-1])
+        entry = _describe(running[0]) if running else ""
+        offender = self.offenders.get(site)
+        if offender is None:
+            offender = self.offenders[site] = Offender(site, entry)
+        offender.count += 1
+        offender.total += lag
+        if lag >= offender.worst:
+            offender.worst = lag
+            offender.stack = traceback.format_list(running[-8:])
+        self.stalls += 1
+        if self.on_stall is not None:
+            try:
+                self.on_stall(offender, lag)
+            except Exception:
+                pass  # Reporting must not stop the watchdog
+
+    def worst(self, count: int = 5) -> List[Offender]:
+        """Sites that blocked the loop the longest in total."""
+        return sorted(list(self.offenders.values()), key=lambda offender: offender.total, reverse=True)[:count]
+
+    def reset(self):
+        self.offenders = {}
+        self.max_lag = 0.0
+        self.stalls = 0
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Memory Tracker for Inspectallama
+tracemalloc snapshots around each query with top allocation sites and retained growth
+"""
+
+import asyncio
+import collections
+import contextlib
+import linecache
+import os
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+# Allocations made by the tracker itself or by the import machinery are noise
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>")
+)
+
+
+def format_bytes(size: float) -> str:
+    """Signed compact size: +1.2 MB, -340 KB."""
+    sign = "-" if size < 0 else "+"
+    size = abs(size)
+    if size >= 1024 * 1024:
+        return f"{sign}{size / 1024 / 1024:.1f} MB"
+    return f"{sign}{size / 1024:.0f} KB"
+
+
+class MemoryReport:
+    """Net growth and top allocation sites for one query"""
+
+    def __init__(self, query_id: str, query: str, net: int, traced: int, retained: int,
+                 top: List[Tuple[str, int, int]], seconds: float):
+        self.query_id = query_id
+        self.query = query
+        self.net = net
+        self.traced = traced
+        self.retained = retained
+        self.top = top
+        self.seconds = seconds
+        self.flagged = False
+        self.growing: List[Tuple[str, int, int]] = []
+
+    def describe(self, sites: int = 5) -> str:
+        lines = [f"🧮 {self.query_id} '{self.query[:30]}': {format_bytes(self.net)} net, "
+                 f"{self.traced / 1024 / 1024:.1f} MB traced, {format_bytes(self.retained)} since first query"]
+        for site, size, count in self.top[:sites]:
+            lines.append(f"   {format_bytes(size):>10} {count:+7d} blocks  {site}")
+        if self.flagged:
+            lines.append("   📈 Retained memory grew across the last queries; largest growth since the first query:")
+            for site, size, count in self.growing[:sites]:
+                lines.append(f"   {format_bytes(size):>10} {count:+7d} blocks  {site}")
+        return "\n".join(lines)
+
+
+class QueryMemoryTracker:
+    """Snapshot traced allocations before and after each query.
+
+    Disabled by default because tracemalloc slows every allocation; with
+    ``enabled`` the tracker starts tracemalloc storing ``frames`` frames per
+    allocation. Each query's report lists its top allocation sites by net
+    size. Memory that is still held after a query counts as retained; when
+    retained memory grows for ``growth_queries`` queries in a row the report
+    is flagged and compared against the baseline taken before the first
+    query, which names the sites that keep accumulating.
+    """
+
+    def __init__(self, enabled: bool = False, frames: int = 1, top: int = 10, growth_queries: int = 3,
+                 on_report: Optional[Callable[[MemoryReport], None]] = None):
+        self.enabled = enabled
+        self.frames = frames
+        self.top = top
+        self.growth_queries = growth_queries
+        self.on_report = on_report
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_traced = 0
+        self._after = collections.deque(maxlen=growth_queries + 1)
+        self._active = False
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    @staticmethod
+    def _traced(snapshot: tracemalloc.Snapshot) -> int:
+        """Traced bytes excluding the snapshots themselves (tracemalloc's own frames are filtered)."""
+        return sum(stat.size for stat in snapshot.statistics("filename"))
+
+    def _sites(self, after: tracemalloc.Snapshot, before: tracemalloc.Snapshot) -> List[Tuple[str, int, int]]:
+        sites = []
+        for stat in after.compare_to(before, "lineno")[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            sites.append((f"{os.path.basename(frame.filename)}:{frame.lineno}", stat.size_diff, stat.count_diff))
+        return sites
+
+    def _report(self, query_id: str, query: str, before: tracemalloc.Snapshot, seconds: float) -> MemoryReport:
+        after = self._snapshot()
+        traced = self._traced(after)
+        report = MemoryReport(
+            query_id, query,
+            net=traced - self._traced(before),
+            traced=traced,
+            retained=traced - self._baseline_traced,
+            top=self._sites(after, before),
+            seconds=seconds
+        )
+        self._after.append(traced)
+        recent = list(self._after)
+        if len(recent) > self.growth_queries and all(b > a for a, b in zip(recent, recent[1:])):
+            report.flagged = True
+            report.growing = self._sites(after, self.baseline)
+        return report
+
+    @contextlib.asynccontextmanager
+    async def track(self, query_id: str, query: str = ""):
+        """Snapshot around the enclosed block; overlapping queries are not tracked.
+
+        Snapshots are taken, filtered and compared in the loop's executor, so
+        other queries and the UI keep running meanwhile; only tracemalloc's
+        raw copy of the traces still holds the GIL.
+        """
+        if not self.enabled or self._active:
+            yield None
+            return
+        self._active = True
+        loop = asyncio.get_running_loop()
+        try:
+            before = await loop.run_in_executor(None, self._snapshot)
+            if self.baseline is None:
+                self.baseline = before
+                self._baseline_traced = await loop.run_in_executor(None, self._traced, before)
+        except BaseException:
+            self._active = False
+            raise
+        started = time.perf_counter()
+        try:
+            yield before
+        finally:
+            try:
+                report = await loop.run_in_executor(None, self._report, query_id, query, before,
+                                                    time.perf_counter() - started)
+            except RuntimeError:
+                report = None  # Executor already shut down
+            finally:
+                self._active = False
+            if report is not None and self.on_report is not None:
+                self.on_report(report)
+
+    def reset(self):
+        """Forget the baseline; the next query starts a new one."""
+        self.baseline = None
+        self._after.clear()
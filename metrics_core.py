@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Metrics Core for Inspectallama
+Per-thread sharded counters and rate-limited asynchronous change notification
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Hashable, List
+
+
+class ShardedCounter:
+    """A counter that every thread increments without locks.
+
+    Each thread gets its own single-slot shard on first use, and only that
+    thread ever writes it, so concurrent increments from executor threads,
+    the event loop and Tk never lose updates. Tasks on one event loop share
+    the loop thread's shard, which is safe because ``+=`` cannot be
+    interleaved by another task. Shards of threads that have exited are
+    folded into ``_retired`` whenever a new shard is made, so executor churn
+    cannot grow the list past the live threads. Reads sum the shards;
+    ``reset`` records a baseline instead of touching shards owned by other
+    threads.
+    """
+
+    __slots__ = ("_local", "_shards", "_lock", "_retired", "_base")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[tuple] = []  # (owning thread, [count])
+        self._lock = threading.Lock()
+        self._retired = 0
+        self._base = 0
+
+    def add(self, amount=1):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+        shard[0] += amount
+
+    def _new_shard(self) -> list:
+        shard = [0]
+        with self._lock:
+            self._prune()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _prune(self):
+        # A dead thread can no longer write its shard, so its count is final
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._retired += shard[0]
+        self._shards = live
+
+    def _total(self):
+        with self._lock:
+            return self._retired + sum(shard[0] for _, shard in self._shards)
+
+    @property
+    def value(self):
+        return self._total() - self._base
+
+    def reset(self):
+        self._base = self._total()
+
+
+class CounterField:
+    """Read-only attribute backed by ``obj._counters[name]``"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return obj._counters[self.name].value
+
+
+class RateLimitedNotifier:
+    """Deliver callbacks on a background thread, coalesced per key.
+
+    ``post`` is cheap enough for the hot path: it stores the latest callback
+    for its key and wakes the dispatcher. The dispatcher runs everything
+    pending, then sleeps ``interval`` seconds, so each key fires at most
+    once per interval and always ends on its latest update.
+    """
+
+    def __init__(self, interval: float = 0.05, name: str = "metrics-notifier"):
+        self.interval = interval
+        self.name = name
+        self._pending: Dict[Hashable, tuple] = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def post(self, key: Hashable, callback: Callable, *args):
+        self._pending[key] = (callback, args)
+        if self._thread is None:
+            self._start()
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Run everything pending now, in the calling thread."""
+        for _ in range(len(self._pending)):
+            try:
+                _, (callback, args) = self._pending.popitem()
+            except KeyError:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                pass  # A failing listener must not stop delivery to the others
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+            time.sleep(self.interval)
+
+
+# Shared by PerformanceMetrics and ProgressTracker
+notifier = RateLimitedNotifier()
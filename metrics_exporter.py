@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter for Inspectallama
+OpenMetrics text exposition of PerformanceMetrics over a local HTTP endpoint
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Exposed histogram bucket bounds in seconds; the log buckets are folded into these
+LATENCY_BOUNDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PREFIX = "inspectallama"
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class OpenMetricsWriter:
+    """Accumulate metric families and render them as OpenMetrics text"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, unit: str = ""):
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        if unit:
+            self.lines.append(f"# UNIT {PREFIX}_{name} {unit}")
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        text = str(value) if isinstance(value, int) else repr(float(value))
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {text}")
+
+    def counter(self, name: str, help_text: str, samples: List[Tuple[Optional[Dict[str, str]], float]], unit: str = ""):
+        self.family(name, "counter", help_text, unit)
+        for labels, value in samples:
+            self.sample(f"{name}_total", value, labels)
+
+    def gauge(self, name: str, help_text: str, samples: List[Tuple[Optional[Dict[str, str]], float]], unit: str = ""):
+        self.family(name, "gauge", help_text, unit)
+        for labels, value in samples:
+            self.sample(name, value, labels)
+
+    def histogram(self, name: str, help_text: str, histograms: Dict[str, object], label: str, unit: str = "seconds"):
+        """Expose LogHistograms keyed by ``label`` value, folded into LATENCY_BOUNDS."""
+        self.family(name, "histogram", help_text, unit)
+        for key, histogram in histograms.items():
+            counts = list(histogram.counts)
+            cumulative = 0
+            index = 0
+            for bound in LATENCY_BOUNDS:
+                while index < len(counts) and histogram.upper_bound(index) <= bound:
+                    cumulative += counts[index]
+                    index += 1
+                self.sample(f"{name}_bucket", cumulative, {label: key, "le": repr(float(bound))})
+            total = sum(counts)
+            self.sample(f"{name}_bucket", total, {label: key, "le": "+Inf"})
+            self.sample(f"{name}_count", total, {label: key})
+            self.sample(f"{name}_sum", histogram.total, {label: key})
+
+    def render(self) -> str:
+        return "\n".join(self.lines + ["# EOF"]) + "\n"
+
+
+def render_openmetrics(metrics, budget=None, gauges: Optional[Dict[str, float]] = None) -> str:
+    """Render PerformanceMetrics (and optional budget / in-flight gauges) as OpenMetrics text.
+
+    Only plain attribute reads are made, so a scrape never takes a lock
+    that the request path holds.
+    """
+    out = OpenMetricsWriter()
+    out.counter("requests", "Llama API requests", [
+        ({"result": "success"}, metrics.successful_requests),
+        ({"result": "failure"}, metrics.failed_requests)
+    ])
+    out.counter("tokens", "Tokens exchanged with the Llama API", [
+        ({"direction": "sent"}, metrics.total_tokens_sent),
+        ({"direction": "received"}, metrics.total_tokens_received)
+    ])
+    out.counter("api_cost_dollars", "Estimated Llama API cost", [(None, metrics.total_api_cost)])
+    out.counter("web_fetches", "Result pages fetched", [
+        ({"result": "success"}, metrics.web_pages_fetched - metrics.web_pages_failed),
+        ({"result": "failure"}, metrics.web_pages_failed)
+    ])
+    out.counter("page_cache_lookups", "Page cache lookups", [
+        ({"result": "hit"}, metrics.cache_hits),
+        ({"result": "miss"}, metrics.cache_misses)
+    ])
+    out.counter("searches", "Web searches run", [(None, metrics.total_searches)])
+    out.counter("cancelled", "Cancelled work", [
+        ({"kind": "search"}, metrics.cancelled_searches),
+        ({"kind": "task"}, metrics.cancelled_tasks)
+    ])
+    out.counter("deadline_summaries", "Eager summaries relative to the query deadline", [
+        ({"outcome": "met"}, metrics.deadline_met),
+        ({"outcome": "missed"}, metrics.deadline_missed)
+    ])
+    out.counter("loop_stalls", "Event loop stalls caught by the watchdog", [(None, metrics.loop_stalls)])
+    out.counter("loop_stall_seconds", "Time the event loop spent blocked in stalls", [(None, metrics.loop_stall_time)],
+                unit="seconds")
+    out.gauge("deferred_summaries", "Results waiting for an on-demand summary", [(None, metrics.deferred_summaries)])
+    out.histogram("operation_latency_seconds", "Latency per pipeline operation",
+                  {op: hist.session for op, hist in metrics.latency.histograms.items()}, label="operation")
+
+    if budget is not None:
+        out.gauge("budget_level", "Budget degradation level (0 normal .. 3 exhausted)", [(None, budget.level())])
+        out.counter("budget_rejected_calls", "API calls refused by the budget", [(None, budget.rejected_calls)])
+        remaining = []
+        for scope in budget.active_scopes():
+            for dimension, value in scope.remaining().items():
+                if value is not None:
+                    remaining.append(({"scope": scope.name, "dimension": dimension}, value))
+        out.gauge("budget_remaining", "Budget headroom per scope and dimension", remaining)
+
+    system = metrics.get_system_metrics()
+    out.gauge("process_cpu_percent", "Process CPU usage from the background sampler", [(None, system['cpu_percent'])])
+    out.gauge("process_resident_memory_bytes", "Process RSS", [(None, system['memory_mb'] * 1024 * 1024)], unit="bytes")
+    for name, value in (gauges or {}).items():
+        out.gauge(name, name.replace("_", " ").capitalize(), [(None, value)])
+    return out.render()
+
+
+class MetricsExporter:
+    """Serve ``render()`` at ``/metrics`` from a daemon thread.
+
+    Binds to localhost by default; the server thread is separate from the
+    event loop and the Tk thread, so scrapes never queue behind app work.
+    """
+
+    def __init__(self, render: Callable[[], str], host: str = "127.0.0.1", port: int = 9464):
+        self.render = render
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "MetricsExporter":
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.render().encode("utf-8")
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the console
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="metrics-exporter", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Metrics Store for Inspectallama
+Per-query and per-request records in a local SQLite database for cross-session trends
+"""
+
+import contextvars
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+import urllib.parse
+import uuid
+from typing import Dict, List, Optional
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".inspectallama", "metrics.db")
+
+# Query the current task is working for; stamped onto every request record
+current_query_id: contextvars.ContextVar = contextvars.ContextVar("inspectallama_query_id", default=None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    mode TEXT
+);
+CREATE TABLE IF NOT EXISTS queries (
+    ts REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    query_id TEXT,
+    query TEXT,
+    outcome TEXT,
+    results INTEGER,
+    eager INTEGER,
+    deferred INTEGER,
+    duration REAL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    ts REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    query_id TEXT,
+    kind TEXT NOT NULL,
+    success INTEGER,
+    latency REAL,
+    tokens_sent INTEGER,
+    tokens_received INTEGER,
+    cost REAL
+);
+CREATE INDEX IF NOT EXISTS idx_queries_ts ON queries (ts);
+CREATE INDEX IF NOT EXISTS idx_requests_ts_kind ON requests (ts, kind);
+"""
+
+_STOP = object()
+
+
+class MetricsStore:
+    """Append-only metrics log in SQLite (WAL), written by a background thread.
+
+    ``record_query`` and ``record_request`` only put a tuple on a queue, so
+    the request path pays microseconds; the writer thread drains the queue
+    and commits in batches of up to ``batch_size`` rows or every
+    ``flush_interval`` seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, mode: str = "", batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.session_id = uuid.uuid4().hex[:12]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.connect(path) as conn:
+            conn.execute("INSERT INTO sessions (id, started, mode) VALUES (?, ?, ?)",
+                         (self.session_id, time.time(), mode))
+        self._thread = threading.Thread(target=self._run, name="metrics-store", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    @staticmethod
+    def connect_readonly(path: str) -> sqlite3.Connection:
+        """Open an existing database for reading; never creates a file or touches the schema."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No metrics database at {path}")
+        uri = "file:" + urllib.parse.quote(os.path.abspath(path)) + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, timeout=10)
+
+    def record_request(self, kind: str, success: bool = True, latency: Optional[float] = None,
+                       tokens_sent: int = 0, tokens_received: int = 0, cost: float = 0.0):
+        self._queue.put(("requests", (time.time(), self.session_id, current_query_id.get(), kind, int(success),
+                                      latency, tokens_sent, tokens_received, cost)))
+
+    def record_query(self, query_id: str, query: str, outcome: str, results: int = 0, eager: int = 0,
+                     deferred: int = 0, duration: float = 0.0):
+        self._queue.put(("queries", (time.time(), self.session_id, query_id, query, outcome,
+                                     results, eager, deferred, duration)))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Flush outstanding rows and stop the writer."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = self.connect(self.path)
+        statements = {
+            "requests": "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            "queries": "INSERT INTO queries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        }
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows: Dict[str, List[tuple]] = {"requests": [], "queries": []}
+            flushed = []
+            for entry in batch:
+                if entry is _STOP:
+                    stopping = True
+                elif isinstance(entry, threading.Event):
+                    flushed.append(entry)
+                else:
+                    rows[entry[0]].append(entry[1])
+            try:
+                with conn:
+                    for table, values in rows.items():
+                        if values:
+                            conn.executemany(statements[table], values)
+            except sqlite3.Error:
+                pass  # Metrics must never take the app down
+            for done in flushed:
+                done.set()
+        conn.close()
+
+
+# ===== REPORTING =====
+def parse_span(text: str) -> float:
+    """'12h', '7d', '30m' or a number of seconds."""
+    text = (text or "").strip().lower()
+    units = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(max(int(math.ceil(percent / 100.0 * len(values))) - 1, 0), len(values) - 1)]
+
+
+def build_report(path: str = DEFAULT_DB_PATH, span: float = 7 * 86400, bucket: Optional[float] = None) -> List[Dict]:
+    """Aggregate the last ``span`` seconds into time buckets (hourly up to two days, else daily).
+
+    The database is opened read-only: a missing file raises FileNotFoundError
+    and one without the metrics tables raises sqlite3.Error.
+    """
+    bucket = bucket or (3600 if span <= 2 * 86400 else 86400)
+    since = time.time() - span
+    conn = MetricsStore.connect_readonly(path)
+    try:
+        requests = conn.execute(
+            "SELECT ts, kind, success, latency, tokens_sent, tokens_received, cost FROM requests WHERE ts >= ?",
+            (since,)
+        ).fetchall()
+        queries = conn.execute("SELECT ts, outcome FROM queries WHERE ts >= ?", (since,)).fetchall()
+    finally:
+        conn.close()
+
+    buckets: Dict[int, Dict] = {}
+
+    def slot(ts):
+        key = int(ts // bucket)
+        return buckets.setdefault(key, {
+            "start": key * bucket, "queries": 0, "llm_latency": [], "search_latency": [], "llm_calls": 0,
+            "llm_errors": 0, "tokens": 0, "cost": 0.0, "cache_hits": 0, "cache_lookups": 0,
+            "fetches": 0, "fetch_errors": 0
+        })
+
+    for ts, outcome in queries:
+        slot(ts)["queries"] += 1
+    for ts, kind, success, latency, sent, received, cost in requests:
+        row = slot(ts)
+        if kind == "llm":
+            row["llm_calls"] += 1
+            row["llm_errors"] += 0 if success else 1
+            row["tokens"] += (sent or 0) + (received or 0)
+            row["cost"] += cost or 0.0
+            if latency is not None:
+                row["llm_latency"].append(latency)
+        elif kind == "search" and latency is not None:
+            row["search_latency"].append(latency)
+        elif kind == "cache":
+            row["cache_lookups"] += 1
+            row["cache_hits"] += 1 if success else 0
+        elif kind == "fetch":
+            row["fetches"] += 1
+            row["fetch_errors"] += 0 if success else 1
+
+    report = []
+    for key in sorted(buckets):
+        row = buckets[key]
+        report.append({
+            "start": row["start"],
+            "queries": row["queries"],
+            "llm_calls": row["llm_calls"],
+            "llm_p50": _percentile(row["llm_latency"], 50),
+            "llm_p95": _percentile(row["llm_latency"], 95),
+            "llm_p99": _percentile(row["llm_latency"], 99),
+            "search_p50": _percentile(row["search_latency"], 50),
+            "tokens": row["tokens"],
+            "cost": row["cost"],
+            "cache_hit_rate": row["cache_hits"] / row["cache_lookups"] if row["cache_lookups"] else None,
+            "error_rate": ((row["llm_errors"] + row["fetch_errors"]) / (row["llm_calls"] + row["fetches"])
+                           if row["llm_calls"] + row["fetches"] else None)
+        })
+    return report
+
+
+def format_report(report: List[Dict]) -> str:
+    """Render build_report rows as a fixed-width table."""
+    if not report:
+        return "No metrics recorded in this window."
+    header = (f"{'Window start':<17} {'Qry':>4} {'LLM':>5} {'p50':>7} {'p95':>7} {'p99':>7} "
+              f"{'Search':>7} {'Tokens':>9} {'Cost':>8} {'Cache':>6} {'Err':>6}")
+    lines = [header, "-" * len(header)]
+    pct = lambda value: "-" if value is None else f"{value * 100:.0f}%"
+    for row in report:
+        lines.append(
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['start'])):<17} {row['queries']:>4} "
+            f"{row['llm_calls']:>5} {row['llm_p50']:>6.2f}s {row['llm_p95']:>6.2f}s {row['llm_p99']:>6.2f}s "
+            f"{row['search_p50']:>6.2f}s {row['tokens']:>9,} ${row['cost']:>7.3f} "
+            f"{pct(row['cache_hit_rate']):>6} {pct(row['error_rate']):>6}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Mock Server for Inspectallama
+Offline stand-in for the Llama API, DuckDuckGo HTML search and result pages, with fault injection
+"""
+
+import argparse
+import collections
+import glob
+import html
+import json
+import math
+import os
+import random
+import shlex
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+WORDS = ("llama inference latency throughput research model token context retrieval search result page "
+         "summary evidence benchmark dataset analysis pipeline cache network request response signal "
+         "quantum climate policy market genome protein battery energy vision language memory").split()
+
+
+class LatencyModel:
+    """Random delay in seconds.
+
+    Specs: "fixed:0.2", "uniform:0.1,0.5", "normal:0.3,0.1" (mean, stddev)
+    or "lognormal:0.8,0.5" (median, sigma); a bare number means fixed.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}' (expected one of {', '.join(self.KINDS)})")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> "LatencyModel":
+        if not spec:
+            return cls()
+        kind, _, params = spec.partition(":")
+        if not params:
+            return cls("fixed", float(kind))
+        values = [float(value) for value in params.split(",")]
+        return cls(kind.strip().lower(), values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * math.exp(rng.gauss(0.0, self.b)) if self.a > 0 else 0.0
+        else:
+            value = self.a
+        return max(value, 0.0)
+
+    def __str__(self):
+        return f"{self.kind}:{self.a:g},{self.b:g}" if self.kind != "fixed" else f"fixed:{self.a:g}"
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server that treats clients hanging up mid-response as routine."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Deadlines, injected timeouts and superseded searches all abandon requests
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class MockServer:
+    """Serve the endpoints the app talks to, from one local HTTP server.
+
+    * ``POST .../chat/completions`` - Llama/OpenAI-style chat completions,
+      streamed as server-sent events when the payload asks for ``stream``;
+      usage is always reported
+    * ``GET /html/?q=...`` - DuckDuckGo HTML results linking to ``/page/N``
+    * ``GET /page/N`` - a readable article page
+
+    Every endpoint waits a delay drawn from its LatencyModel; completions
+    also take ``tokens / token_rate`` seconds to "generate". Endpoints named
+    in ``fault_targets`` fail with 429 or 500, or hang for ``hang_seconds``
+    (a client timeout), at the given rates. ``fixtures`` may hold a
+    ``search.html`` and ``pages/*.html`` to serve instead of the generated
+    ones. Counters of what was served are in ``stats``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        llm_latency: Optional[LatencyModel] = None,
+        search_latency: Optional[LatencyModel] = None,
+        page_latency: Optional[LatencyModel] = None,
+        token_rate: float = 0.0,
+        completion_tokens: int = 120,
+        error_429: float = 0.0,
+        error_500: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 120.0,
+        fault_targets=("llm",),
+        results: int = 30,
+        page_words: int = 800,
+        fixtures: Optional[str] = None,
+        seed: Optional[int] = None
+    ):
+        self.host = host
+        self.port = port
+        self.llm_latency = llm_latency or LatencyModel()
+        self.search_latency = search_latency or LatencyModel()
+        self.page_latency = page_latency or LatencyModel()
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.fault_targets = set(fault_targets)
+        self.results = results
+        self.page_words = page_words
+        self.search_fixture = None
+        self.page_fixtures: List[str] = []
+        if fixtures:
+            search_path = os.path.join(fixtures, "search.html")
+            if os.path.exists(search_path):
+                with open(search_path, encoding="utf-8") as f:
+                    self.search_fixture = f.read()
+            for path in sorted(glob.glob(os.path.join(fixtures, "pages", "*.html"))):
+                with open(path, encoding="utf-8") as f:
+                    self.page_fixtures.append(f.read())
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.stats = collections.Counter()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def llama_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}/html/"
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _random(self) -> float:
+        with self._rng_lock:
+            return self.rng.random()
+
+    def delay(self, model: LatencyModel) -> float:
+        with self._rng_lock:
+            return model.sample(self.rng)
+
+    def fault(self, target: str) -> Optional[str]:
+        """Pick an injected fault for this request: '429', '500', 'timeout' or None."""
+        if target not in self.fault_targets:
+            return None
+        roll = self._random()
+        for name, rate in (("429", self.error_429), ("500", self.error_500), ("timeout", self.timeout_rate)):
+            if roll < rate:
+                return name
+            roll -= rate
+        return None
+
+    def wait(self, seconds: float):
+        """Sleep, but return early when the server stops."""
+        if seconds > 0:
+            self._stop.wait(seconds)
+
+    # ===== CONTENT =====
+    def completion_text(self, messages: List[Dict], max_tokens: int) -> Tuple[str, int, int]:
+        prompt = " ".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = max(len(prompt) // 4, 1)
+        words = [word for word in prompt.split() if word.isalpha()] or WORDS
+        tokens = max(min(self.completion_tokens, max_tokens or self.completion_tokens), 1)
+        text = " ".join(words[i % len(words)] for i in range(tokens))
+        return f"Mock summary: {text}.", prompt_tokens, tokens
+
+    def search_html(self, query: str) -> str:
+        if self.search_fixture is not None:
+            return self.search_fixture
+        rng = random.Random(query)
+        title = html.escape(query)
+        items = []
+        for i in range(self.results):
+            href = f"{self.base_url}/page/{i}?q={urllib.parse.quote(query)}"
+            snippet = " ".join(rng.choice(WORDS) for _ in range(24))
+            items.append(
+                f'<div class="result"><h2 class="result__title"><a class="result__a" href="{href}">'
+                f'{title} result {i + 1}: {rng.choice(WORDS)} {rng.choice(WORDS)}</a></h2>'
+                f'<a class="result__url" href="{href}">{self.host}/page/{i}</a>'
+                f'<a class="result__snippet">{title} {snippet}</a></div>'
+            )
+        return f"<html><body><div id=\"links\">{''.join(items)}</div></body></html>"
+
+    def page_html(self, page_id: int, query: str) -> str:
+        if self.page_fixtures:
+            return self.page_fixtures[page_id % len(self.page_fixtures)]
+        rng = random.Random(f"{query}/{page_id}")
+        query = html.escape(query)
+        paragraphs = []
+        for _ in range(max(self.page_words // 80, 1)):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(80))
+            paragraphs.append(f"<p>{query} {sentence}.</p>")
+        return (f"<html><head><title>{query} page {page_id}</title></head><body>"
+                f"<nav>Home | About</nav><article><h1>{query} page {page_id}</h1>{''.join(paragraphs)}</article>"
+                f"<footer>Mock footer</footer></body></html>")
+
+    # ===== SERVER =====
+    def start(self) -> "MockServer":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def send_body(self, status: int, body: str, content_type: str, headers: Optional[Dict] = None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def inject(self, target: str) -> bool:
+                """Serve an injected fault; True when the request was answered with one."""
+                fault = mock.fault(target)
+                if fault is None:
+                    return False
+                mock.count(f"{target}.fault.{fault}")
+                if fault == "timeout":
+                    mock.wait(mock.hang_seconds)
+                    fault = "500"
+                status = int(fault)
+                error = {"error": {"message": "Rate limited (mock)" if status == 429 else "Internal error (mock)",
+                                   "code": status}}
+                self.send_body(status, json.dumps(error), "application/json",
+                               {"Retry-After": "1"} if status == 429 else None)
+                return True
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                params = urllib.parse.parse_qs(parsed.query)
+                query = params.get("q", [""])[0]
+                if parsed.path.rstrip("/") == "/html":
+                    mock.count("search")
+                    if self.inject("search"):
+                        return
+                    mock.wait(mock.delay(mock.search_latency))
+                    self.send_body(200, mock.search_html(query), "text/html; charset=utf-8")
+                elif parsed.path.startswith("/page/"):
+                    mock.count("page")
+                    if self.inject("page"):
+                        return
+                    try:
+                        page_id = int(parsed.path.split("/")[2])
+                    except ValueError:
+                        self.send_error(404)
+                        return
+                    mock.wait(mock.delay(mock.page_latency))
+                    self.send_body(200, mock.page_html(page_id, query), "text/html; charset=utf-8")
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                mock.count("llm")
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_body(400, json.dumps({"error": {"message": "Invalid JSON"}}), "application/json")
+                    return
+                if self.inject("llm"):
+                    return
+                model = payload.get("model", "mock-llama")
+                text, prompt_tokens, completion_tokens = mock.completion_text(
+                    payload.get("messages") or [], payload.get("max_completion_tokens") or payload.get("max_tokens"))
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                         "total_tokens": prompt_tokens + completion_tokens}
+                mock.wait(mock.delay(mock.llm_latency))
+                if payload.get("stream"):
+                    self.stream(model, text, usage)
+                    return
+                if mock.token_rate > 0:
+                    mock.wait(completion_tokens / mock.token_rate)
+                response = {
+                    "id": f"mock-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": usage
+                }
+                self.send_body(200, json.dumps(response), "application/json")
+
+            def stream(self, model: str, text: str, usage: Dict):
+                """Server-sent events, one chunk per word, paced by the token rate."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                words = text.split(" ")
+                for index, word in enumerate(words):
+                    chunk = {"object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": word if index == 0 else " " + word},
+                                          "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if mock.token_rate > 0:
+                        mock.wait(1.0 / mock.token_rate)
+                final = {"object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass  # Keep request lines out of the console
+
+        self.server = QuietHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="mock-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Mock server options, shared by this module's CLI and tools that embed the server."""
+    parser.add_argument('--llm-latency', default='lognormal:0.8,0.4', metavar='SPEC',
+                        help='Time to first token, e.g. fixed:0.2, uniform:0.1,0.5, lognormal:0.8,0.4')
+    parser.add_argument('--search-latency', default='uniform:0.2,0.6', metavar='SPEC', help='Search delay')
+    parser.add_argument('--page-latency', default='lognormal:0.15,0.6', metavar='SPEC', help='Page fetch delay')
+    parser.add_argument('--token-rate', type=float, default=60.0, help='Generated tokens per second (0 = instant)')
+    parser.add_argument('--completion-tokens', type=int, default=120, help='Tokens per completion')
+    parser.add_argument('--error-429', type=float, default=0.0, metavar='RATE', help='Fraction answered with 429')
+    parser.add_argument('--error-500', type=float, default=0.0, metavar='RATE', help='Fraction answered with 500')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, metavar='RATE',
+                        help='Fraction that hang for --hang seconds')
+    parser.add_argument('--hang', type=float, default=120.0, help='Seconds an injected timeout hangs')
+    parser.add_argument('--faults', default='llm', help='Endpoints that get faults: llm,search,page')
+    parser.add_argument('--results', type=int, default=30, help='Search results per query')
+    parser.add_argument('--fixtures', metavar='DIR', help='Directory with search.html and pages/*.html')
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible delays and faults')
+
+
+def from_arguments(args, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    return MockServer(
+        host=host,
+        port=port,
+        llm_latency=LatencyModel.parse(args.llm_latency),
+        search_latency=LatencyModel.parse(args.search_latency),
+        page_latency=LatencyModel.parse(args.page_latency),
+        token_rate=args.token_rate,
+        completion_tokens=args.completion_tokens,
+        error_429=args.error_429,
+        error_500=args.error_500,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang,
+        fault_targets=[target.strip() for target in args.faults.split(",") if target.strip()],
+        results=args.results,
+        fixtures=args.fixtures,
+        seed=args.seed
+    )
+
+
+def from_options(options: str = "", seed: Optional[int] = None, port: int = 0) -> MockServer:
+    """Build a server from a mock_server.py option string, e.g. "--error-429 0.05 --token-rate 100"."""
+    parser = argparse.ArgumentParser(prog="mock", add_help=False)
+    add_arguments(parser)
+    args = parser.parse_args(shlex.split(options or ""))
+    if args.seed is None:
+        args.seed = seed
+    return from_arguments(args, port=port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspectallama mock Llama API and search server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+    try:
+        server = from_arguments(args, args.host, args.port).start()
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"🦙 Mock server on {server.base_url}")
+    print(f"   export LLAMA_API_BASE_URL={server.llama_url}")
+    print(f"   export INSPECTALLAMA_SEARCH_URL={server.search_url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📊 {dict(server.stats)}")
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
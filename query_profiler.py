@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Query Profiler for Inspectallama
+Per-query cProfile stats and coroutine-aware wall-clock stack sampling
+"""
+
+import asyncio
+import collections
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Callable, Counter, List, Optional, Tuple
+
+_ASYNCIO_DIR = os.path.join(os.path.dirname(os.path.realpath(asyncio.__file__)), "")
+
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> List:
+    """Frames of a thread, outermost first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+class StackSampler:
+    """Wall-clock sampler over an event loop, its suspended tasks and its executor threads.
+
+    Every ``interval`` seconds a background thread records, as collapsed
+    stacks:
+
+    * ``loop;...`` - what the loop thread is running, when it is not idle
+      in ``select``;
+    * ``task;...`` - the await chain of every suspended task, ending in what
+      it waits for (another task, an executor job, a timer), so time spent
+      waiting on I/O is charged to the coroutine that awaits it;
+    * ``executor;...`` - busy ``run_in_executor`` worker threads.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, loop_thread: threading.Thread,
+                 executor_prefix: str = "", interval: float = 0.005):
+        self.loop = loop
+        self.loop_thread = loop_thread
+        self.executor_prefix = executor_prefix
+        self.interval = interval
+        self.stacks: Counter[Tuple[str, ...]] = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="query-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def seconds(self, count: int) -> float:
+        return count * self.interval
+
+    def stop(self) -> Counter[Tuple[str, ...]]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except RuntimeError:
+                continue  # Task set changed mid-iteration; take the next sample
+            self.samples += 1
+
+    def _sample(self):
+        frames = sys._current_frames()
+        executors = [thread for thread in threading.enumerate()
+                     if self.executor_prefix and thread.name.startswith(self.executor_prefix)]
+        loop_frame = frames.get(self.loop_thread.ident)
+        if loop_frame is not None:
+            stack = self._loop_stack(_thread_stack(loop_frame))
+            if stack:
+                self.stacks[("loop",) + stack] += 1
+        for task in asyncio.all_tasks(self.loop):
+            stack = self._task_stack(task)
+            if stack:
+                self.stacks[("task",) + stack] += 1
+        for thread in executors:
+            frame = frames.get(thread.ident)
+            stack = self._executor_stack(_thread_stack(frame)) if frame is not None else ()
+            if stack:
+                self.stacks[("executor",) + stack] += 1
+        del frames, loop_frame
+
+    @staticmethod
+    def _loop_stack(frames) -> Tuple[str, ...]:
+        """Frames below asyncio's Handle._run; empty while the loop is idle."""
+        if frames and frames[-1].f_code.co_name == "select":
+            return ()
+        for index in range(len(frames) - 1, -1, -1):
+            code = frames[index].f_code
+            if code.co_name == "_run" and code.co_filename.startswith(_ASYNCIO_DIR):
+                return tuple(_label(frame.f_code) for frame in frames[index + 1:]
+                             if not frame.f_code.co_filename.startswith(_ASYNCIO_DIR))
+        return ()
+
+    @staticmethod
+    def _task_stack(task: asyncio.Task) -> Tuple[str, ...]:
+        """Await chain of a suspended task plus what it is waiting on."""
+        coro = task.get_coro()
+        if task.done() or getattr(coro, "cr_running", False):
+            return ()  # The running task already shows up in the loop thread's stack
+        labels = []
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            if not frame.f_code.co_filename.startswith(_ASYNCIO_DIR):
+                labels.append(_label(frame.f_code))
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        waiter = getattr(task, "_fut_waiter", None)
+        if isinstance(waiter, asyncio.Task):
+            inner = waiter.get_coro()
+            labels.append(f"<await task {getattr(inner, '__qualname__', type(inner).__name__)}>")
+        elif waiter is not None:
+            labels.append(f"<await {type(waiter).__name__}>")
+        elif labels:
+            labels.append("<ready>")  # Runnable, queued behind other callbacks
+        return tuple(labels)
+
+    @staticmethod
+    def _executor_stack(frames) -> Tuple[str, ...]:
+        """Frames of the job a worker thread is running; empty while it waits for work."""
+        for index, frame in enumerate(frames):
+            code = frame.f_code
+            if code.co_name == "run" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py")):
+                return tuple(_label(frame.f_code) for frame in frames[index + 1:])
+        return ()
+
+
+class QueryProfiler:
+    """Profile whole queries: cProfile on the loop thread plus a StackSampler.
+
+    For each profiled query, ``<stamp>-<query id>.pstats`` (open with
+    ``python -m pstats`` or snakeviz) and ``.collapsed`` (flamegraph.pl,
+    speedscope) are written to ``directory`` and the hottest functions are
+    passed to ``report``. Only one query is profiled at a time; queries that
+    overlap a running profile are reported as skipped. Both cProfile and the
+    sampler see the whole loop thread, so a profile also contains the work
+    of those overlapping queries, and its summary says how many there were.
+    """
+
+    TOP_FUNCTIONS = 8
+
+    def __init__(self, directory: Optional[str], executor_prefix: str = "", report: Callable[[str], None] = print):
+        self.directory = directory
+        self.executor_prefix = executor_prefix
+        self.report = report
+        self._active: Optional[str] = None
+        self._overlapped = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    @contextlib.contextmanager
+    def profile(self, query_id: str, query: str = ""):
+        """Profile the enclosed block; enter it from a coroutine on the loop to profile."""
+        if not self.enabled:
+            yield None
+            return
+        if self._active is not None:
+            self._overlapped += 1
+            self.report(f"🔬 Not profiling {query_id}: {self._active} is being profiled and will include its work")
+            yield None
+            return
+        self._active = query_id
+        self._overlapped = 0
+        sampler = StackSampler(asyncio.get_running_loop(), threading.current_thread(), self.executor_prefix).start()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield profile
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - started
+            sampler.stop()
+            overlapped, self._active = self._overlapped, None
+            try:
+                self._write(query_id, query, profile, sampler, wall, overlapped)
+            except OSError as e:
+                self.report(f"❌ Profile write error: {e}")
+
+    def _write(self, query_id, query, profile, sampler, wall, overlapped=0):
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{query_id}")
+        profile.dump_stats(base + ".pstats")
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(";".join(frame.replace(";", ",") for frame in stack) + f" {count}\n")
+        self.report(self.summarize(query, profile, sampler, wall, base, overlapped))
+
+    def summarize(self, query, profile, sampler, wall, base, overlapped=0) -> str:
+        """Top functions by sampled wall-clock self time and by cProfile own time."""
+        lines = [f"🔬 Profile for '{query[:40]}': {wall:.2f}s wall, {sampler.samples} samples "
+                 f"-> {base}.pstats / .collapsed"]
+        if overlapped:
+            lines.append(f"   ⚠️ {overlapped} other quer{'y' if overlapped == 1 else 'ies'} started on the loop "
+                         f"meanwhile; the stats below include their work")
+        leaves: Counter[str] = collections.Counter()
+        for stack, count in sampler.stacks.items():
+            # A task's leaf is what it awaits; name it together with the awaiting coroutine
+            leaf = " ".join(stack[-2:]) if stack[-1].startswith("<") and len(stack) > 2 else stack[-1]
+            leaves[f"[{stack[0]}] {leaf}"] += count
+        if leaves:
+            lines.append("   Wall clock (self time summed over loop, tasks and executor threads):")
+            for label, count in leaves.most_common(self.TOP_FUNCTIONS):
+                lines.append(f"   {sampler.seconds(count):7.3f}s  {label}")
+        # Time the loop spent idle in select/poll is not a hot spot
+        stats = {key: value for key, value in pstats.Stats(profile).stats.items()
+                 if not (key[0] == "~" and "select" in key[2]) and not key[0].endswith("selectors.py")}
+        hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.TOP_FUNCTIONS]
+        if hottest:
+            lines.append("   Loop thread CPU (cProfile own time / cumulative; includes any concurrent queries):")
+            for (filename, lineno, name), (_, calls, own, cumulative, _) in hottest:
+                lines.append(f"   {own:7.3f}s {cumulative:7.3f}s {calls:>7}  {name} ({os.path.basename(filename)}:{lineno})")
+        return "\n".join(lines)
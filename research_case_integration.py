@@ -130,6 +130,10 @@ class ResearchCaseIntegration:
             "status": "active"
         }
 
+        # Each case gets a fresh case budget
+        if hasattr(self.main_app, 'budget'):
+            self.main_app.budget.reset_scope('case')
+
         # Auto-categorize existing Goose items
         self.auto_categorize_goose_items()
 
@@ -215,8 +219,8 @@ class ResearchCaseIntegration:
                 query = strategy.format(topic=base_topic)
                 self.main_app.cli_print(f"🔍 Searching: {query}")
 
-                # Add to message queue for processing
-                self.main_app.message_queue.put(('command', query))
+                # Run on the app's event loop (auto-searches don't supersede, and user searches don't cancel them)
+                self.main_app.submit_search(query, supersede=False, origin='case')
 
                 # Wait between searches to avoid overwhelming
                 threading.Event().wait(2)
@@ -436,19 +440,6 @@ def integrate_research_cases(web_search_gui):
 
     web_search_gui.add_to_goose = enhanced_add_to_goose
 
-    # Add case building button to result cards
-    original_create_result_card = web_search_gui.create_result_card
-
-    def enhanced_create_result_card(index, result):
-        # Call original method
-        original_create_result_card(index, result)
-
-        # Could add case-specific buttons here
-        # This would require modifying the card creation
-        pass
-
-    web_search_gui.create_result_card = enhanced_create_result_card
-
     web_search_gui.cli_print("🔬 Research case building integration loaded!")
     web_search_gui.cli_print("📋 Use the 'Cases' tab to create and manage research cases")
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Result Ranker for Inspectallama
+Cheap local relevance ranking of web results before LLM summarization
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in",
+    "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "with"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [tok for tok in TOKEN_PATTERN.findall((text or "").lower()) if tok not in STOPWORDS]
+
+
+def result_domain(url: str) -> str:
+    """Return the host of a result URL without a leading www."""
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "http://" + url
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainHistory:
+    """Remember which domains the user found useful across searches"""
+
+    def __init__(self, max_domains: int = 500):
+        self.max_domains = max_domains
+        self.scores: Dict[str, float] = {}
+
+    def record(self, url: str, weight: float = 1.0):
+        """Credit the domain of a result the user engaged with."""
+        domain = result_domain(url)
+        if not domain:
+            return
+        self.scores[domain] = self.scores.get(domain, 0.0) + weight
+        if len(self.scores) > self.max_domains:
+            # Drop the least useful domain to keep the table bounded
+            weakest = min(self.scores, key=self.scores.get)
+            del self.scores[weakest]
+
+    def boost(self, url: str) -> float:
+        """Log-damped boost for a URL's domain (0 for unknown domains)."""
+        return math.log1p(self.scores.get(result_domain(url), 0.0))
+
+
+class BM25Ranker:
+    """BM25 over title + snippet, scored against the result set as the corpus"""
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        title_weight: int = 2,
+        domain_history: Optional[DomainHistory] = None,
+        domain_weight: float = 0.5
+    ):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.domain_history = domain_history
+        self.domain_weight = domain_weight
+
+    def _document_terms(self, result: dict) -> List[str]:
+        title = result.get('title') or ''
+        snippet = result.get('body') or result.get('snippet') or ''
+        # Repeat title terms so a title hit outweighs a snippet hit
+        return tokenize(title) * self.title_weight + tokenize(snippet)
+
+    def score(self, query: str, results: List[dict]) -> List[float]:
+        """Return a relevance score for every result, in input order."""
+        query_terms = set(tokenize(query))
+        documents = [Counter(self._document_terms(result)) for result in results]
+        if not documents:
+            return []
+
+        lengths = [sum(doc.values()) for doc in documents]
+        avg_length = (sum(lengths) / len(lengths)) or 1.0
+        doc_freq = Counter(term for doc in documents for term in query_terms if term in doc)
+        total_docs = len(documents)
+
+        scores = []
+        for result, doc, length in zip(results, documents, lengths):
+            score = 0.0
+            for term in query_terms:
+                freq = doc.get(term, 0)
+                if not freq:
+                    continue
+                idf = math.log(1 + (total_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                norm = freq + self.k1 * (1 - self.b + self.b * length / avg_length)
+                score += idf * freq * (self.k1 + 1) / norm
+            if self.domain_history:
+                score += self.domain_weight * self.domain_history.boost(
+                    result.get('href') or result.get('url') or ''
+                )
+            scores.append(score)
+        return scores
+
+    def rank(self, query: str, results: List[dict]) -> List[Tuple[int, float]]:
+        """Return (original_index, score) pairs, best first.
+
+        Ties keep the search engine's order, so a query with no lexical
+        overlap degrades to the original DuckDuckGo ranking.
+        """
+        scores = self.score(query, results)
+        return sorted(enumerate(scores), key=lambda pair: (-pair[1], pair[0]))
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Result View for Inspectallama
+Virtualized search result list that only materializes the cards in the viewport
+"""
+
+import math
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional
+
+CARD_HEIGHT = 210
+CARD_GAP = 8
+# Extra cards kept bound above and below the viewport for smooth scrolling
+OVERSCAN = 2
+
+
+class ResultCard:
+    """One recyclable result card; rebinding swaps its contents in place"""
+
+    def __init__(self, view: "VirtualResultList"):
+        self.view = view
+        self.index = None
+        self.result = None
+
+        canvas = view.canvas
+        self.frame = ttk.Frame(canvas, relief='raised', borderwidth=1)
+        self.window_id = canvas.create_window(0, -CARD_HEIGHT, anchor='nw', window=self.frame,
+                                              height=CARD_HEIGHT - CARD_GAP)
+
+        # Header frame
+        header_frame = ttk.Frame(self.frame)
+        header_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.index_label = ttk.Label(header_frame, font=('Segoe UI', 12, 'bold'), foreground='#0078d4')
+        self.index_label.pack(side=tk.LEFT)
+        self.title_label = ttk.Label(header_frame, font=('Segoe UI', 11, 'bold'))
+        self.title_label.pack(side=tk.LEFT, padx=(5, 0))
+
+        # URL label
+        self.url_label = ttk.Label(self.frame, font=('Segoe UI', 9), foreground='#0078d4', cursor='hand2')
+        self.url_label.pack(fill=tk.X, padx=10, pady=2)
+        self.url_label.bind("<Button-1>", lambda e: self.result and self.view.on_open(self.result))
+
+        # Summary (cards have a fixed height, so long summaries scroll)
+        summary_frame = ttk.Frame(self.frame)
+        summary_frame.pack(fill=tk.X, padx=10, pady=5)
+        summary_scroll = ttk.Scrollbar(summary_frame, orient=tk.VERTICAL)
+        summary_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.summary_text = tk.Text(summary_frame, height=4, width=80, font=('Segoe UI', 10),
+                                    wrap=tk.WORD, bg='#f8f9fa', state=tk.DISABLED,
+                                    yscrollcommand=summary_scroll.set)
+        self.summary_text.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        summary_scroll.config(command=self.summary_text.yview)
+        self.summary_text.bind("<Button-1>", lambda e: self._summarize_if_pending())
+
+        # Actions frame
+        actions_frame = ttk.Frame(self.frame)
+        actions_frame.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Button(actions_frame, text="🔎 Drill Down",
+                   command=lambda: self.result and self.view.on_drill(self.result)).pack(side=tk.LEFT, padx=(0, 5))
+
+        self.summarize_btn = ttk.Button(actions_frame, text="🧠 Summarize", command=self._summarize_if_pending)
+
+        goose_frame = ttk.Frame(actions_frame)
+        goose_frame.pack(side=tk.LEFT, padx=(5, 0))
+        self.category_var = tk.StringVar(value="General")
+        self.category_var.trace_add('write', lambda *_: self._remember_category())
+        ttk.Combobox(goose_frame, textvariable=self.category_var, values=view.goose_categories,
+                     state="readonly", width=10).pack(side=tk.LEFT)
+        ttk.Button(goose_frame, text="🪿 Add to Goose",
+                   command=lambda: self.result and self.view.on_goose(self.result, self.category_var.get())
+                   ).pack(side=tk.LEFT, padx=(2, 0))
+
+        self.goose_frame = goose_frame
+        if view.on_case is not None:
+            ttk.Button(actions_frame, text="📁 Add to Case",
+                       command=lambda: self.result and self.view.on_case(self.index, self.result, self.category_var.get())
+                       ).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.copy_btn = ttk.Button(actions_frame, text="📋 Copy URL",
+                                   command=lambda: self.result and self.view.on_copy(self.result.get('url', '')))
+        self.copy_btn.pack(side=tk.RIGHT)
+        self._binding = False
+
+    def bind(self, index: int, result: dict):
+        """Show ``result`` (1-based ``index``) in this card."""
+        self.index = index
+        self.result = result
+        self._binding = True
+        self.index_label.config(text=f"{index}.")
+        self.title_label.config(text=result.get('title', 'No Title'))
+        url_text = result.get('url', '')
+        self.url_label.config(text=f"🔗 {url_text}" if url_text else "")
+        self.set_summary(result.get('summary', 'No summary available'))
+        if result.get('summary_pending'):
+            self.summarize_btn.pack(side=tk.LEFT, padx=(0, 5), before=self.goose_frame)
+        else:
+            self.summarize_btn.pack_forget()
+        self.copy_btn.config(state=tk.NORMAL if url_text else tk.DISABLED)
+        self.category_var.set(self.view.categories.get(index, "General"))
+        self._binding = False
+        self.view.canvas.coords(self.window_id, 0, (index - 1) * CARD_HEIGHT)
+
+    def set_summary(self, summary: str):
+        self.summary_text.config(state=tk.NORMAL)
+        self.summary_text.delete(1.0, tk.END)
+        self.summary_text.insert(tk.END, summary)
+        self.summary_text.yview_moveto(0.0)  # A recycled card starts at the top of its new summary
+        self.summary_text.config(state=tk.DISABLED)
+
+    def hide(self):
+        self.index = None
+        self.result = None
+        self.view.canvas.coords(self.window_id, 0, -CARD_HEIGHT)
+
+    def _remember_category(self):
+        if not self._binding and self.index is not None:
+            self.view.categories[self.index] = self.category_var.get()
+
+    def _summarize_if_pending(self):
+        if self.result and self.result.get('summary_pending'):
+            self.view.on_summarize(self.result)
+
+
+class VirtualResultList:
+    """Scrollable result list backed by a small pool of recycled cards.
+
+    Only the cards intersecting the viewport (plus a little overscan) exist
+    as widgets; scrolling rebinds pooled cards to new results instead of
+    creating or destroying anything, so 50 results cost the same as 5.
+    """
+
+    def __init__(
+        self,
+        parent,
+        goose_categories: List[str],
+        on_open: Callable[[dict], None],
+        on_copy: Callable[[str], None],
+        on_drill: Callable[[dict], None],
+        on_goose: Callable[[dict, str], None],
+        on_summarize: Callable[[dict], None],
+        on_case: Optional[Callable[[int, dict, str], None]] = None,
+        on_visible: Optional[Callable[[List[dict]], None]] = None
+    ):
+        self.goose_categories = goose_categories
+        self.on_open = on_open
+        self.on_copy = on_copy
+        self.on_drill = on_drill
+        self.on_goose = on_goose
+        self.on_summarize = on_summarize
+        self.on_case = on_case
+        self.on_visible = on_visible
+
+        self.results: List[dict] = []
+        self.categories: Dict[int, str] = {}
+        self.pool: List[ResultCard] = []
+        self.bound: Dict[int, ResultCard] = {}
+        self._visible_check_id = None
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(self.frame, bg='#f0f0f0', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.empty_id = self.canvas.create_text(20, 20, anchor='nw', text="", fill='red',
+                                                font=('Segoe UI', 10))
+        self.canvas.bind("<Configure>", self._on_resize)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_results(self, results: List[dict], yview: float = 0.0, categories: Optional[Dict[int, str]] = None):
+        """Replace the list contents and scroll to ``yview`` (a 0-1 fraction)."""
+        self.results = results
+        self.categories = dict(categories or {})
+        for card in self.bound.values():
+            card.hide()
+        self.bound = {}
+        self.canvas.itemconfig(self.empty_id, text="" if results else "No results found. Try another search.")
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), max(len(results) * CARD_HEIGHT, 1)))
+        self.canvas.yview_moveto(yview)
+        self.render()
+
+    def refresh(self, result: dict):
+        """Re-render the card showing ``result``, if it is on screen."""
+        for card in self.bound.values():
+            if card.result is result:
+                card.bind(card.index, result)
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.render()
+
+    def scroll(self, units: int):
+        self.canvas.yview_scroll(units, "units")
+        self.render()
+
+    def top_fraction(self) -> float:
+        return self.canvas.yview()[0]
+
+    def visible_range(self):
+        """0-based [first, last) result indices to keep materialized."""
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), CARD_HEIGHT)
+        first = max(int(top // CARD_HEIGHT) - OVERSCAN, 0)
+        last = min(int(math.ceil(bottom / CARD_HEIGHT)) + OVERSCAN, len(self.results))
+        return first, last
+
+    def render(self):
+        """Bind pooled cards to the results around the viewport."""
+        first, last = self.visible_range()
+        wanted = set(range(first + 1, last + 1))
+
+        # Release cards that scrolled out of range
+        for index in list(self.bound):
+            if index not in wanted:
+                self.bound.pop(index).hide()
+
+        free = [card for card in self.pool if card.index is None]
+        for index in sorted(wanted - set(self.bound)):
+            card = free.pop() if free else self._new_card()
+            card.bind(index, self.results[index - 1])
+            self.bound[index] = card
+        self._schedule_visible_check()
+
+    def _new_card(self) -> ResultCard:
+        card = ResultCard(self)
+        width = self.canvas.winfo_width()
+        self.canvas.itemconfig(card.window_id, width=width)
+        card.title_label.config(wraplength=max(width - 80, 100))
+        self.pool.append(card)
+        return card
+
+    def _on_resize(self, event):
+        for card in self.pool:
+            self.canvas.itemconfig(card.window_id, width=event.width)
+            card.title_label.config(wraplength=max(event.width - 80, 100))
+        self.canvas.configure(scrollregion=(0, 0, event.width, max(len(self.results) * CARD_HEIGHT, 1)))
+        self.render()
+
+    def _schedule_visible_check(self):
+        """Report on-screen results once scrolling settles (drives lazy summaries)."""
+        if self.on_visible is None:
+            return
+        if self._visible_check_id:
+            self.canvas.after_cancel(self._visible_check_id)
+        self._visible_check_id = self.canvas.after(200, self._report_visible)
+
+    def _report_visible(self):
+        self._visible_check_id = None
+        if not self.frame.winfo_ismapped():
+            return  # Stashed history page
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first = int(top // CARD_HEIGHT)
+        last = min(int(math.ceil(bottom / CARD_HEIGHT)), len(self.results))
+        self.on_visible(self.results[first:last])
+
+
+class ResultPageStack:
+    """Rendered result pages kept alive for recent history states.
+
+    The active page is the visible VirtualResultList. When a history state
+    is saved its page is tagged; the next new result set stashes the tagged
+    page (hidden, with its cards, categories and scroll position intact)
+    instead of rebinding over it, so going back is a pack swap rather than
+    a re-render. At most ``max_pages`` hidden pages are kept; older states
+    are restored from their saved model by the caller.
+    """
+
+    def __init__(self, factory: Callable[[], VirtualResultList], max_pages: int = 3):
+        self.factory = factory
+        self.max_pages = max_pages
+        self.hidden: "OrderedDict[int, VirtualResultList]" = OrderedDict()
+        self.spare: Optional[VirtualResultList] = None
+        self.active = factory()
+        self.active_tag: Optional[int] = None
+        self._pack_options = {}
+
+    def pack(self, **kwargs):
+        self._pack_options = kwargs
+        self.active.pack(**kwargs)
+
+    def tag_active(self, tag: int):
+        """Mark the active page as the rendering of history state ``tag``."""
+        self.active_tag = tag
+
+    def show_results(self, results: List[dict], yview: float = 0.0, categories: Optional[Dict[int, str]] = None):
+        """Show a new result set, stashing the active page if it belongs to a history state."""
+        if self.active_tag is not None and self.active.results is not results:
+            self.hidden[self.active_tag] = self.active
+            self.hidden.move_to_end(self.active_tag)
+            self._swap_in(self._take_page())
+            while len(self.hidden) > self.max_pages:
+                _, evicted = self.hidden.popitem(last=False)
+                self._release(evicted)
+        self.active_tag = None
+        self.active.set_results(results, yview, categories)
+
+    def restore(self, tag: int) -> bool:
+        """Swap the stashed page for ``tag`` back in; False if it was evicted."""
+        if tag == self.active_tag:
+            # Went back before the next result set replaced it
+            self.active_tag = None
+            return True
+        page = self.hidden.pop(tag, None)
+        if page is None:
+            return False
+        previous = self.active
+        self._swap_in(page)
+        self._release(previous)
+        self.active_tag = None
+        return True
+
+    def discard(self, tag: int):
+        """Drop the stashed page for a history state that no longer exists."""
+        page = self.hidden.pop(tag, None)
+        if page is not None:
+            self._release(page)
+
+    def refresh(self, result: dict):
+        """Re-render ``result`` on whichever pages show it."""
+        self.active.refresh(result)
+        for page in self.hidden.values():
+            page.refresh(result)
+
+    def _take_page(self) -> VirtualResultList:
+        page, self.spare = self.spare, None
+        return page or self.factory()
+
+    def _swap_in(self, page: VirtualResultList):
+        self.active.frame.pack_forget()
+        self.active = page
+        page.pack(**self._pack_options)
+
+    def _release(self, page: VirtualResultList):
+        page.frame.pack_forget()
+        if self.spare is None:
+            self.spare = page
+        else:
+            page.frame.destroy()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Session Budget for Inspectallama
+Token, cost, API-call and wall-clock budgets enforced at the API client layer
+"""
+
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from llama_api_client import BudgetExceededError
+
+# Smallest completion worth asking for once a budget is nearly spent
+MIN_COMPLETION_TOKENS = 32
+
+# Degradation levels reported by SessionBudget.level()
+LEVEL_NORMAL = 0
+LEVEL_REDUCED = 1
+LEVEL_MINIMAL = 2
+LEVEL_EXHAUSTED = 3
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "normal",
+    LEVEL_REDUCED: "reduced",
+    LEVEL_MINIMAL: "minimal",
+    LEVEL_EXHAUSTED: "exhausted"
+}
+
+# Query budget of the current task; tasks a query spawns inherit it
+current_query_scope: contextvars.ContextVar = contextvars.ContextVar("inspectallama_query_scope", default=None)
+
+
+class BudgetLimits:
+    """Caps for one budget scope; None means unlimited"""
+
+    FIELDS = ("tokens", "dollars", "calls", "seconds")
+
+    def __init__(self, tokens=None, dollars=None, calls=None, seconds=None):
+        self.tokens = tokens
+        self.dollars = dollars
+        self.calls = calls
+        self.seconds = seconds
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> "BudgetLimits":
+        """Parse "tokens=200000,dollars=5,calls=500,seconds=3600"."""
+        limits = cls()
+        if not spec:
+            return limits
+        for part in spec.split(","):
+            if not part.strip():
+                continue
+            key, _, value = part.partition("=")
+            key = key.strip().lower()
+            if key not in cls.FIELDS:
+                raise ValueError(f"Unknown budget field '{key}' (expected one of {', '.join(cls.FIELDS)})")
+            number = float(value)
+            setattr(limits, key, int(number) if key in ("tokens", "calls") else number)
+        return limits
+
+    def is_unlimited(self) -> bool:
+        return all(getattr(self, field) is None for field in self.FIELDS)
+
+    def __repr__(self):
+        parts = [f"{field}={getattr(self, field)}" for field in self.FIELDS if getattr(self, field) is not None]
+        return f"BudgetLimits({', '.join(parts) or 'unlimited'})"
+
+
+class BudgetScope:
+    """Usage counted against one set of limits (session, query or case)"""
+
+    def __init__(self, name: str, limits: BudgetLimits):
+        self.name = name
+        self.limits = limits
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.tokens = 0
+        self.dollars = 0.0
+        self.calls = 0
+        # Outstanding reservations for in-flight requests
+        self.reserved_tokens = 0
+        self.reserved_dollars = 0.0
+        self.reserved_calls = 0
+
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    def remaining(self) -> Dict[str, Optional[float]]:
+        """Remaining headroom per dimension (None when unlimited)."""
+        limits = self.limits
+        return {
+            "tokens": None if limits.tokens is None else max(limits.tokens - self.tokens - self.reserved_tokens, 0),
+            "dollars": None if limits.dollars is None else max(limits.dollars - self.dollars - self.reserved_dollars, 0.0),
+            "calls": None if limits.calls is None else max(limits.calls - self.calls - self.reserved_calls, 0),
+            "seconds": None if limits.seconds is None else max(limits.seconds - self.elapsed(), 0.0)
+        }
+
+    def fraction_used(self) -> float:
+        """Largest fraction of any limit spent so far (0.0 - 1.0)."""
+        limits = self.limits
+        fractions = [0.0]
+        if limits.tokens:
+            fractions.append((self.tokens + self.reserved_tokens) / limits.tokens)
+        if limits.dollars:
+            fractions.append((self.dollars + self.reserved_dollars) / limits.dollars)
+        if limits.calls:
+            fractions.append((self.calls + self.reserved_calls) / limits.calls)
+        if limits.seconds:
+            fractions.append(self.elapsed() / limits.seconds)
+        return min(max(fractions), 1.0)
+
+
+class BudgetTicket:
+    """Reservation handed out by SessionBudget.admit for one API call"""
+
+    def __init__(self, tokens: int, dollars: float, scopes: List[BudgetScope]):
+        self.tokens = tokens
+        self.dollars = dollars
+        # Scopes charged by this call, fixed at admission
+        self.scopes = scopes
+
+
+class SessionBudget:
+    """Central budget shared by every Llama API call.
+
+    Each call is admitted against all active scopes before it is sent,
+    reserving its worst-case tokens and cost so concurrent calls cannot
+    overshoot a limit together, and settled with the real usage afterwards.
+    As budgets are spent the pipeline degrades: ``level()`` drives fewer
+    eager summaries and shorter completions, and once a scope is exhausted
+    ``admit`` raises ``BudgetExceededError`` so callers fall back to
+    extractive summaries.
+
+    Session and case scopes are shared. Each query gets its own query scope
+    from ``start_query``, carried in ``current_query_scope`` so overlapping
+    queries never spend each other's budget; calls made outside any query
+    (on-demand summaries) count against the most recent one.
+    """
+
+    def __init__(
+        self,
+        session: Optional[BudgetLimits] = None,
+        query: Optional[BudgetLimits] = None,
+        case: Optional[BudgetLimits] = None,
+        cost_per_token_sent: float = 0.0001,
+        cost_per_token_received: float = 0.0002
+    ):
+        self.cost_per_token_sent = cost_per_token_sent
+        self.cost_per_token_received = cost_per_token_received
+        self.query_limits = query or BudgetLimits()
+        self.scopes = {
+            "session": BudgetScope("session", session or BudgetLimits()),
+            "case": BudgetScope("case", case or BudgetLimits())
+        }
+        self.last_query_scope: Optional[BudgetScope] = None
+        self.rejected_calls = 0
+        self._lock = threading.Lock()
+
+    def start_query(self) -> BudgetScope:
+        """Give the calling task, and the tasks it spawns, a fresh query budget."""
+        scope = BudgetScope("query", self.query_limits)
+        current_query_scope.set(scope)
+        self.last_query_scope = scope
+        return scope
+
+    def reset_scope(self, name: str):
+        """Start a fresh case budget."""
+        with self._lock:
+            self.scopes[name].reset()
+
+    def current_scopes(self) -> List[BudgetScope]:
+        """Session and case scopes plus the current task's query scope."""
+        scopes = list(self.scopes.values())
+        query = current_query_scope.get() or self.last_query_scope
+        if query is not None:
+            scopes.append(query)
+        return scopes
+
+    def active_scopes(self) -> List[BudgetScope]:
+        return [scope for scope in self.current_scopes() if not scope.limits.is_unlimited()]
+
+    def pressure(self) -> float:
+        """Fraction of the tightest budget already spent."""
+        return max((scope.fraction_used() for scope in self.active_scopes()), default=0.0)
+
+    def exhausted_scope(self) -> Optional[BudgetScope]:
+        for scope in self.active_scopes():
+            remaining = scope.remaining()
+            if (remaining["tokens"] is not None and remaining["tokens"] < MIN_COMPLETION_TOKENS) or \
+                    remaining["dollars"] == 0 or remaining["calls"] == 0 or remaining["seconds"] == 0:
+                return scope
+        return None
+
+    def level(self) -> int:
+        """Current degradation level."""
+        if self.exhausted_scope() is not None:
+            return LEVEL_EXHAUSTED
+        pressure = self.pressure()
+        if pressure >= 0.8:
+            return LEVEL_MINIMAL
+        if pressure >= 0.5:
+            return LEVEL_REDUCED
+        return LEVEL_NORMAL
+
+    def scale(self, amount: int, minimum: int = 1) -> int:
+        """Scale a work amount (eager summaries, max tokens) to the current level."""
+        level = self.level()
+        if level == LEVEL_EXHAUSTED:
+            return 0
+        factor = {LEVEL_NORMAL: 1.0, LEVEL_REDUCED: 0.5, LEVEL_MINIMAL: 0.25}[level]
+        return max(int(amount * factor), min(minimum, amount))
+
+    def admit(self, prompt_tokens: int, max_tokens: int) -> Tuple[BudgetTicket, int]:
+        """Reserve budget for one call and return (ticket, allowed max_tokens).
+
+        Raises BudgetExceededError when any active scope cannot afford the
+        prompt plus a minimal completion.
+        """
+        with self._lock:
+            allowed = max_tokens
+            level = self.level()
+            if level >= LEVEL_MINIMAL:
+                allowed = max(max_tokens // 4, MIN_COMPLETION_TOKENS)
+            elif level == LEVEL_REDUCED:
+                allowed = max(max_tokens // 2, MIN_COMPLETION_TOKENS)
+
+            scopes = self.current_scopes()
+            for scope in scopes:
+                if scope.limits.is_unlimited():
+                    continue
+                remaining = scope.remaining()
+                if remaining["calls"] == 0 or remaining["seconds"] == 0:
+                    self.rejected_calls += 1
+                    raise BudgetExceededError(f"{scope.name} budget exhausted")
+                if remaining["tokens"] is not None:
+                    allowed = min(allowed, int(remaining["tokens"]) - prompt_tokens)
+                if remaining["dollars"] is not None:
+                    affordable = (remaining["dollars"] - prompt_tokens * self.cost_per_token_sent) / self.cost_per_token_received
+                    allowed = min(allowed, int(affordable))
+                if allowed < MIN_COMPLETION_TOKENS:
+                    self.rejected_calls += 1
+                    raise BudgetExceededError(f"{scope.name} budget exhausted")
+
+            ticket = BudgetTicket(
+                tokens=prompt_tokens + allowed,
+                dollars=prompt_tokens * self.cost_per_token_sent + allowed * self.cost_per_token_received,
+                scopes=scopes
+            )
+            for scope in scopes:
+                if scope.limits.is_unlimited():
+                    continue
+                scope.reserved_tokens += ticket.tokens
+                scope.reserved_dollars += ticket.dollars
+                scope.reserved_calls += 1
+            return ticket, allowed
+
+    def settle(self, ticket: Optional[BudgetTicket], prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Release a reservation and charge the real usage to every scope."""
+        cost = prompt_tokens * self.cost_per_token_sent + completion_tokens * self.cost_per_token_received
+        with self._lock:
+            for scope in (ticket.scopes if ticket is not None else self.current_scopes()):
+                if ticket is not None and not scope.limits.is_unlimited():
+                    scope.reserved_tokens = max(scope.reserved_tokens - ticket.tokens, 0)
+                    scope.reserved_dollars = max(scope.reserved_dollars - ticket.dollars, 0.0)
+                    scope.reserved_calls = max(scope.reserved_calls - 1, 0)
+                scope.tokens += prompt_tokens + completion_tokens
+                scope.dollars += cost
+                scope.calls += 1
+
+    def describe(self) -> List[str]:
+        """One line per active scope for the metrics pane."""
+        lines = []
+        for scope in self.active_scopes():
+            remaining = scope.remaining()
+            parts = []
+            if remaining["tokens"] is not None:
+                parts.append(f"{remaining['tokens']:,} tok")
+            if remaining["dollars"] is not None:
+                parts.append(f"${remaining['dollars']:.2f}")
+            if remaining["calls"] is not None:
+                parts.append(f"{remaining['calls']} calls")
+            if remaining["seconds"] is not None:
+                parts.append(f"{remaining['seconds']:.0f}s")
+            lines.append(f"{scope.name.title()}: {' | '.join(parts)} left ({scope.fraction_used() * 100:.0f}% used)")
+        return lines
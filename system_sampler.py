@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+System Sampler for Inspectallama
+Process CPU, memory, thread, socket and event-loop lag sampling on a background thread
+"""
+
+import threading
+from array import array
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+EMPTY_SAMPLE = {
+    'cpu_percent': 0,
+    'memory_mb': 0,
+    'memory_percent': 0,
+    'threads': 0,
+    'sockets': 0,
+    'loop_lag_ms': 0
+}
+
+# Series recorded into ring buffers, in display order
+SERIES = ('cpu_percent', 'memory_mb', 'threads', 'sockets', 'loop_lag_ms')
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: List[float], low: Optional[float] = None, high: Optional[float] = None) -> str:
+    """Render values as a one-line unicode sparkline."""
+    if not values:
+        return ""
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    span = high - low
+    if span <= 0:
+        return SPARK_CHARS[0] * len(values)
+    top = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[min(max(int((value - low) / span * top + 0.5), 0), top)] for value in values)
+
+
+class RingBuffer:
+    """Fixed-size float time series; the oldest sample is overwritten when full"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data = array('d', [0.0] * size)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, value: float):
+        with self._lock:
+            self._data[self._next] = value
+            self._next = (self._next + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+
+    def values(self) -> List[float]:
+        """Samples oldest first."""
+        with self._lock:
+            if self._count < self.size:
+                return self._data[:self._count].tolist()
+            return (self._data[self._next:] + self._data[:self._next]).tolist()
+
+    def last(self) -> float:
+        with self._lock:
+            return self._data[(self._next - 1) % self.size] if self._count else 0.0
+
+    def max(self) -> float:
+        values = self.values()
+        return max(values) if values else 0.0
+
+    def __len__(self):
+        return self._count
+
+
+class SystemSampler:
+    """Sample the current process every ``interval`` seconds off the Tk thread.
+
+    One ``psutil.Process`` handle is kept for the sampler's lifetime, so
+    ``cpu_percent`` measures the interval between samples. Each sample is
+    appended to a ring buffer per series (``history`` samples long).
+    ``lag_source`` (e.g. ``LoopWatchdog.current_lag``) supplies the event
+    loop lag in seconds, so the loop is probed by one heartbeat only.
+    ``on_sample`` is called from the sampler thread with each new sample,
+    so it must be thread-safe.
+    """
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        on_sample: Optional[Callable[[Dict[str, float]], None]] = None,
+        lag_source: Optional[Callable[[], float]] = None,
+        history: int = 90
+    ):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.lag_source = lag_source
+        self.latest = dict(EMPTY_SAMPLE)
+        self.series = {name: RingBuffer(history) for name in SERIES}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SystemSampler":
+        if psutil is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        process = psutil.Process()
+        process.cpu_percent(None)  # Prime the CPU counter
+        while not self._stop.wait(self.interval):
+            try:
+                sample = self.sample(process)
+            except Exception:
+                continue
+            sample['loop_lag_ms'] = self.lag_source() * 1000 if self.lag_source is not None else 0.0
+            for name in SERIES:
+                self.series[name].append(sample[name])
+            self.latest = sample
+            if self.on_sample is not None:
+                self.on_sample(sample)
+
+    @staticmethod
+    def sample(process) -> Dict[str, float]:
+        with process.oneshot():
+            sample = {
+                'cpu_percent': process.cpu_percent(None),
+                'memory_mb': process.memory_info().rss / 1024 / 1024,
+                'memory_percent': process.memory_percent(),
+                'threads': process.num_threads(),
+                'sockets': 0
+            }
+        try:
+            connections = getattr(process, 'net_connections', None) or process.connections
+            sample['sockets'] = len(connections(kind='inet'))
+        except Exception:
+            pass  # Not permitted on some platforms
+        return sample
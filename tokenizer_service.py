@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tokenizer Service for Inspectallama
+Token counting backed by a lazily loaded, offline-cached tiktoken encoding
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".inspectallama", "tiktoken_cache")
+
+# Chat framing overhead per message and for priming the assistant reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Word-count heuristic used when no encoding is available."""
+    return int(len((text or "").split()) * 1.3)
+
+
+class TokenizerService:
+    """Count prompt and completion tokens without blocking the event loop.
+
+    The encoding is loaded on first use from ``cache_dir`` (tiktoken's
+    ``TIKTOKEN_CACHE_DIR``), so once the BPE file has been fetched a single
+    time the service works fully offline. If the encoding cannot be loaded
+    the service falls back to the word-count heuristic and reports
+    ``exact == False``.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base", cache_dir: Optional[str] = None):
+        self.encoding_name = encoding_name
+        self.cache_dir = cache_dir or os.getenv("TIKTOKEN_CACHE_DIR") or DEFAULT_CACHE_DIR
+        self._encoding = None
+        self._load_attempted = False
+        self._load_lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tokenizer")
+        self._pending: Dict[asyncio.AbstractEventLoop, list] = {}
+
+    @property
+    def exact(self) -> bool:
+        """True once a real encoding is loaded (never triggers the load itself)."""
+        return self._encoding is not None
+
+    def _get_encoding(self):
+        if self._load_attempted:
+            return self._encoding
+        with self._load_lock:
+            if not self._load_attempted:
+                self._encoding = self._load_encoding()
+                self._load_attempted = True
+        return self._encoding
+
+    def _load_encoding(self):
+        if tiktoken is None:
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # tiktoken reads the cache location from the environment
+            os.environ.setdefault("TIKTOKEN_CACHE_DIR", self.cache_dir)
+            return tiktoken.get_encoding(self.encoding_name)
+        except Exception:
+            return None
+
+    def preload(self):
+        """Load the encoding in the worker thread so the first query doesn't pay for it."""
+        self._worker.submit(self._get_encoding)
+
+    def count(self, text: str) -> int:
+        """Count tokens in a single string."""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text or "", disallowed_special=()))
+
+    def count_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for many strings in one encoder call."""
+        encoding = self._get_encoding()
+        if encoding is None:
+            return [estimate_tokens(text) for text in texts]
+        encoded = encoding.encode_batch([text or "" for text in texts], disallowed_special=())
+        return [len(tokens) for tokens in encoded]
+
+    @staticmethod
+    def message_text(messages: List[Dict[str, str]]) -> List[str]:
+        """Flatten chat messages into the strings that get tokenized."""
+        parts = []
+        for message in messages:
+            parts.append(message.get("role", ""))
+            parts.append(str(message.get("content", "")))
+        return parts
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """Count prompt tokens for a chat request, including framing overhead."""
+        counts = self.count_batch(self.message_text(messages))
+        return sum(counts) + TOKENS_PER_MESSAGE * len(messages) + TOKENS_PER_REPLY
+
+    async def count_async(self, text: str) -> int:
+        """Count tokens off the event loop.
+
+        Calls made in the same loop iteration are coalesced into a single
+        ``encode_batch`` call on the worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((text, future))
+        if len(pending) == 1:
+            loop.call_soon(self._flush, loop)
+        return await future
+
+    async def count_messages_async(self, messages: List[Dict[str, str]]) -> int:
+        """Async variant of ``count_messages``."""
+        counts = await asyncio.gather(*(self.count_async(text) for text in self.message_text(messages)))
+        return sum(counts) + TOKENS_PER_MESSAGE * len(messages) + TOKENS_PER_REPLY
+
+    def _flush(self, loop):
+        batch = self._pending.pop(loop, [])
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        batch_future = asyncio.wrap_future(self._worker.submit(self.count_batch, texts), loop=loop)
+
+        def deliver(done):
+            # A cancelled batch (worker shut down with cancel_futures) cancels every caller
+            cancelled = done.cancelled()
+            error = None if cancelled else done.exception()
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if cancelled:
+                    future.cancel()
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[index])
+
+        batch_future.add_done_callback(deliver)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Tracing for Inspectallama
+Lightweight per-stage spans exported as Chrome / Perfetto trace-event JSON
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+# (span id, lane, inherited args) of the innermost open span in this context
+_current_span: contextvars.ContextVar = contextvars.ContextVar("inspectallama_span", default=None)
+# perf_counter time a new HTTP connection finished setting up in this context
+_connection_ready: contextvars.ContextVar = contextvars.ContextVar("inspectallama_conn_ready", default=None)
+
+# Span args copied from a span to all of its children
+INHERITED_ARGS = ("query_id", "result_id")
+
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage; use as a context manager (works across awaits)"""
+
+    __slots__ = ("tracer", "name", "lane", "args", "span_id", "parent_id", "start", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, lane: Optional[str], args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        parent = _current_span.get()
+        self.parent_id = parent[0] if parent else None
+        inherited = dict(parent[2]) if parent else {}
+        inherited.update((key, args[key]) for key in INHERITED_ARGS if key in args)
+        self.lane = lane or (parent[1] if parent else None) or threading.current_thread().name
+        self.args = dict(inherited, **args)
+        self.span_id = next(tracer._ids)
+        self.start = 0.0
+        self._token = None
+
+    def set(self, **args):
+        """Attach more args (e.g. status, byte counts) before the span closes."""
+        self.args.update(args)
+
+    def __enter__(self):
+        inherited = {key: self.args[key] for key in INHERITED_ARGS if key in self.args}
+        self._token = _current_span.set((self.span_id, self.lane, inherited))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._emit(self.name, self.start, end, self.lane, self.args, self.span_id, self.parent_id)
+        return False
+
+
+class Tracer:
+    """Collect spans into a bounded buffer and export them for chrome://tracing or Perfetto.
+
+    Every concurrent chain (one result's fetch -> extract -> LLM) runs on its
+    own ``lane``, shown as a separate track, and child spans inherit the
+    lane plus ``query_id``/``result_id`` from their parent. While
+    ``enabled`` is False, ``span`` returns a shared no-op object, so
+    instrumented code pays one attribute check.
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = 200000, max_lanes: int = 5000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.max_lanes = max_lanes
+        self._ids = itertools.count(1)
+        # Lane name -> track id; the oldest lanes are forgotten like the oldest events
+        self._lanes: "OrderedDict[str, int]" = OrderedDict()
+        self._tids = itertools.count(1)
+        self._lanes_lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def span(self, name: str, lane: Optional[str] = None, **args):
+        """Open a span; ``lane`` starts a new track for this chain of work."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, lane, args)
+
+    def record(self, name: str, start: float, end: float, **args):
+        """Record an already-measured span (perf_counter start/end) under the current span."""
+        if not self.enabled:
+            return
+        parent = _current_span.get()
+        lane = parent[1] if parent else threading.current_thread().name
+        merged = dict(parent[2], **args) if parent else args
+        self._emit(name, start, end, lane, merged, next(self._ids), parent[0] if parent else None)
+
+    def run_in_executor(self, loop, fn, *args):
+        """``loop.run_in_executor`` that keeps the current span as the parent in the worker thread."""
+        if not self.enabled:
+            return loop.run_in_executor(None, fn, *args)
+        return loop.run_in_executor(None, contextvars.copy_context().run, fn, *args)
+
+    def _emit(self, name, start, end, lane, args, span_id, parent_id):
+        tid = self._lanes.get(lane)
+        if tid is None:
+            with self._lanes_lock:
+                tid = self._lanes.setdefault(lane, next(self._tids))
+                while len(self._lanes) > self.max_lanes:
+                    self._lanes.popitem(last=False)
+        event = {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": dict(args, span_id=span_id, parent_id=parent_id)
+        }
+        self.events.append(event)
+
+    def clear(self):
+        self.events.clear()
+        with self._lanes_lock:
+            self._lanes.clear()
+
+    def export(self, path: str, query_id: Optional[str] = None) -> int:
+        """Write trace-event JSON (optionally one query only); returns the number of spans."""
+        events = [event for event in list(self.events)
+                  if query_id is None or event["args"].get("query_id") == query_id]
+        lanes = {event["tid"] for event in events}
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": lane}}
+            for lane, tid in list(self._lanes.items()) if tid in lanes
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+# Process-wide tracer shared by the app, the API client and the HTTP adapters
+tracer = Tracer()
+
+
+# ===== HTTP PHASES =====
+class _TracedConnectionMixin:
+    """Record DNS and TCP connect spans while tracing is on"""
+
+    def _new_conn(self):
+        if not tracer.enabled:
+            return super()._new_conn()
+        # Resolve once and connect to that address, so the connect span holds no DNS time
+        dns_host = self._dns_host
+        started = time.perf_counter()
+        try:
+            address = socket.getaddrinfo(dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)[0][4][0]
+        except (OSError, IndexError):
+            address = None  # The connect below resolves again and reports the failure
+        resolved = time.perf_counter()
+        tracer.record("http.dns", started, resolved, host=self.host)
+        try:
+            if address is not None:
+                # Only the socket target changes; SNI and Host use self.host, restored below
+                self._dns_host = address
+            try:
+                return super()._new_conn()
+            except NewConnectionError:
+                if address is None:
+                    raise
+                self._dns_host = dns_host
+                return super()._new_conn()  # Try the host's other addresses (e.g. IPv4 after IPv6)
+        finally:
+            self._dns_host = dns_host
+            connected = time.perf_counter()
+            tracer.record("http.connect", resolved, connected, host=self.host)
+            _connection_ready.set(connected)
+
+
+class TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    """HTTPS connection that additionally records the TLS handshake"""
+
+    def connect(self):
+        if not tracer.enabled:
+            return super().connect()
+        try:
+            super().connect()
+        finally:
+            tcp_done = _connection_ready.get()
+            if tcp_done is not None:
+                tls_done = time.perf_counter()
+                tracer.record("http.tls", tcp_done, tls_done, host=self.host)
+                _connection_ready.set(tls_done)
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+class TracingHTTPAdapter(HTTPAdapter):
+    """requests adapter that splits each call into DNS, connect, TLS, TTFB and body spans.
+
+    DNS/connect/TLS only appear when a new connection is opened; a reused
+    pooled connection goes straight to TTFB.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TracedHTTPConnectionPool,
+            "https": TracedHTTPSConnectionPool
+        }
+
+    def send(self, request, stream=False, **kwargs):
+        if not tracer.enabled:
+            return super().send(request, stream=stream, **kwargs)
+        host = request.url.split("/")[2] if "://" in request.url else request.url
+        with tracer.span(f"http.{request.method}", host=host) as span:
+            _connection_ready.set(None)
+            started = time.perf_counter()
+            response = super().send(request, stream=stream, **kwargs)
+            headers_at = time.perf_counter()
+            tracer.record("http.ttfb", _connection_ready.get() or started, headers_at, host=host)
+            span.set(status=response.status_code)
+            if not stream:
+                # Read the body here so its transfer time gets its own span
+                size = len(response.content)
+                tracer.record("http.body", headers_at, time.perf_counter(), host=host, bytes=size)
+            return response
+
+
+def mount_tracing(session, pool_size: int = 32):
+    """Mount tracing adapters on a requests session (no-ops while tracing is off)."""
+    adapter = TracingHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session